@@ -0,0 +1,94 @@
+"""
+PostgreSQL backend with connection health checks and an optional in-process pool.
+
+Settings of a `DATABASES` entry in addition to the stock ones:
+
+- `CONN_HEALTH_CHECKS`: a reused connection is checked with `SELECT 1` before its first query in a request
+  and replaced if it's broken, e.g. after a database restart. Like the setting of Django 4.1.
+- `POOL`: `{"SIZE": 4, "TIMEOUT": 5.0}` - connections are returned to a per process pool of at most SIZE
+  connections instead of being closed, a thread waits up to TIMEOUT seconds for a free one.
+  `CONN_MAX_AGE` has to be 0, so the connection goes back to the pool at the end of every request.
+  Wait times are reported by `contrib.django.db.pool.pool_stats`.
+"""
+import time
+import typing
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import OperationalError
+from django.db.backends.postgresql import base
+
+from contrib.django.db.pool import ConnectionPool, PoolTimeout, get_pool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    health_check_done = False
+    # Time the last pooled connection was waited for
+    pool_wait_seconds = 0.0
+
+    @property
+    def health_checks_enabled(self) -> bool:
+        return self.settings_dict.get("CONN_HEALTH_CHECKS", False)
+
+    @property
+    def pool(self) -> typing.Optional[ConnectionPool]:
+        options = self.settings_dict.get("POOL")
+        if not options:
+            return None
+        return get_pool(self.alias, options.get("SIZE", 4), options.get("TIMEOUT", 5.0))
+
+    def check_settings(self):
+        super().check_settings()
+        if self.settings_dict.get("POOL") and self.settings_dict["CONN_MAX_AGE"] != 0:
+            raise ImproperlyConfigured(
+                "Pooled connections are returned to the pool by closing them, set CONN_MAX_AGE=0"
+            )
+
+    def _check_connection(self, connection) -> bool:
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except base.Database.Error:
+            return False
+        return True
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        started_at = time.monotonic()
+        try:
+            connection = pool.acquire(
+                lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+                self._check_connection if self.health_checks_enabled else None,
+            )
+        except PoolTimeout as e:
+            raise OperationalError(str(e)) from e
+        self.pool_wait_seconds = time.monotonic() - started_at
+        # Set by the stock method for new connections only
+        self.isolation_level = self.settings_dict["OPTIONS"].get("isolation_level", connection.isolation_level)
+        return connection
+
+    def connect(self):
+        # New and pooled connections are checked already, `connect` itself calls `ensure_connection`
+        self.health_check_done = True
+        super().connect()
+
+    def ensure_connection(self):
+        if self.connection is not None and self.health_checks_enabled and not self.health_check_done:
+            self.health_check_done = True
+            if not self.in_atomic_block and not self.is_usable():
+                self.close()
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Called on request start and finish, the connection is checked again before its next use
+        self.health_check_done = False
+
+    def _close(self):
+        pool = self.pool
+        if pool is None or self.connection is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.release(self.connection)
@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+import typing
+
+import psycopg2
+from psycopg2 import extensions
+
+Connection = extensions.connection
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    """
+    Bounded set of open psycopg2 connections shared by threads of one process.
+
+    `acquire` reuses the most recently released idle connection, opens a new one while the pool has less than
+    `size` connections and waits up to `timeout` seconds otherwise. Wait times are accumulated in `stats()`.
+    """
+
+    def __init__(self, size: int, timeout: float):
+        self.size = size
+        self.timeout = timeout
+        self._idle: typing.List[Connection] = []
+        # Open connections, idle and in use ones
+        self._open_cnt = 0
+        self._cond = threading.Condition()
+
+        self.acquired_cnt = 0
+        self.waited_cnt = 0
+        self.timeouts_cnt = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def acquire(
+        self,
+        create: typing.Callable[[], Connection],
+        check: typing.Optional[typing.Callable[[Connection], bool]] = None,
+    ) -> Connection:
+        """Return an idle connection passing `check` or a new one from `create`, raise `PoolTimeout` if none is free."""
+        started_at = time.monotonic()
+        deadline = started_at + self.timeout
+        waited = False
+        while True:
+            with self._cond:
+                while not self._idle and self._open_cnt >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts_cnt += 1
+                        raise PoolTimeout(f"No free connection in the pool of {self.size} in {self.timeout}s")
+                    waited = True
+                    self._cond.wait(remaining)
+
+                connection = self._idle.pop() if self._idle else None
+                if connection is None:
+                    self._open_cnt += 1
+
+            if connection is None:
+                try:
+                    connection = create()
+                except BaseException:
+                    self._discard()
+                    raise
+            elif connection.closed or check is not None and not check(connection):
+                self._discard(connection)
+                continue
+
+            self._record_wait(time.monotonic() - started_at, waited)
+            return connection
+
+    def release(self, connection: Connection):
+        """Return the connection, broken ones and ones in a failed transaction state are closed instead."""
+        if not connection.closed and self._reset(connection):
+            with self._cond:
+                self._idle.append(connection)
+                self._cond.notify()
+        else:
+            self._discard(connection)
+
+    def _reset(self, connection: Connection) -> bool:
+        status = connection.info.transaction_status
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
+    def _discard(self, connection: typing.Optional[Connection] = None):
+        if connection is not None and not connection.closed:
+            try:
+                connection.close()
+            except Exception:
+                pass
+        with self._cond:
+            self._open_cnt -= 1
+            self._cond.notify()
+
+    def _record_wait(self, seconds: float, waited: bool):
+        with self._cond:
+            self.acquired_cnt += 1
+            self.waited_cnt += waited
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def close(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._discard(connection)
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "size": self.size,
+                "open": self._open_cnt,
+                "idle": len(self._idle),
+                "acquired": self.acquired_cnt,
+                "waited": self.waited_cnt,
+                "timeouts": self.timeouts_cnt,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+            }
+
+
+_pools: typing.Dict[typing.Tuple[int, str], ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, size: int, timeout: float) -> ConnectionPool:
+    """Pool of the database alias in the current process, forked workers never share connections."""
+    key = (os.getpid(), alias)
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(size, timeout)
+        return _pools[key]
+
+
+def pool_stats() -> typing.Dict[str, dict]:
+    """Stats of the current process pools by database alias."""
+    pid = os.getpid()
+    with _pools_lock:
+        pools = {alias: pool for (pool_pid, alias), pool in _pools.items() if pool_pid == pid}
+    return {alias: pool.stats() for alias, pool in pools.items()}
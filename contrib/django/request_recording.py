@@ -0,0 +1,104 @@
+"""
+Records sampled requests as JSON lines for `manage.py replay`.
+
+Enabled by REQUEST_RECORDING_PATH. Only paths starting with one of REQUEST_RECORDING_PATH_PREFIXES are recorded,
+a REQUEST_RECORDING_SAMPLE_RATE share of them. Every line is appended with a single `write` to a file opened with
+O_APPEND, so lines of gunicorn workers sharing the file don't interleave. Cookies, authorization and other headers
+are never recorded, requests with bodies longer than REQUEST_RECORDING_MAX_BODY bytes are skipped.
+"""
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+import typing
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+# Headers which change the response of a replayed request
+RECORDED_HEADERS = ["Accept", "Accept-Encoding", "Content-Type"]
+
+
+class RequestRecorder:
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: typing.Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _open(self) -> int:
+        with self._lock:
+            if self._fd is None:
+                self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        return self._fd
+
+    def write(self, entry: dict):
+        os.write(self._open(), (json.dumps(entry, ensure_ascii=False) + "\n").encode())
+
+
+def make_entry(request, body: str, response, started_at: float, seconds: float) -> dict:
+    return {
+        "ts": round(started_at, 3),
+        "method": request.method,
+        "path": request.get_full_path(),
+        "headers": {h: request.headers[h] for h in RECORDED_HEADERS if h in request.headers},
+        "body": body,
+        "status": response.status_code,
+        "ms": round(seconds * 1000, 1),
+    }
+
+
+class RequestRecordingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_RECORDING_PATH:
+            raise MiddlewareNotUsed
+        self.recorder = RequestRecorder(settings.REQUEST_RECORDING_PATH)
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Mark the middleware as a coroutine function for Django
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def _is_recorded(self, request) -> bool:
+        if not request.path.startswith(tuple(settings.REQUEST_RECORDING_PATH_PREFIXES)):
+            return False
+        try:
+            content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            # Left to Django, which reads such bodies as empty
+            return False
+        return (
+            content_length <= settings.REQUEST_RECORDING_MAX_BODY
+            and random.random() < settings.REQUEST_RECORDING_SAMPLE_RATE
+        )
+
+    def _read_body(self, request) -> str:
+        # Before the view, which consumes the stream
+        return request.body.decode(errors="replace") if request.method not in ("GET", "HEAD") else ""
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self._is_recorded(request):
+            return self.get_response(request)
+        body = self._read_body(request)
+        started_at, perf_started_at = time.time(), time.perf_counter()
+        response = self.get_response(request)
+        self._record(request, body, response, started_at, time.perf_counter() - perf_started_at)
+        return response
+
+    async def __acall__(self, request):
+        if not self._is_recorded(request):
+            return await self.get_response(request)
+        body = self._read_body(request)
+        started_at, perf_started_at = time.time(), time.perf_counter()
+        response = await self.get_response(request)
+        self._record(request, body, response, started_at, time.perf_counter() - perf_started_at)
+        return response
+
+    def _record(self, request, body: str, response, started_at: float, seconds: float):
+        self.recorder.write(make_entry(request, body, response, started_at, seconds))
@@ -0,0 +1,161 @@
+"""
+Per request timings: DB queries, named spans of view code and the total time.
+
+`RequestTimingMiddleware` sends them as a `Server-Timing` header and a JSON log line, requests slower than
+REQUEST_TIMING_SLOW_MS are logged as warnings with their slowest queries. Code marks spans with `timed(name)`,
+which does nothing outside of a request. Queries are recorded by a wrapper installed on every connection,
+it follows the request into `sync_to_async` threads with the context variable.
+"""
+import asyncio
+import contextlib
+import json
+import logging
+import threading
+import time
+import typing
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+_current: ContextVar[typing.Optional["RequestTimings"]] = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    # Enough to find the slow ones, N+1 loops would take memory otherwise
+    MAX_QUERIES = 100
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.db_cnt = 0
+        self.db_seconds = 0.0
+        self.queries: typing.List[typing.Tuple[str, float]] = []
+        self.spans: typing.Dict[str, float] = {}
+        # Queries of concurrent executor threads
+        self._lock = threading.Lock()
+
+    def add_span(self, name: str, seconds: float):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def add_query(self, sql: str, seconds: float):
+        with self._lock:
+            self.db_cnt += 1
+            self.db_seconds += seconds
+            if len(self.queries) < self.MAX_QUERIES:
+                self.queries.append((sql, seconds))
+
+    @property
+    def total_seconds(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    def server_timing(self, total_seconds: float) -> str:
+        metrics = [f'db;dur={self.db_seconds * 1000:.1f};desc="{self.db_cnt} queries"']
+        metrics += [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.spans.items()]
+        metrics.append(f"total;dur={total_seconds * 1000:.1f}")
+        return ", ".join(metrics)
+
+    def as_dict(self, total_seconds: float) -> dict:
+        return {
+            "total_ms": round(total_seconds * 1000, 1),
+            "db_ms": round(self.db_seconds * 1000, 1),
+            "db_queries": self.db_cnt,
+            **{f"{name}_ms": round(seconds * 1000, 1) for name, seconds in self.spans.items()},
+        }
+
+
+def current_timings() -> typing.Optional[RequestTimings]:
+    return _current.get()
+
+
+@contextlib.contextmanager
+def timed(name: str) -> typing.Generator[None, None, None]:
+    """Add the block duration to the `name` span of the current request."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add_span(name, time.perf_counter() - started_at)
+
+
+def _record_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started_at = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add_query(sql, time.perf_counter() - started_at)
+
+
+def _install(connection):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+@receiver(connection_created)
+def _install_on_connect(sender, connection, **kwargs):
+    _install(connection)
+
+
+class RequestTimingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Mark the middleware as a coroutine function for Django
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings, token = self._start()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings)
+
+    async def __acall__(self, request):
+        timings, token = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings)
+
+    def _start(self):
+        # Connections opened before the middleware was loaded
+        for connection in connections.all():
+            _install(connection)
+        timings = RequestTimings()
+        return timings, _current.set(timings)
+
+    def _finish(self, request, response, timings: RequestTimings):
+        total_seconds = timings.total_seconds
+        response["Server-Timing"] = timings.server_timing(total_seconds)
+
+        line = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            **timings.as_dict(total_seconds),
+        }
+        if total_seconds * 1000 < settings.REQUEST_TIMING_SLOW_MS:
+            logger.info(json.dumps(line))
+        else:
+            queries = sorted(timings.queries, key=lambda q: -q[1])[: settings.REQUEST_TIMING_SLOW_QUERIES]
+            line["queries"] = [{"sql": sql, "ms": round(seconds * 1000, 1)} for sql, seconds in queries]
+            logger.warning(json.dumps(line))
+        return response
@@ -0,0 +1,170 @@
+import hashlib
+import threading
+import time
+import typing
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+
+from django.core.cache import caches
+
+_MISSING = object()
+
+
+class ResponseCacheBackend:
+    def get(self, key: str) -> typing.Any:
+        """Return cached value or `_MISSING`."""
+        raise NotImplementedError
+
+    def set(self, key: str, value: typing.Any, ttl: int):
+        raise NotImplementedError
+
+    @contextmanager
+    def lock(self, key: str) -> typing.Generator[None, None, None]:
+        """
+        Exclusive recomputation lock for a cold key.
+
+        Waiting is limited by lock_timeout, the caller recomputes the value without the lock after that.
+        """
+        raise NotImplementedError
+
+
+class LocMemLRUBackend(ResponseCacheBackend):
+    """Process local LRU, waiting threads are blocked on a per key lock."""
+
+    def __init__(self, max_entries: int = 10000, lock_timeout: float = 10.0):
+        self.max_entries = max_entries
+        self.lock_timeout = lock_timeout
+        self._data: typing.OrderedDict[str, typing.Tuple[float, typing.Any]] = OrderedDict()
+        self._data_lock = threading.Lock()
+        self._key_locks: typing.Dict[str, typing.List] = {}
+
+    def get(self, key):
+        with self._data_lock:
+            item = self._data.get(key)
+            if item is None:
+                return _MISSING
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return _MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._data_lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    @contextmanager
+    def lock(self, key):
+        with self._data_lock:
+            # [lock, number of holders and waiters]
+            key_lock = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            key_lock[1] += 1
+
+        acquired = key_lock[0].acquire(timeout=self.lock_timeout)
+        try:
+            yield
+        finally:
+            if acquired:
+                key_lock[0].release()
+            with self._data_lock:
+                key_lock[1] -= 1
+                if not key_lock[1]:
+                    del self._key_locks[key]
+
+
+class DjangoCacheBackend(ResponseCacheBackend):
+    """Shared Django cache, the lock is an `add`-ed key so only one worker process recomputes a cold key."""
+
+    def __init__(self, alias: str = "default", lock_timeout: float = 10.0, poll_interval: float = 0.05):
+        self.alias = alias
+        self.lock_timeout = lock_timeout
+        self.poll_interval = poll_interval
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, key):
+        return self.cache.get(key, _MISSING)
+
+    def set(self, key, value, ttl):
+        self.cache.set(key, value, ttl)
+
+    @contextmanager
+    def lock(self, key):
+        lock_key = f"{key}:lock"
+        deadline = time.monotonic() + self.lock_timeout
+        while not self.cache.add(lock_key, 1, int(self.lock_timeout) + 1):
+            if self.cache.get(key, _MISSING) is not _MISSING or time.monotonic() > deadline:
+                yield
+                return
+            time.sleep(self.poll_interval)
+
+        try:
+            yield
+        finally:
+            self.cache.delete(lock_key)
+
+
+class ResponseCache:
+    """
+    Caches response data of viewset actions.
+
+    Keys consist of action, lookup kwargs, normalized query params and a data version,
+    so bumping the version invalidates all entries at once.
+    """
+
+    def __init__(
+        self,
+        backend: ResponseCacheBackend,
+        get_version: typing.Callable[[], typing.Any],
+        ttls: typing.Dict[str, int],
+        key_prefix: str = "response",
+    ):
+        self.backend = backend
+        self.get_version = get_version
+        self.ttls = ttls
+        self.key_prefix = key_prefix
+        self.hits: typing.Counter[str] = Counter()
+        self.misses: typing.Counter[str] = Counter()
+
+    def is_cached(self, action: str) -> bool:
+        return action in self.ttls
+
+    def make_key(self, action: str, kwargs: dict, query_params) -> str:
+        params = sorted((k, sorted(v)) for k, v in query_params.lists())
+        kwargs = sorted((k, str(v)) for k, v in kwargs.items())
+        digest = hashlib.md5(repr((kwargs, params)).encode()).hexdigest()
+        return f"{self.key_prefix}:{self.get_version()}:{action}:{digest}"
+
+    def get_or_compute(self, action: str, key: str, compute: typing.Callable[[], typing.Any]) -> typing.Any:
+        value = self.backend.get(key)
+        if value is not _MISSING:
+            self.record_lookup(action, hit=True)
+            return value
+
+        with self.backend.lock(key):
+            # Could be computed while we were waiting for the lock
+            value = self.backend.get(key)
+            if value is not _MISSING:
+                self.record_lookup(action, hit=True)
+                return value
+
+            self.record_lookup(action, hit=False)
+            value = compute()
+            self.backend.set(key, value, self.ttls[action])
+            return value
+
+    def record_lookup(self, action: str, hit: bool):
+        """Count a cache lookup, an override can export it."""
+        if hit:
+            self.hits[action] += 1
+        else:
+            self.misses[action] += 1
+
+    def stats(self) -> dict:
+        return {action: {"hits": self.hits[action], "misses": self.misses[action]} for action in self.ttls}
@@ -0,0 +1,183 @@
+import decimal
+import typing
+
+from django.db import models
+from rest_framework import fields as drf_fields
+from rest_framework import serializers
+from rest_framework.settings import api_settings
+
+Serialize = typing.Callable[[typing.Any, typing.Optional[serializers.Serializer]], dict]
+
+_compiled: typing.Dict[typing.Tuple[type, bool], Serialize] = {}
+
+
+def _iter_related(value):
+    return value.all() if isinstance(value, models.Manager) else value
+
+
+def _is_plain(field: drf_fields.Field, base: type) -> bool:
+    """Field represents values exactly like `base`."""
+    return isinstance(field, base) and type(field).to_representation is base.to_representation
+
+
+def _is_compiled(field: drf_fields.Field) -> bool:
+    """Nested serializer which can be called through its compiled function directly."""
+    return (
+        isinstance(field, CompiledSerializerMixin)
+        and type(field).to_representation is CompiledSerializerMixin.to_representation
+        and field.can_compile()
+    )
+
+
+def _decimal_representation(field: drf_fields.DecimalField) -> typing.Callable[[typing.Any], typing.Any]:
+    """`DecimalField.to_representation` skipping `quantize` for values already having decimal_places digits."""
+    to_representation = field.to_representation
+    coerce_to_string = getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.decimal_places is None or not coerce_to_string or field.localize:
+        return to_representation
+
+    exponent = -field.decimal_places
+
+    def decimal_representation(value):
+        # Database values are quantized already
+        if value.__class__ is decimal.Decimal and value.as_tuple().exponent == exponent:
+            return f"{value:f}"
+        return to_representation(value)
+
+    return decimal_representation
+
+
+class _SerializerCompiler:
+    """
+    Generates the source of `serialize(obj, serializer) -> dict` for one serializer class.
+
+    Plain fields with a single attribute source are inlined, fields with a custom `get_attribute` can be inlined
+    by providing `compiled_attribute()`: an expression over `obj` returning the same value.
+    Every other field goes through its own `get_attribute` and `to_representation`,
+    so the output matches `Serializer.to_representation`.
+
+    `serializer` is only used for fields which aren't inlined, it isn't needed when `serialize.uses_serializer`
+    is False. That saves building the serializer fields on every instantiation, which costs more than serializing.
+    """
+
+    def __init__(self, serializer: serializers.Serializer, mapping: bool):
+        self.serializer = serializer
+        self.mapping = mapping
+        self.model = getattr(getattr(serializer, "Meta", None), "model", None)
+        self.namespace = {"_iter_related": _iter_related, "SkipField": drf_fields.SkipField}
+        self.lines = ["def serialize(obj, serializer):", "    d = {}"]
+        self.uses_serializer = False
+
+    def _read(self, field: drf_fields.Field) -> typing.Optional[str]:
+        """Expression of the field attribute or None if `get_attribute` has to be called."""
+        if type(field).get_attribute is not drf_fields.Field.get_attribute:
+            if hasattr(field, "compiled_attribute") and not self.mapping:
+                return field.compiled_attribute()
+            return None
+        if field.source == "*" or "." in field.source:
+            return None
+        if self.mapping:
+            return f"obj[{field.source!r}]"
+        # Callable attributes are called by `get_attribute`, the model tells which ones are plain values
+        if self.model is None or callable(getattr(self.model, field.source, None)):
+            return None
+        return f"obj.{field.source}"
+
+    def _nested(self, idx: int, name: str, serializer: serializers.Serializer, many: bool) -> str:
+        serialize = compile_serializer(serializer, self.mapping)
+        self.namespace[f"_s{idx}"] = serialize
+        if not serialize.uses_serializer:
+            nested = "None"
+        else:
+            self.uses_serializer = True
+            nested = f"serializer.fields[{name!r}]{'.child' if many else ''}"
+        self.lines.append(f"    nested = {nested}")
+        if many:
+            return f"[_s{idx}(x, nested) for x in _iter_related(v)]"
+        return f"_s{idx}(v, nested)"
+
+    def _inline(self, idx: int, field: drf_fields.Field) -> typing.Optional[str]:
+        """Expression of a non None attribute value `v` or None if the field isn't inlined, may add setup lines."""
+        if type(field) in (drf_fields.IntegerField, drf_fields.CharField, drf_fields.URLField):
+            # Subclasses may override `to_representation` of these
+            return "int(v)" if type(field) is drf_fields.IntegerField else "str(v)"
+        if _is_plain(field, drf_fields.ReadOnlyField):
+            return "v"
+        if _is_plain(field, drf_fields.BooleanField):
+            self.namespace[f"_f{idx}"] = field.to_representation
+            return f"v if v.__class__ is bool else _f{idx}(v)"
+        if _is_plain(field, drf_fields.DecimalField):
+            self.namespace[f"_f{idx}"] = _decimal_representation(field)
+            return f"_f{idx}(v)"
+        if _is_plain(field, drf_fields.ListField) and type(field.child) is drf_fields.IntegerField:
+            return "[None if x is None else int(x) for x in v]"
+        if _is_compiled(field):
+            return self._nested(idx, field.field_name, field, many=False)
+        if type(field).to_representation is serializers.ListSerializer.to_representation and _is_compiled(field.child):
+            return self._nested(idx, field.field_name, field.child, many=True)
+        return None
+
+    def compile(self) -> Serialize:
+        for idx, field in enumerate(self.serializer._readable_fields):
+            name = field.field_name
+            read = self._read(field)
+            expr = self._inline(idx, field) if read is not None else None
+            if expr is not None:
+                self.lines += [
+                    f"    v = {read}",
+                    f"    d[{name!r}] = None if v is None else {expr}",
+                ]
+            else:
+                self.uses_serializer = True
+                self.lines += [
+                    f"    f = serializer.fields[{name!r}]",
+                    "    try:",
+                    "        v = f.get_attribute(obj)",
+                    "    except SkipField:",
+                    "        pass",
+                    "    else:",
+                    f"        d[{name!r}] = None if v is None else f.to_representation(v)",
+                ]
+        self.lines.append("    return d")
+
+        exec("\n".join(self.lines), self.namespace)
+        serialize = self.namespace["serialize"]
+        serialize.source = "\n".join(self.lines)
+        serialize.uses_serializer = self.uses_serializer
+        return serialize
+
+
+def compile_serializer(serializer: serializers.Serializer, mapping: bool = False) -> Serialize:
+    """
+    Return `serialize(obj, serializer)` for the serializer class, generated once per class.
+
+    With `mapping` the function reads `.values()` rows instead of model instances, rows must contain every field.
+    """
+    key = (type(serializer), mapping)
+    if key not in _compiled:
+        _compiled[key] = _SerializerCompiler(serializer, mapping).compile()
+    return _compiled[key]
+
+
+class CompiledSerializerMixin:
+    """
+    Serializes instances with a function compiled from the serializer fields instead of the generic field loop.
+
+    The output is the same as the one of `Serializer.to_representation`. Set `compiled = False` to use the latter.
+    """
+
+    compiled = True
+
+    def can_compile(self) -> bool:
+        meta = getattr(self, "Meta", None)
+        return self.compiled and not hasattr(meta, "response_serializer_class")
+
+    def to_representation(self, instance) -> dict:
+        if not self.can_compile():
+            return super().to_representation(instance)
+        return compile_serializer(self)(instance, self)
+
+    def to_representation_rows(self, rows: typing.Iterable[dict]) -> typing.List[dict]:
+        """Serialize `.values()` rows, every serializer field has to be a column of the row."""
+        serialize = compile_serializer(self, mapping=True)
+        return [serialize(row, self) for row in rows]
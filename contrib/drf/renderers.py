@@ -0,0 +1,61 @@
+import msgpack
+import orjson
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+# DRF encoder for types which aren't JSON native: Decimal, lazy strings, querysets, ...
+_encoder = encoders.JSONEncoder()
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """
+    `JSONRenderer` producing the same bytes with orjson.
+
+    Types orjson doesn't know, like `Decimal`, and datetimes are converted by the DRF encoder,
+    so their format doesn't change. Error responses, indented output and data orjson refuses to encode,
+    like integers over 64 bits, are rendered by `JSONRenderer` itself.
+    Unlike `JSONRenderer` NaN and infinite floats are rendered as null instead of raising an error.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        response = renderer_context.get("response")
+        if (
+            response is not None
+            and response.exception
+            or self.get_indent(accepted_media_type, renderer_context)
+            or self.ensure_ascii
+            or not self.compact
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=_encoder.default, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same as `JSONRenderer`: U+2028 and U+2029 are valid JSON but break JavaScript
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """
+    MessagePack for internal consumers, negotiated with `Accept: application/msgpack` or `?format=msgpack`.
+
+    Values are converted like in JSON responses, a decoded payload equals the decoded JSON one.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_encoder.default, use_bin_type=True)
@@ -1,8 +1,15 @@
+import datetime
 import typing
 
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
 from rest_framework import permissions, response, serializers, status, viewsets
 from rest_framework.generics import get_object_or_404
 
+from contrib.django.request_timing import timed
+from contrib.drf.cache import ResponseCache
+
 
 class BaseViewSet(viewsets.GenericViewSet):
 
@@ -44,20 +51,84 @@ class BaseViewSet(viewsets.GenericViewSet):
         self.serializer = self.get_serializer(data=self.request.data)
         self.serializer.is_valid(raise_exception=True)
         self.serializer.save()
-        return response.Response(self.serializer.data, status=success_status)
+        return response.Response(self._serialized_data(), status=success_status)
+
+    def _serialized_data(self):
+        with timed("serialize"):
+            return self.serializer.data
+
+    def finalize_response(self, request, resp, *args, **kwargs):
+        resp = super().finalize_response(request, resp, *args, **kwargs)
+        if isinstance(resp, response.Response) and not resp.is_rendered:
+            # Rendered here instead of by the handler to be timed
+            with timed("render"):
+                resp.render()
+        return resp
+
+    def get_response_cache(self) -> typing.Optional[ResponseCache]:
+        return None
+
+    def _cached_response(self, get_data: typing.Callable[[], typing.Any]) -> response.Response:
+        cache = self.get_response_cache()
+        if cache is None or not cache.is_cached(self.action):
+            return response.Response(get_data())
+
+        key = cache.make_key(self.action, self.kwargs, self.request.query_params)
+        return response.Response(cache.get_or_compute(self.action, key, get_data))
+
+    def get_etag(self) -> typing.Optional[str]:
+        """Strong validator of the current action representation, computed without loading the object."""
+        return None
+
+    def get_last_modified(self) -> typing.Optional[datetime.datetime]:
+        return None
+
+    def get_cache_control(self) -> typing.Dict[str, typing.Any]:
+        return {}
+
+    def _conditional_retrieve(self, get_response: typing.Callable[[], HttpResponseBase]) -> HttpResponseBase:
+        """Answer `If-None-Match`/`If-Modified-Since` with 304 before the object is loaded."""
+        etag = self.get_etag()
+        if etag is not None:
+            etag = quote_etag(etag)
+        last_modified = self.get_last_modified()
+        last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+
+        resp = get_conditional_response(self.request, etag=etag, last_modified=last_modified_ts)
+        if resp is None:
+            resp = get_response()
+
+        if resp.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            if etag is not None:
+                resp["ETag"] = etag
+            if last_modified_ts is not None:
+                resp["Last-Modified"] = http_date(last_modified_ts)
+            if cache_control := self.get_cache_control():
+                patch_cache_control(resp, **cache_control)
+            # The representation is negotiated
+            patch_vary_headers(resp, ["Accept"])
+        return resp
 
     def _retrieve(self, obj=None) -> response.Response:
+        if obj is not None:
+            return response.Response(self._retrieve_data(obj))
+        return self._conditional_retrieve(lambda: self._cached_response(self._retrieve_data))
+
+    def _retrieve_data(self, obj=None):
         instance = obj or self.get_object()
         self.serializer = self.get_serializer(instance)
-        return response.Response(self.serializer.data)
+        return self._serialized_data()
 
     def _list(self):
+        return self._cached_response(self._list_data)
+
+    def _list_data(self):
         queryset = self.filter_queryset(self.get_queryset())
 
         page = self.paginate_queryset(queryset)
         if page is not None:
             self.serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(self.serializer.data)
+            return self.get_paginated_response(self._serialized_data()).data
 
         self.serializer = self.get_serializer(queryset, many=True)
-        return response.Response(self.serializer.data)
+        return self._serialized_data()
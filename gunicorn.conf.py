@@ -0,0 +1,25 @@
+"""
+Gunicorn settings picked up from the working directory by `gunicorn uptech.wsgi` and `uptech.asgi`.
+
+Workers write Prometheus samples into files of PROMETHEUS_MULTIPROC_DIR, which `uptech.metrics` merges on scrape.
+The directory is per master process by default and must be empty when the server starts.
+"""
+import glob
+import os
+import tempfile
+
+
+def on_starting(server):
+    path = os.environ.setdefault(
+        "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), f"uptech-metrics-{os.getpid()}")
+    )
+    os.makedirs(path, exist_ok=True)
+    # Samples of the previous run
+    for file_name in glob.glob(os.path.join(path, "*.db")):
+        os.remove(file_name)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,108 @@
+import importlib
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from rest_framework.permissions import IsAuthenticated
+
+from uptech.api import urls
+from uptech.api.products import async_views
+from uptech.product.catalog import bump_catalog_version
+from uptech.product.clusters import CLUSTER
+from uptech.product.models import MedsisDrug, Product
+
+# Queries run in executor threads on their own connections and see committed data only
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+@pytest.fixture()
+def products(product_factory):
+    p1, p2, p3 = (product_factory(sber_product_id=i, medsis_id=i, name=f"Продукт {i}") for i in (1, 7, 9))
+    p = product_factory(sber_product_id=8, medsis_id=8, name="Продукт 8", analogue_ids=[p1.pk, p2.pk, p3.pk, 0])
+    bump_catalog_version()
+    return p1, p2, p3, p
+
+
+def _call(view, path, params=None, **kwargs):
+    request = RequestFactory().get(path, params or {}, HTTP_ACCEPT="application/json")
+    return async_to_sync(view)(request, **kwargs)
+
+
+@pytest.mark.parametrize(
+    "view, url_name", [(async_views.retrieve, "products-detail"), (async_views.info, "products-info")]
+)
+def test_retrieve(client, products, view, url_name):
+    for pk in [p.pk for p in products] + [0]:
+        url = reverse(f"api:{url_name}", args=(pk,))
+        expected = client.get(url, HTTP_ACCEPT="application/json")
+
+        resp = _call(view, url, pk=pk)
+        assert resp.status_code == expected.status_code
+        assert resp.content == expected.content
+        assert resp.get("ETag") == expected.get("ETag")
+        assert resp.get("Cache-Control") == expected.get("Cache-Control")
+
+    pk = products[-1].pk
+    etag = _call(view, "/", pk=pk)["ETag"]
+    resp = async_to_sync(view)(RequestFactory().get("/", HTTP_IF_NONE_MATCH=etag), pk=pk)
+    assert resp.status_code == 304
+
+
+def test_retrieve_cluster(client, products):
+    MedsisDrug.objects.create(medsis_id=8, analogue_medsis_ids=[1, 7, 9])
+    # Unknown ids of stored arrays have no drug
+    Product.objects.filter(pk=products[-1].pk).update(analogue_ids=[p.pk for p in products[:3]])
+    for pk in [p.pk for p in products]:
+        url = reverse("api:products-detail", args=(pk,))
+        expected = client.get(url, HTTP_ACCEPT="application/json")
+
+        with override_settings(PRODUCT_ANALOGUE_SOURCE=CLUSTER):
+            resp = _call(async_views.retrieve, url, pk=pk)
+        assert resp.content == expected.content
+
+
+@pytest.mark.parametrize(
+    "params",
+    [{}, {"name": "продукт"}, {"name": "дукт", "mode": "ranked"}, {"page_size": 2}, {"mode": "unknown"}],
+)
+def test_search(client, products, params):
+    url = reverse("api:products-search")
+    expected = client.get(url, params, HTTP_ACCEPT="application/json")
+
+    resp = _call(async_views.search, url, params)
+    assert resp.status_code == expected.status_code
+    assert resp.content == expected.content
+
+
+def test_msgpack(products):
+    request = RequestFactory().get("/", HTTP_ACCEPT="application/msgpack")
+    resp = async_to_sync(async_views.retrieve)(request, pk=products[-1].pk)
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == "application/msgpack"
+
+
+def test_initial(products, monkeypatch):
+    pk = products[-1].pk
+    request = RequestFactory().get("/", HTTP_ACCEPT="text/csv")
+    assert async_to_sync(async_views.retrieve)(request, pk=pk).status_code == 406
+    assert async_to_sync(async_views.search)(request).status_code == 406
+
+    monkeypatch.setattr(async_views._AsyncProductsViewSet, "permission_classes", [IsAuthenticated])
+    assert _call(async_views.retrieve, "/", pk=pk).status_code == 403
+
+
+@pytest.mark.parametrize("mode", ["persistent", "pool", ""])
+def test_connection_mode(mode):
+    try:
+        with override_settings(PRODUCT_ASYNC_VIEWS_ENABLED=True, DB_CONNECTION_MODE=mode):
+            if mode:
+                assert importlib.reload(urls).urlpatterns[0].callback is async_views.search
+            else:
+                with pytest.raises(ImproperlyConfigured):
+                    importlib.reload(urls)
+    finally:
+        importlib.reload(urls)
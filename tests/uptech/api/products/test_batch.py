@@ -0,0 +1,53 @@
+import pytest
+from django.urls import reverse
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+url = reverse("api:products-batch")
+
+
+@pytest.fixture()
+def products(product_factory):
+    a1 = product_factory(sber_product_id=1, medsis_id=1)
+    a2 = product_factory(sber_product_id=2, medsis_id=2)
+    p1 = product_factory(sber_product_id=3, medsis_id=3, analogue_ids=[a1.pk, a2.pk])
+    p2 = product_factory(sber_product_id=4, medsis_id=4, analogue_ids=[a2.pk, p1.pk])
+    return a1, a2, p1, p2
+
+
+def test_batch(client, products, django_assert_num_queries):
+    a1, a2, p1, p2 = products
+
+    # Products and analogues of all of them
+    with django_assert_num_queries(2):
+        resp = client.post(url, {"ids": [p2.pk, 0, p1.pk, p2.pk]}, format="json")
+    assert resp.status_code == 200, resp.data
+    assert resp.data["not_found"] == [0]
+    assert [p["id"] for p in resp.data["results"]] == [p2.pk, p1.pk]
+    assert [a["id"] for a in resp.data["results"][0]["analogues"]] == [a2.pk, p1.pk]
+    assert [a["id"] for a in resp.data["results"][1]["analogues"]] == [a1.pk, a2.pk]
+
+    for p in resp.data["results"]:
+        retrieve_resp = client.get(reverse("api:products-detail", args=(p["id"],)), format="json")
+        assert retrieve_resp.json() == p
+
+    resp = client.post(url, {"sber_product_ids": [4, 5]}, format="json")
+    assert resp.status_code == 200, resp.data
+    assert [p["id"] for p in resp.data["results"]] == [p2.pk]
+    assert resp.data["not_found"] == [5]
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {},
+        {"ids": [1], "sber_product_ids": [1]},
+        {"ids": list(range(301))},
+        {"ids": ["a"]},
+    ],
+)
+def test_batch_invalid(client, data):
+    resp = client.post(url, data, format="json")
+    assert resp.status_code == 400, resp.data
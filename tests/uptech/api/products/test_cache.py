@@ -0,0 +1,83 @@
+import threading
+import time
+
+import pytest
+from django.urls import reverse
+
+from contrib.drf.cache import LocMemLRUBackend, ResponseCache
+from uptech.api.products.cache import get_product_response_cache
+from uptech.product.catalog import bump_catalog_version
+from uptech.product.models import Product
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+@pytest.fixture()
+def response_cache(settings):
+    settings.PRODUCT_RESPONSE_CACHE_BACKEND = "locmem"
+    get_product_response_cache.cache_clear()
+    yield get_product_response_cache()
+    get_product_response_cache.cache_clear()
+
+
+def test_retrieve_cached(client, response_cache, django_assert_num_queries):
+    p1 = Product.objects.create(sber_product_id=1, name="a")
+    p = Product.objects.create(sber_product_id=2, name="b", analogue_ids=[p1.pk])
+    url = reverse("api:products-detail", args=(p.pk,))
+
+    # Catalog version, product and its analogues
+    with django_assert_num_queries(3):
+        resp = client.get(url, format="json")
+    assert resp.status_code == 200, resp.data
+
+    Product.objects.filter(pk=p.pk).update(name="c")
+    with django_assert_num_queries(0):
+        resp = client.get(url, format="json")
+    assert resp.data["name"] == "b"
+    assert response_cache.stats()["retrieve"] == {"hits": 1, "misses": 1}
+
+    bump_catalog_version()
+    resp = client.get(url, format="json")
+    assert resp.data["name"] == "c"
+
+
+def test_search_cache_key(client, response_cache):
+    Product.objects.create(sber_product_id=1, name="ab")
+    Product.objects.create(sber_product_id=2, name="b")
+    url = reverse("api:products-search")
+
+    resp = client.get(url, {"name": "a"}, format="json")
+    assert len(resp.json()["results"]) == 1
+
+    resp = client.get(url, format="json")
+    assert len(resp.json()["results"]) == 2
+
+    resp = client.get(url, {"name": "a"}, format="json")
+    assert len(resp.json()["results"]) == 1
+    assert response_cache.stats()["search"] == {"hits": 1, "misses": 2}
+
+
+def test_stampede_protection():
+    cache = ResponseCache(LocMemLRUBackend(), get_version=lambda: 1, ttls={"retrieve": 60})
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"id": 1}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get_or_compute("retrieve", "key", compute)))
+        for _ in range(5)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"id": 1}] * 5
+    assert cache.stats()["retrieve"] == {"hits": 4, "misses": 1}
@@ -58,3 +58,58 @@ def test_info(client, url):
     resp = client.get(url(p.pk), format="json")
     assert resp.data["cheapest"]["id"] == p2.pk
     assert resp.data["effective"]["id"] == p3.pk
+
+
+def test_info_num_queries(client, url, django_assert_num_queries):
+    p1 = Product.objects.create(
+        sber_product_id=1,
+        name="a",
+        price=10,
+        score=7,
+        medsis_id=1,
+        safety=90,
+        side_effects=1,
+        contraindications=1,
+        effectiveness=90,
+    )
+    p2 = Product.objects.create(
+        sber_product_id=2,
+        name="b",
+        price=11,
+        score=8,
+        medsis_id=2,
+        safety=90,
+        side_effects=1,
+        contraindications=1,
+        effectiveness=80,
+    )
+    p3 = Product.objects.create(
+        sber_product_id=3,
+        name="c",
+        price=12,
+        score=5,
+        medsis_id=3,
+        safety=90,
+        side_effects=1,
+        contraindications=1,
+        effectiveness=5,
+    )
+    Product.objects.filter(pk=p1.pk).update(analogue_ids=[p2.pk, p3.pk])
+    Product.objects.filter(pk=p2.pk).update(analogue_ids=[p1.pk, p3.pk])
+    p = Product.objects.create(sber_product_id=4, name="d", analogue_ids=[p1.pk, p2.pk])
+
+    # Catalog version, product, its analogues
+    # and analogues of cheapest and effective ones which are not loaded yet
+    with django_assert_num_queries(4):
+        resp = client.get(url(p.pk), format="json")
+    assert resp.status_code == 200, resp.data
+    assert resp.data["cheapest"]["id"] == p1.pk
+    assert [a["id"] for a in resp.data["cheapest"]["analogues"]] == [p2.pk, p3.pk]
+    assert resp.data["effective"]["id"] == p1.pk
+
+    Product.objects.filter(pk=p1.pk).update(analogue_ids=[p2.pk])
+    # Catalog version is cached, all analogues of the cheapest one are already loaded
+    with django_assert_num_queries(2):
+        resp = client.get(url(p.pk), format="json")
+    assert resp.status_code == 200, resp.data
+    assert [a["id"] for a in resp.data["cheapest"]["analogues"]] == [p2.pk]
@@ -0,0 +1,59 @@
+import pytest
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+
+from uptech.product.analogues import get_referencing_products
+from uptech.product.clusters import ARRAY, CLUSTER
+from uptech.product.models import MedsisDrug
+from uptech.product.verdicts import refresh_verdicts
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+def _url(pk):
+    return reverse("api:products-referenced-by", args=(pk,))
+
+
+@pytest.fixture()
+def products(product_factory):
+    MedsisDrug.objects.create(medsis_id=1, analogue_medsis_ids=[])
+    MedsisDrug.objects.create(medsis_id=2, analogue_medsis_ids=[1])
+    MedsisDrug.objects.create(medsis_id=3, analogue_medsis_ids=[2, 1])
+    a = product_factory(sber_product_id=1, medsis_id=1)
+    p1 = product_factory(sber_product_id=2, medsis_id=2, analogue_ids=[a.pk])
+    p2 = product_factory(sber_product_id=3, medsis_id=3, analogue_ids=[p1.pk, a.pk])
+    p3 = product_factory(sber_product_id=4, medsis_id=3, analogue_ids=[p1.pk, a.pk])
+    refresh_verdicts()
+    return a, p1, p2, p3
+
+
+@pytest.mark.parametrize("source", [ARRAY, CLUSTER])
+def test_referenced_by(client, products, django_assert_num_queries, source):
+    a, p1, p2, p3 = products
+
+    with override_settings(PRODUCT_ANALOGUE_SOURCE=source):
+        # The product, referencing products and analogue_ids of the cluster ones
+        with django_assert_num_queries(3 if source == CLUSTER else 2):
+            resp = client.get(_url(a.pk), format="json")
+        assert resp.status_code == 200, resp.data
+        results = resp.json()["results"]
+        assert [r["id"] for r in results] == [p1.pk, p2.pk, p3.pk]
+        assert [r["analogue_ids"] for r in results] == [[a.pk], [p1.pk, a.pk], [p1.pk, a.pk]]
+        assert "analogues" not in results[0]
+
+        assert [r["id"] for r in client.get(_url(p1.pk), format="json").json()["results"]] == [p2.pk, p3.pk]
+        assert client.get(_url(p3.pk), format="json").json()["results"] == []
+        assert client.get(_url(0), format="json").status_code == 404
+
+
+@pytest.mark.parametrize("source, index", [(ARRAY, "analogue_ids_gin_idx"), (CLUSTER, "medsis_drug_analogues_gin_idx")])
+def test_referenced_by_index(products, source, index):
+    queryset = get_referencing_products(products[:1], source)
+    with connection.cursor() as cursor:
+        # Tiny tables are scanned otherwise
+        cursor.execute("SET LOCAL enable_seqscan = off")
+        plan = queryset.explain()
+    assert index in plan
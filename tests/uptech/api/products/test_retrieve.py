@@ -1,6 +1,7 @@
 import pytest
 from django.urls import reverse
 
+from uptech.product.catalog import bump_catalog_version
 from uptech.product.models import Product
 
 pytestmark = [
@@ -89,3 +90,86 @@ def test_retrieve(client, url):
     assert resp.data["analogues"][2]["is_cheapest"] is False
     assert resp.data["analogues"][2]["is_trustworthy"] is False
     assert resp.data["analogues"][2]["is_effective"] is True
+
+
+def test_retrieve_num_queries(client, url, django_assert_num_queries):
+    p1 = Product.objects.create(
+        sber_product_id=1,
+        name="a",
+        price=10,
+        score=5,
+        medsis_id=1,
+        safety=90,
+        side_effects=1,
+        contraindications=1,
+    )
+    p2 = Product.objects.create(
+        sber_product_id=2,
+        name="b",
+        price=11,
+        score=7,
+        medsis_id=2,
+        safety=90,
+        side_effects=1,
+        contraindications=1,
+        analogue_ids=[p1.pk],
+    )
+    p = Product.objects.create(
+        sber_product_id=3,
+        name="c",
+        price=12,
+        score=8,
+        medsis_id=3,
+        safety=90,
+        side_effects=1,
+        contraindications=1,
+        analogue_ids=[p1.pk, p2.pk],
+    )
+
+    # Catalog version, product and its analogues
+    with django_assert_num_queries(3):
+        resp = client.get(url(p.pk), format="json")
+    assert resp.status_code == 200, resp.data
+    assert [a["id"] for a in resp.data["analogues"]] == [p1.pk, p2.pk]
+
+
+def test_retrieve_not_modified(client, url, django_assert_num_queries):
+    p = Product.objects.create(sber_product_id=1, name="a")
+    bump_catalog_version()
+
+    resp = client.get(url(p.pk), format="json")
+    assert resp.status_code == 200, resp.data
+    assert resp["Cache-Control"] == "public, max-age=60"
+    assert resp["Last-Modified"]
+    etag = resp["ETag"]
+
+    with django_assert_num_queries(0):
+        resp = client.get(url(p.pk), format="json", HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 304
+    assert resp["ETag"] == etag
+
+    resp = client.get(url(p.pk), format="json", HTTP_IF_MODIFIED_SINCE=resp["Last-Modified"])
+    assert resp.status_code == 304
+
+    bump_catalog_version()
+    resp = client.get(url(p.pk), format="json", HTTP_IF_NONE_MATCH=etag)
+    assert resp.status_code == 200, resp.data
+    assert resp["ETag"] != etag
+
+
+def test_retrieve_etag_per_format(client, url):
+    p = Product.objects.create(sber_product_id=1, name="a")
+    bump_catalog_version()
+
+    json_resp = client.get(url(p.pk), HTTP_ACCEPT="application/json")
+    msgpack_resp = client.get(url(p.pk), HTTP_ACCEPT="application/msgpack")
+    assert msgpack_resp["Content-Type"] == "application/msgpack"
+    assert json_resp["ETag"] != msgpack_resp["ETag"]
+    assert "Accept" in json_resp["Vary"] and "Accept" in msgpack_resp["Vary"]
+
+    # A validator of the other format doesn't match
+    resp = client.get(url(p.pk), HTTP_ACCEPT="application/json", HTTP_IF_NONE_MATCH=msgpack_resp["ETag"])
+    assert resp.status_code == 200
+    resp = client.get(url(p.pk), HTTP_ACCEPT="application/json", HTTP_IF_NONE_MATCH=json_resp["ETag"])
+    assert resp.status_code == 304
+    assert "Accept" in resp["Vary"]
@@ -41,6 +41,17 @@ def test_search(client):
     assert results[0]["id"] == p1.pk
 
 
+def test_search_cyrillic_prefix(client):
+    p1 = Product.objects.create(sber_product_id=1, name="Нурофен таблетки")
+    p2 = Product.objects.create(sber_product_id=2, name="НУРОФЕН ЭКСПРЕСС")
+    Product.objects.create(sber_product_id=3, name="Ибупрофен")
+
+    for name in ("нур", "НУР", "нУрОф"):
+        resp = client.get(url, {"name": name}, format="json")
+        assert resp.status_code == 200, resp.data
+        assert [r["id"] for r in resp.json()["results"]] == [p1.pk, p2.pk], name
+
+
 def test_info(client):
     p1 = Product.objects.create(
         sber_product_id=1,
@@ -111,3 +122,51 @@ def test_info(client):
     assert results[0]["analogues"][2]["is_cheapest"] is False
     assert results[0]["analogues"][2]["is_trustworthy"] is False
     assert results[0]["analogues"][2]["is_effective"] is True
+
+
+def test_search_ranked(client):
+    p1 = Product.objects.create(sber_product_id=1, name="Ибупрофен таблетки 200 мг")
+    p2 = Product.objects.create(sber_product_id=2, name="Нурофен таблетки 200 мг")
+    Product.objects.create(sber_product_id=3, name="Аспирин таблетки 500 мг")
+
+    resp = client.get(url, {"name": "ибупрафен", "mode": "ranked"}, format="json")
+    assert resp.status_code == 200, resp.data
+    results = resp.json()["results"]
+    assert [r["id"] for r in results] == [p1.pk]
+
+    resp = client.get(url, {"name": "профен", "mode": "ranked", "page_size": 1}, format="json")
+    assert resp.status_code == 200, resp.data
+    assert [r["id"] for r in resp.json()["results"]] == [p1.pk]
+
+    resp = client.get(resp.json()["next"], format="json")
+    assert resp.status_code == 200, resp.data
+    assert [r["id"] for r in resp.json()["results"]] == [p2.pk]
+    assert resp.json()["next"] is None
+
+    resp = client.get(url, {"name": "ибупрафен", "mode": "ranked", "similarity": 2}, format="json")
+    assert resp.status_code == 400, resp.data
+
+
+def test_search_num_queries(client, django_assert_num_queries):
+    p1 = Product.objects.create(sber_product_id=1, name="a")
+    p2 = Product.objects.create(sber_product_id=2, name="b")
+    p3 = Product.objects.create(sber_product_id=3, name="c", analogue_ids=[p1.pk])
+    Product.objects.filter(pk=p2.pk).update(analogue_ids=[p1.pk, p3.pk])
+
+    # Page and analogues which are not on the page
+    with django_assert_num_queries(2):
+        resp = client.get(url, {"page_size": 2}, format="json")
+    assert resp.status_code == 200, resp.data
+    assert [[a["id"] for a in r["analogues"]] for r in resp.json()["results"]] == [
+        [],
+        [p1.pk, p3.pk],
+    ]
+
+    with django_assert_num_queries(1):
+        resp = client.get(url, format="json")
+    assert resp.status_code == 200, resp.data
+    assert [[a["id"] for a in r["analogues"]] for r in resp.json()["results"]] == [
+        [],
+        [p1.pk, p3.pk],
+        [p1.pk],
+    ]
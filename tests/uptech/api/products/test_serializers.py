@@ -0,0 +1,105 @@
+import random
+import timeit
+from decimal import Decimal
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from contrib.drf.compiled import CompiledSerializerMixin
+from contrib.drf.serializers import ModelSerializer
+from uptech.api.products.serializers import ProductInfoSerializer, ProductSerializer
+from uptech.product.models import Product
+from uptech.product.verdicts import refresh_verdicts
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+def _product(rnd: random.Random, **kwargs) -> Product:
+    return Product(
+        sber_product_id=rnd.randint(1, 10**9),
+        name=rnd.choice(["Нурофен", 'Аспирин "Кардио"', "Но-шпа\tтаблетки"]),
+        country=rnd.choice([None, "Россия", ""]),
+        is_recipe=rnd.choice([True, False]),
+        price=rnd.choice([None, Decimal(1), Decimal("10.5"), Decimal("1234.99")]),
+        detail_page_url=rnd.choice([None, "", "/goods/id228766/"]),
+        medsis_id=rnd.choice([None, rnd.randint(1, 100)]),
+        effectiveness=rnd.randint(0, 100),
+        safety=rnd.randint(0, 100),
+        side_effects=rnd.randint(0, 100),
+        contraindications=rnd.randint(0, 100),
+        score=rnd.choice([Decimal(0), Decimal("5.5"), Decimal("7.0"), Decimal("9.9")]),
+        **kwargs,
+    )
+
+
+@pytest.fixture()
+def products():
+    rnd = random.Random(0)
+    analogues = Product.objects.bulk_create([_product(rnd) for _ in range(20)])
+    products = Product.objects.bulk_create(
+        [_product(rnd, analogue_ids=[a.pk for a in rnd.sample(analogues, rnd.randint(0, 5))]) for _ in range(10)]
+    )
+    # Half of the products are served from stored verdicts
+    refresh_verdicts(Product.objects.filter(pk__in=[p.pk for p in products[::2]]))
+    return Product.objects.filter(pk__in=[p.pk for p in products]).order_by("pk")
+
+
+def _render(monkeypatch, compiled, get_data):
+    monkeypatch.setattr(CompiledSerializerMixin, "compiled", compiled)
+    return JSONRenderer().render(get_data())
+
+
+def test_compiled_product_serializer(monkeypatch, products):
+    def get_data():
+        return ProductSerializer([*products.all()], many=True, context={}).data
+
+    assert _render(monkeypatch, True, get_data) == _render(monkeypatch, False, get_data)
+
+
+def test_compiled_product_info_serializer(monkeypatch, products):
+    for p in products:
+
+        def get_data():
+            return ProductInfoSerializer(Product.objects.get(pk=p.pk), context={}).data
+
+        assert _render(monkeypatch, True, get_data) == _render(monkeypatch, False, get_data)
+
+
+class ProductRowSerializer(CompiledSerializerMixin, ModelSerializer):
+    class Meta:
+        model = Product
+        fields = ["id", "name", "country", "is_recipe", "price", "score", "analogue_ids"]
+
+
+def test_compiled_rows(monkeypatch, products):
+    rows = ProductRowSerializer().to_representation_rows(products.values(*ProductRowSerializer.Meta.fields))
+
+    monkeypatch.setattr(CompiledSerializerMixin, "compiled", False)
+    assert rows == ProductRowSerializer(products, many=True).data
+
+
+@pytest.mark.benchmark
+def test_compiled_serializer_benchmark(monkeypatch):
+    rnd = random.Random(0)
+    page = []
+    for idx in range(10):
+        p = _product(rnd, id=idx)
+        p._analogues = [_product(rnd, id=100 + idx * 10 + a_idx) for a_idx in range(10)]
+        p.analogue_ids = [a.pk for a in p._analogues]
+        page.append(p)
+
+    def serialize_page():
+        return ProductSerializer(page, many=True, context={}).data
+
+    timings = {}
+    for compiled in (False, True):
+        monkeypatch.setattr(CompiledSerializerMixin, "compiled", compiled)
+        timings[compiled] = min(timeit.repeat(serialize_page, number=20, repeat=5)) / 20
+
+    print(
+        f"\nPage of 10 products with 10 analogues: drf {timings[False] * 1000:.2f}ms, "
+        f"compiled {timings[True] * 1000:.2f}ms, x{timings[False] / timings[True]:.1f}"
+    )
+    assert timings[True] < timings[False]
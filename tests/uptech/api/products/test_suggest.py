@@ -0,0 +1,67 @@
+import pytest
+from django.urls import reverse
+
+from uptech.product.models import Product
+from uptech.product.suggest import suggest_index
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+url = reverse("api:products-suggest")
+
+
+@pytest.fixture()
+def products():
+    return [
+        Product.objects.create(sber_product_id=1, name="Ибупрофен таблетки 200 мг"),
+        Product.objects.create(sber_product_id=2, name="ибупрофен  гель 5%"),
+        Product.objects.create(sber_product_id=3, name="Нурофен таблетки 200 мг"),
+    ]
+
+
+@pytest.fixture()
+def index_enabled(settings):
+    settings.PRODUCT_SUGGEST_INDEX_ENABLED = True
+    suggest_index.rebuild()
+    yield suggest_index.index
+    suggest_index.index = None
+    suggest_index._checked_at = None
+
+
+def test_suggest_without_index(client, products):
+    p1, p2, _ = products
+
+    resp = client.get(url, {"q": "Ибу"}, format="json")
+    assert resp.status_code == 200, resp.data
+    assert resp.json() == [{"id": p2.pk, "name": p2.name}, {"id": p1.pk, "name": p1.name}]
+
+    resp = client.get(url, {"q": "Ибу", "limit": 100}, format="json")
+    assert resp.status_code == 400, resp.data
+
+
+def test_suggest_with_index(client, products, index_enabled, django_assert_num_queries):
+    p1, p2, _ = products
+    assert index_enabled.stats()["size"] == 3
+    assert index_enabled.memory_footprint > 0
+
+    with django_assert_num_queries(1):
+        # Catalog version check
+        resp = client.get(url, {"q": "ибупрофен Т", "limit": 1}, format="json")
+    assert resp.status_code == 200, resp.data
+    assert resp.json() == [{"id": p1.pk, "name": p1.name}]
+
+    with django_assert_num_queries(0):
+        resp = client.get(url, {"q": "Ибу"}, format="json")
+    assert resp.json() == [{"id": p2.pk, "name": p2.name}, {"id": p1.pk, "name": p1.name}]
+
+
+def test_suggest_without_index_normalizes_like_index(client, products, request):
+    queries = ["ибупрофен гель", " ИБУПРОФЕН   гЕль", "НУРОФЕН", "ибупрофен  т"]
+    without_index = [client.get(url, {"q": q}, format="json").json() for q in queries]
+
+    request.getfixturevalue("index_enabled")
+    with_index = [client.get(url, {"q": q}, format="json").json() for q in queries]
+
+    assert without_index == with_index
+    assert [len(items) for items in without_index] == [1, 1, 1, 1]
@@ -0,0 +1,111 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+
+from uptech.api.products.serializers import AnalogueSummarySerializer
+from uptech.api.products.summary import refresh_analogue_summaries
+from uptech.product.clusters import CLUSTER
+from uptech.product.models import MedsisDrug, Product
+from uptech.product.verdicts import refresh_verdicts
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+url = reverse("api:products-search")
+
+
+@pytest.fixture()
+def products(product_factory):
+    p1, p2, p3 = (product_factory(sber_product_id=i, medsis_id=i, score=i, effectiveness=80 + i) for i in (1, 7, 9))
+    p = product_factory(
+        sber_product_id=8, medsis_id=8, score=8, effectiveness=88, analogue_ids=[p1.pk, p2.pk, p3.pk, 0]
+    )
+    refresh_verdicts()
+    return p1, p2, p3, p
+
+
+def _compact(results):
+    fields = AnalogueSummarySerializer.Meta.fields
+    return [[{f: a[f] for f in fields} for a in r.pop("analogues")] for r in results]
+
+
+def test_search_summary(client, products, django_assert_num_queries):
+    assert refresh_analogue_summaries() == 4
+    full = client.get(url, format="json").json()["results"]
+
+    # The page only, analogues aren't fetched
+    with django_assert_num_queries(1):
+        resp = client.get(url, {"analogues": "summary"}, format="json")
+    assert resp.status_code == 200, resp.data
+    results = resp.json()["results"]
+
+    assert _compact(results) == _compact(full)
+    assert results == full
+    analogues = json.loads(resp.content)["results"][-1]["analogues"]
+    assert [*analogues[0]] == AnalogueSummarySerializer.Meta.fields
+    assert [(a["id"], a["is_effective"]) for a in analogues] == [
+        (products[0].pk, False),
+        (products[1].pk, False),
+        (products[2].pk, True),
+    ]
+
+
+def test_search_summary_missing(client, products):
+    refresh_analogue_summaries()
+    Product.objects.filter(pk=products[-1].pk).update(analogue_summary=None)
+    Product.objects.filter(pk=products[0].pk).update(analogue_summary=[{"id": 1}])
+
+    summary = client.get(url, {"analogues": "summary"}, format="json").json()["results"]
+    full = client.get(url, format="json").json()["results"]
+    assert _compact(summary) == _compact(full)
+
+
+def test_refresh_only_changed(products):
+    assert refresh_analogue_summaries(only_changed=True) == 4
+    assert refresh_analogue_summaries(only_changed=True) == 0
+
+    Product.objects.filter(pk=products[0].pk).update(price=1000)
+    # Every product having it as an analogue
+    assert refresh_analogue_summaries(only_changed=True) == 1
+
+
+def test_fill(tmp_path, products, settings):
+    (tmp_path / "property.json").write_text(json.dumps([]))
+    (tmp_path / "products.json").write_text(json.dumps([{"ID": p.sber_product_id, "NAME": p.name} for p in products]))
+
+    settings.PRODUCT_ANALOGUE_SUMMARY_ENABLED = True
+    call_command("fill", "--products", f"--data-dir={tmp_path}")
+    assert not Product.objects.filter(analogue_summary__isnull=True).exists()
+
+    settings.PRODUCT_ANALOGUE_SUMMARY_ENABLED = False
+    call_command("fill", "--products", f"--data-dir={tmp_path}")
+    assert not Product.objects.filter(analogue_summary__isnull=False).exists()
+
+
+def test_unknown_mode(client):
+    assert client.get(url, {"analogues": "unknown"}, format="json").status_code == 400
+
+
+@override_settings(PRODUCT_ANALOGUE_SOURCE=CLUSTER)
+def test_search_summary_cluster(client, products, django_assert_num_queries):
+    p1, p2, p3, p = products
+    Product.objects.filter(pk=p.pk).update(analogue_ids=[])
+    MedsisDrug.objects.create(medsis_id=p.medsis_id, analogue_medsis_ids=[p3.medsis_id, p1.medsis_id, p2.medsis_id])
+    refresh_analogue_summaries()
+    full = client.get(url, format="json").json()["results"]
+
+    # Analogue ids come from summaries, drugs aren't queried
+    with django_assert_num_queries(1):
+        results = client.get(url, {"analogues": "summary"}, format="json").json()["results"]
+    assert results[-1]["analogue_ids"] == [p3.pk, p1.pk, p2.pk]
+    assert _compact(results) == _compact(full)
+    assert results == full
+
+    # Fallback products are resolved through drugs
+    Product.objects.filter(pk=p.pk).update(analogue_summary=None)
+    results = client.get(url, {"analogues": "summary"}, format="json").json()["results"]
+    assert results[-1]["analogue_ids"] == [p3.pk, p1.pk, p2.pk]
@@ -0,0 +1,84 @@
+import datetime
+import json
+from decimal import Decimal
+
+import msgpack
+import pytest
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from contrib.drf.renderers import MessagePackRenderer, ORJSONRenderer
+from uptech.product.models import Product
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+DATA = {
+    "name": 'Аспирин "Кардио" \t',
+    "price": Decimal("10.50"),
+    "is_recipe": True,
+    "country": None,
+    "rate": 0.1,
+    "ids": (1, 2),
+    "created_at": datetime.datetime(2021, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+    "date": datetime.date(2021, 5, 1),
+    "message": gettext_lazy("Not found."),
+    1: [{"big": 2**70}],
+}
+
+
+def test_orjson_renderer():
+    assert ORJSONRenderer().render(DATA) == JSONRenderer().render(DATA)
+    assert ORJSONRenderer().render(DATA, "application/json; indent=2") == JSONRenderer().render(
+        DATA, "application/json; indent=2"
+    )
+    assert ORJSONRenderer().render(None) == b""
+
+
+def test_msgpack_renderer():
+    # MessagePack integers are limited to 64 bits
+    data = {k: v for k, v in DATA.items() if k != 1}
+    assert msgpack.unpackb(MessagePackRenderer().render(data)) == json.loads(JSONRenderer().render(data))
+
+
+@pytest.fixture()
+def product():
+    return Product.objects.create(
+        sber_product_id=1,
+        name="Сиофор",
+        price=Decimal("10.50"),
+        score=Decimal("7.5"),
+        safety=90,
+        side_effects=1,
+        contraindications=1,
+    )
+
+
+def test_content_negotiation(client, product):
+    url = reverse("api:products-detail", args=(product.pk,))
+
+    resp = client.get(url, HTTP_ACCEPT="application/json")
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == "application/json"
+    assert resp.content == JSONRenderer().render(resp.data)
+
+    resp = client.get(url, HTTP_ACCEPT="application/msgpack")
+    assert resp.status_code == 200
+    assert resp["Content-Type"] == "application/msgpack"
+    assert msgpack.unpackb(resp.content) == json.loads(JSONRenderer().render(resp.data))
+    assert msgpack.unpackb(client.get(url, {"format": "msgpack"}).content) == msgpack.unpackb(resp.content)
+
+
+@pytest.mark.parametrize("accept", ["application/json", "application/msgpack"])
+def test_error_payload(client, accept):
+    resp = client.get(reverse("api:products-detail", args=(0,)), HTTP_ACCEPT=accept)
+    assert resp.status_code == 404
+    assert resp["Content-Type"] == accept
+
+    errors = {"errors": [{"code": "not_found", "message": "Not found.", "field": "non_fields_error"}]}
+    if accept == "application/msgpack":
+        assert msgpack.unpackb(resp.content) == errors
+    else:
+        assert json.loads(resp.content) == errors
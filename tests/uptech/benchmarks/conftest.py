@@ -0,0 +1,42 @@
+"""
+Benchmarks of the product API and `manage.py fill` on a synthetic catalog, run with `pytest -m benchmark -s`.
+
+Environment variables:
+* BENCHMARK_PRODUCTS, BENCHMARK_ANALOGUE_DEGREE, BENCHMARK_MEDSIS_COVERAGE, BENCHMARK_PRODUCTS_PER_DRUG - the catalog,
+  see `SyntheticCatalog`
+* BENCHMARK_REQUESTS - requests per API endpoint
+* BENCHMARK_RESULTS - JSON file the results are written to, .benchmarks/latest.json by default
+* BENCHMARK_BASELINE - results of a previous run on the same catalog, regressed benchmarks fail
+* BENCHMARK_THRESHOLD - allowed relative growth of latency and allocations, 0.25 by default
+"""
+import os
+
+import pytest
+from django.conf import settings
+
+from tests.uptech.benchmarks.utils import BenchmarkResults
+from tests.uptech.utils.catalog import SyntheticCatalog
+
+
+@pytest.fixture(scope="session")
+def catalog() -> SyntheticCatalog:
+    return SyntheticCatalog(
+        products=int(os.environ.get("BENCHMARK_PRODUCTS", 20000)),
+        analogue_degree=int(os.environ.get("BENCHMARK_ANALOGUE_DEGREE", 10)),
+        medsis_coverage=float(os.environ.get("BENCHMARK_MEDSIS_COVERAGE", 0.8)),
+        products_per_drug=int(os.environ.get("BENCHMARK_PRODUCTS_PER_DRUG", 1)),
+    )
+
+
+@pytest.fixture(scope="session")
+def benchmark_results(catalog):
+    results = BenchmarkResults(
+        catalog.params(),
+        baseline_path=os.environ.get("BENCHMARK_BASELINE", ""),
+        threshold=float(os.environ.get("BENCHMARK_THRESHOLD", 0.25)),
+    )
+    yield results
+    if results.results:
+        results.save(
+            os.environ.get("BENCHMARK_RESULTS") or os.path.join(settings.BASE_DIR, ".benchmarks", "latest.json")
+        )
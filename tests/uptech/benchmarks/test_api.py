@@ -0,0 +1,87 @@
+import os
+import random
+
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from tests.uptech.benchmarks.utils import measure
+from uptech.product.clusters import ARRAY, CLUSTER
+from uptech.product.models import CatalogVersion, FillPhase, MedsisDrug, Product
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.django_db,
+]
+
+REQUESTS = int(os.environ.get("BENCHMARK_REQUESTS", 200))
+
+
+@pytest.fixture(scope="module")
+def products(catalog, tmp_path_factory, django_db_setup, django_db_blocker):
+    """Catalog filled once for the module, it is committed so it's deleted afterwards."""
+    data_dir = tmp_path_factory.mktemp("feed")
+    catalog.write_feed(str(data_dir))
+    with django_db_blocker.unblock(), override_settings(PRODUCT_ANALOGUE_SUMMARY_ENABLED=True):
+        call_command("fill", "--products", "--basket", "--medsis", "--loader=copy", f"--data-dir={data_dir}")
+        products = [*Product.objects.order_by("pk").only("pk", "name")]
+        yield random.Random(0).sample(products, min(REQUESTS, len(products)))
+        for model in (Product, MedsisDrug, FillPhase, CatalogVersion):
+            model.objects.all().delete()
+
+
+def _get(client, url, params=None):
+    resp = client.get(url, params, HTTP_ACCEPT="application/json")
+    assert resp.status_code == 200, resp.content
+    return resp
+
+
+def _post(client, url, data):
+    resp = client.post(url, data, format="json", HTTP_ACCEPT="application/json")
+    assert resp.status_code == 200, resp.content
+    return resp
+
+
+def _requests(action, products):
+    if action in ("retrieve", "info"):
+        url_name = "api:products-detail" if action == "retrieve" else "api:products-info"
+        return _get, [(reverse(url_name, args=(p.pk,)),) for p in products]
+    if action == "referenced_by":
+        return _get, [(reverse("api:products-referenced-by", args=(p.pk,)),) for p in products]
+    if action == "search":
+        return _get, [(reverse("api:products-search"), {"name": p.name[:4]}) for p in products]
+    if action == "search_summary":
+        return _get, [(reverse("api:products-search"), {"name": p.name[:4], "analogues": "summary"}) for p in products]
+    if action == "search_ranked":
+        return _get, [(reverse("api:products-search"), {"name": p.name[:6], "mode": "ranked"}) for p in products]
+    if action == "batch":
+        ids = [p.pk for p in products]
+        return _post, [(reverse("api:products-batch"), {"ids": ids[i : i + 100]}) for i in range(0, len(ids), 10)]
+    raise ValueError(action)
+
+
+@pytest.mark.parametrize("source", [ARRAY, CLUSTER])
+@pytest.mark.parametrize(
+    "action", ["retrieve", "info", "search", "search_summary", "search_ranked", "batch", "referenced_by"]
+)
+def test_api(products, benchmark_results, action, source):
+    client = APIClient()
+    request, args_list = _requests(action, products)
+
+    # Stored arrays are filled, in cluster mode analogue ids are resolved through medsis drugs anyway
+    with override_settings(PRODUCT_ANALOGUE_SOURCE=source):
+        result = measure(lambda *args: request(client, *args), args_list)
+    name = f"api.{action}" if source == ARRAY else f"api.{action}.{source}"
+    regressions = benchmark_results.add(name, result)
+    assert not regressions, regressions
+
+
+def test_analogue_storage(products, capsys):
+    call_command("compare_analogue_storage", f"--sample={len(products)}")
+    out = capsys.readouterr().out
+    # Shown with -s
+    with capsys.disabled():
+        print(f"\n{out}")
+    assert f"Mismatched analogues: 0 of {len(products)}" in out
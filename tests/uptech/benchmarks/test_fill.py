@@ -0,0 +1,47 @@
+import contextlib
+import io
+
+import pytest
+from django.db import transaction
+from django.test import override_settings
+
+from tests.uptech.benchmarks.utils import Measurement
+from uptech.management.commands.fill import Command
+
+pytestmark = [
+    pytest.mark.benchmark,
+    pytest.mark.django_db,
+]
+
+PHASES = ["fill_products", "fill_basket", "fill_medsis", "fill_verdicts", "fill_analogue_summaries"]
+
+
+def _run_phases(data_dir, loader, measurements, traced):
+    command = Command()
+    command.setup(str(data_dir), loader=loader)
+    # Progress output of a large feed
+    with contextlib.redirect_stdout(io.StringIO()):
+        for phase in PHASES:
+            measurement = measurements.setdefault(phase, Measurement())
+            if traced:
+                measurement.trace(getattr(command, phase))
+            else:
+                measurement.call(getattr(command, phase))
+
+
+@pytest.mark.parametrize("loader", ["orm", "copy"])
+@override_settings(PRODUCT_ANALOGUE_SUMMARY_ENABLED=True)
+def test_fill(catalog, benchmark_results, tmp_path, loader):
+    catalog.write_feed(str(tmp_path))
+
+    measurements = {}
+    # Phases depend on the previous ones, so every pass fills an empty catalog and is rolled back
+    for traced in (False, True):
+        with transaction.atomic():
+            _run_phases(tmp_path, loader, measurements, traced)
+            transaction.set_rollback(True)
+
+    regressions = []
+    for phase, measurement in measurements.items():
+        regressions += benchmark_results.add(f"fill.{loader}.{phase[len('fill_'):]}", measurement.as_dict())
+    assert not regressions, regressions
@@ -0,0 +1,113 @@
+import json
+import os
+import statistics
+import time
+import tracemalloc
+import typing
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Calls traced for allocations, tracemalloc slows them down too much to trace all of them
+ALLOC_SAMPLE_SIZE = 20
+
+
+def _percentile(values: typing.List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+class Measurement:
+    """Latency, query count and peak of traced allocations of a series of calls."""
+
+    def __init__(self):
+        self.seconds: typing.List[float] = []
+        self.queries: typing.List[int] = []
+        self.alloc_peaks: typing.List[int] = []
+
+    def call(self, func: typing.Callable, *args):
+        with CaptureQueriesContext(connection) as ctx:
+            started_at = time.perf_counter()
+            result = func(*args)
+            self.seconds.append(time.perf_counter() - started_at)
+        self.queries.append(len(ctx.captured_queries))
+        return result
+
+    def trace(self, func: typing.Callable, *args):
+        tracemalloc.start()
+        try:
+            current = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            result = func(*args)
+            self.alloc_peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        finally:
+            tracemalloc.stop()
+        return result
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": len(self.seconds),
+            "p50_ms": round(_percentile(self.seconds, 0.5) * 1000, 2),
+            "p95_ms": round(_percentile(self.seconds, 0.95) * 1000, 2),
+            # Median, an occasional catalog version check doesn't count
+            "queries": statistics.median_low(self.queries),
+            "alloc_peak_kb": round(max(self.alloc_peaks, default=0) / 1024, 1),
+        }
+
+
+def measure(func: typing.Callable, args_list: typing.List[tuple]) -> dict:
+    # Warms up imports and in process caches
+    func(*args_list[0])
+    measurement = Measurement()
+    for args in args_list:
+        measurement.call(func, *args)
+    for args in args_list[:ALLOC_SAMPLE_SIZE]:
+        measurement.trace(func, *args)
+    return measurement.as_dict()
+
+
+class BenchmarkResults:
+    """
+    Results of a benchmark run on a catalog, saved as JSON.
+
+    Compared to a baseline run on the same catalog, a result regresses when its p50 latency or allocation peak
+    grows by more than `threshold` of the baseline value or its query count grows at all.
+    """
+
+    RELATIVE_METRICS = ["p50_ms", "alloc_peak_kb"]
+
+    def __init__(self, catalog_params: dict, baseline_path: str = "", threshold: float = 0.25):
+        self.catalog_params = catalog_params
+        self.threshold = threshold
+        self.results: typing.Dict[str, dict] = {}
+        self.baseline: typing.Dict[str, dict] = {}
+        if baseline_path:
+            with open(baseline_path) as f:
+                baseline = json.load(f)
+            if baseline["catalog"] != catalog_params:
+                raise ValueError(f"Baseline catalog {baseline['catalog']} differs from {catalog_params}")
+            self.baseline = baseline["results"]
+
+    def regressions(self, name: str, result: dict) -> typing.List[str]:
+        baseline = self.baseline.get(name)
+        if not baseline:
+            return []
+        regressions = [
+            f"{name} {metric}: {baseline[metric]} -> {result[metric]}"
+            for metric in self.RELATIVE_METRICS
+            if result[metric] > baseline[metric] * (1 + self.threshold)
+        ]
+        if result["queries"] > baseline["queries"]:
+            regressions.append(f"{name} queries: {baseline['queries']} -> {result['queries']}")
+        return regressions
+
+    def add(self, name: str, result: dict) -> typing.List[str]:
+        """Store the result and return its regressions."""
+        self.results[name] = result
+        print(f"\n{name}: {result}")
+        return self.regressions(name, result)
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"catalog": self.catalog_params, "results": self.results}, f, indent=2, sort_keys=True)
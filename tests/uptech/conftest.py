@@ -0,0 +1,20 @@
+import pytest
+from pytest_factoryboy import register
+
+from tests.uptech.utils.factories import ProductFactory
+from tests.uptech.utils.factory_kwargs import get_factory_kwargs
+from uptech.product.catalog import reset_current_catalog
+
+register(ProductFactory)
+
+
+@pytest.fixture(autouse=True)
+def current_catalog():
+    """Every test starts without catalog version cached in process."""
+    reset_current_catalog()
+
+
+@pytest.fixture()
+def product(product_factory, request):
+    """Product with attributes of `@pytest.mark.product_factory(**kwargs)` markers."""
+    return product_factory(**get_factory_kwargs(request, "product"))
@@ -0,0 +1,99 @@
+import pytest
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+
+from tests.uptech.utils.catalog import SyntheticCatalog
+from uptech.product.analogues import AnalogueLoader
+from uptech.product.clusters import ARRAY, CLUSTER, get_drug_analogue_ids, sync_medsis_drugs
+from uptech.product.models import MedsisDrug, Product
+from uptech.product.scoring import CatalogArrays
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+def _fill(data_dir):
+    call_command("fill", "--products", "--basket", "--medsis", f"--data-dir={data_dir}")
+
+
+@pytest.fixture()
+def data_dir(tmp_path):
+    SyntheticCatalog(products=40, analogue_degree=2, medsis_coverage=0.9, products_per_drug=3, seed=1).write_feed(
+        str(tmp_path)
+    )
+    return tmp_path
+
+
+def _responses(client):
+    products = [*Product.objects.order_by("pk")]
+    return [
+        client.get(reverse("api:products-search"), format="json").json(),
+        *(client.get(reverse("api:products-detail", args=(p.pk,)), format="json").json() for p in products[:10]),
+        client.post(reverse("api:products-batch"), {"ids": [p.pk for p in products]}, format="json").json(),
+    ]
+
+
+def test_fill_drugs(data_dir):
+    _fill(data_dir)
+
+    drugs = dict(MedsisDrug.objects.values_list("medsis_id", "analogue_medsis_ids"))
+    assert len(drugs) == 12
+    assert sorted(drugs[1]) == [2, 3]
+
+    stored = dict(Product.objects.filter(medsis_id__isnull=False).values_list("pk", "analogue_ids"))
+    products = [*Product.objects.filter(pk__in=stored)]
+    AnalogueLoader(CLUSTER).resolve(products)
+    assert {p.pk: p.analogue_ids for p in products} == stored
+    assert max(map(len, stored.values())) == 6
+
+
+def test_fill_cluster(client, data_dir):
+    _fill(data_dir)
+    expected = _responses(client)
+    catalog = CatalogArrays.load(source=ARRAY)
+
+    with override_settings(PRODUCT_ANALOGUE_SOURCE=CLUSTER):
+        # Before the arrays are emptied
+        assert _responses(client) == expected
+        _fill(data_dir)
+
+        assert not Product.objects.exclude(analogue_ids=[]).exists()
+        assert _responses(client) == expected
+        cluster_catalog = CatalogArrays.load()
+        assert cluster_catalog.indptr.tolist() == catalog.indptr.tolist()
+        assert cluster_catalog.indices.tolist() == catalog.indices.tolist()
+
+
+@override_settings(PRODUCT_ANALOGUE_SOURCE=CLUSTER)
+def test_load_cluster(django_assert_num_queries):
+    MedsisDrug.objects.create(medsis_id=1, analogue_medsis_ids=[3, 2])
+    MedsisDrug.objects.create(medsis_id=2, analogue_medsis_ids=[1])
+    p1 = Product.objects.create(sber_product_id=1, name="a", medsis_id=1, analogue_ids=[100])
+    p2 = Product.objects.create(sber_product_id=5, name="b", medsis_id=2)
+    p3 = Product.objects.create(sber_product_id=4, name="c", medsis_id=2)
+    p4 = Product.objects.create(sber_product_id=3, name="d", medsis_id=3)
+    p5 = Product.objects.create(sber_product_id=2, name="e", medsis_id=1)
+
+    products = [Product.objects.get(pk=p1.pk), Product.objects.get(pk=p2.pk)]
+    loader = AnalogueLoader()
+    # Analogue ids of the products, analogues, analogue ids of the analogues
+    with django_assert_num_queries(3):
+        loader.load(products)
+    assert products[0].analogue_ids == [p4.pk, p3.pk, p2.pk]
+    assert [a.pk for a in products[0]._analogues] == [p4.pk, p3.pk, p2.pk]
+    assert products[1].analogue_ids == [p1.pk, p5.pk]
+    assert [a.analogue_ids for a in products[0]._analogues] == [[], [p1.pk, p5.pk], [p1.pk, p5.pk]]
+    assert get_drug_analogue_ids([3]) == {}
+
+
+def test_sync_medsis_drugs():
+    MedsisDrug.objects.create(medsis_id=1, analogue_medsis_ids=[2])
+    MedsisDrug.objects.create(medsis_id=2, analogue_medsis_ids=[1])
+    MedsisDrug.objects.create(medsis_id=3, analogue_medsis_ids=[])
+
+    stats = sync_medsis_drugs({1: [2], 2: [1, 4], 4: [2]})
+
+    assert (stats.inserted, stats.changed, stats.unchanged, stats.deleted) == (1, 1, 1, 1)
+    assert dict(MedsisDrug.objects.values_list("medsis_id", "analogue_medsis_ids")) == {1: [2], 2: [1, 4], 4: [2]}
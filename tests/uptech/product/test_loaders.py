@@ -0,0 +1,123 @@
+import json
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+
+from uptech.product.catalog import get_catalog_version
+from uptech.product.loaders import CopyLoader, OrmLoader, row_hash
+from uptech.product.models import Product
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+@pytest.fixture(params=[OrmLoader, CopyLoader])
+def loader(request):
+    return request.param(batch_size=2)
+
+
+def _stats(stats):
+    return stats.inserted, stats.changed, stats.unchanged, stats.skipped, stats.deleted
+
+
+def test_upsert_products(loader):
+    Product.objects.create(sber_product_id=2, name="old")
+
+    stats = loader.upsert_products(
+        iter([(1, "a"), (2, "b"), (3, "c\ttab\\"), (4, "d"), (5, "e")]), limit=4, hash_field="products_hash"
+    )
+
+    assert _stats(stats) == (3, 1, 0, 1, 0)
+    assert list(Product.objects.order_by("sber_product_id").values_list("sber_product_id", "name")) == [
+        (1, "a"),
+        (2, "b"),
+        (3, "c\ttab\\"),
+        (4, "d"),
+    ]
+    assert Product.objects.get(sber_product_id=1).analogue_ids == []
+    assert Product.objects.get(sber_product_id=1).products_hash == row_hash(["a"])
+
+
+def test_upsert_products_delta(loader):
+    loader.upsert_products(iter([(1, "a"), (2, "b"), (3, "c")]), limit=10, hash_field="products_hash")
+    Product.objects.filter(sber_product_id=2).update(name="manual edit")
+    loader.delta = True
+
+    stats = loader.upsert_products(
+        iter([(1, "a"), (2, "b"), (4, "d")]), limit=10, hash_field="products_hash", prune=True
+    )
+
+    assert _stats(stats) == (1, 0, 2, 0, 1)
+    assert list(Product.objects.order_by("sber_product_id").values_list("sber_product_id", "name")) == [
+        (1, "a"),
+        (2, "manual edit"),
+        (4, "d"),
+    ]
+
+
+def test_update_products(loader):
+    p1 = Product.objects.create(sber_product_id=1, name="a")
+    p2 = Product.objects.create(sber_product_id=2, name="b", country="RU")
+
+    stats = loader.update_products(
+        ["country", "price", "analogue_ids"],
+        iter([(1, "Россия", "10.50", [p2.pk]), (2, None, 12, []), (3, "unknown", 1, [])]),
+        hash_field="basket_hash",
+    )
+
+    assert _stats(stats) == (0, 2, 0, 1, 0)
+    p1.refresh_from_db()
+    p2.refresh_from_db()
+    assert (p1.country, p1.price, p1.analogue_ids) == ("Россия", Decimal("10.50"), [p2.pk])
+    assert (p2.country, p2.price, p2.analogue_ids) == (None, Decimal(12), [])
+    assert not Product.objects.filter(sber_product_id=3).exists()
+
+
+def test_update_products_delta(loader):
+    Product.objects.create(sber_product_id=1, name="a")
+    Product.objects.create(sber_product_id=2, name="b")
+    loader.update_products(["price"], iter([(1, 10), (2, 20)]), hash_field="basket_hash")
+    Product.objects.update(price=1)
+    loader.delta = True
+
+    stats = loader.update_products(["price"], iter([(1, 10), (2, 25)]), hash_field="basket_hash")
+
+    assert _stats(stats) == (0, 1, 1, 0, 0)
+    assert list(Product.objects.order_by("sber_product_id").values_list("price", flat=True)) == [1, 25]
+
+
+@pytest.mark.parametrize("loader_name", ["orm", "copy"])
+def test_fill(tmp_path, loader_name):
+    feed = {
+        "property.json": [{"ID": 5, "CODE": "COUNTRY"}, {"ID": 6, "CODE": "UNKNOWN"}],
+        "products.json": [{"ID": i, "NAME": f"name {i}"} for i in range(1, 6)],
+        "propertyValues.json": [
+            {"IBLOCK_ELEMENT_ID": i, "PROPERTY_5": f"country {i}", "PROPERTY_6": "x"} for i in range(1, 7)
+        ],
+        "basket.json": [{"PRODUCT_ID": i, "PRICE": i * 10, "DETAIL_PAGE_URL": f"/{i}"} for i in range(1, 7)],
+    }
+    for file_name, data in feed.items():
+        (tmp_path / file_name).write_text(json.dumps(data))
+
+    call_command(
+        "fill", "--products", "--basket", "--batch-size=2", f"--loader={loader_name}", f"--data-dir={tmp_path}"
+    )
+
+    assert list(Product.objects.order_by("sber_product_id").values_list("sber_product_id", "country", "price")) == [
+        (i, f"country {i}", Decimal(i * 10)) for i in range(1, 6)
+    ]
+
+
+def test_fill_delta(tmp_path, capsys):
+    (tmp_path / "property.json").write_text(json.dumps([]))
+    (tmp_path / "products.json").write_text(json.dumps([{"ID": 1, "NAME": "a"}]))
+    (tmp_path / "basket.json").write_text(json.dumps([{"PRODUCT_ID": 1, "PRICE": 10, "DETAIL_PAGE_URL": "/1"}]))
+    call_command("fill", "--products", "--basket", f"--data-dir={tmp_path}")
+    version = get_catalog_version().version
+
+    call_command("fill", "--products", "--basket", "--delta", f"--data-dir={tmp_path}")
+
+    assert "Catalog is not changed" in capsys.readouterr().out
+    assert get_catalog_version().version == version
@@ -0,0 +1,73 @@
+import json
+import random
+
+import pytest
+from django.core.management import call_command
+
+from uptech.product.medsis import MedsisNameIndex, compare_names, match_name_naive, tokenize_name
+
+
+def _ids(match):
+    return (match.ids, match.score, match.full) if match else None
+
+
+def test_tokenize_name():
+    assert tokenize_name("Виагра, таблетки 100 мг, 2 шт.") == ["виагра", "таблетки", "100", "мг", "2", "шт"]
+    assert tokenize_name("Пароксетин-СЗ") == ["пароксетин", "сз"]
+
+
+def test_compare_names():
+    assert compare_names(["a", "b", "c"], ["a", "b"]) == (2, True)
+    assert compare_names(["a", "b", "c"], ["a", "x"]) == (1, False)
+    assert compare_names(["x"], ["a"]) == (0, False)
+
+
+def test_index_matches_naive():
+    rnd = random.Random(0)
+    words = ["аспирин", "кардио", "таблетки", "100", "мг", "капли", "сз", "форте"]
+
+    def name():
+        return [rnd.choice(words) for _ in range(rnd.randint(0, 4))]
+
+    medsis_names = [(medsis_id, name()) for medsis_id in range(300)]
+    index = MedsisNameIndex(medsis_names)
+
+    for _ in range(2000):
+        sber = name()
+        assert _ids(index.match(sber)) == _ids(match_name_naive(sber, medsis_names)), sber
+
+
+def test_match_medsis(tmp_path):
+    (tmp_path / "parsed_drub_data.json").write_text(
+        json.dumps(
+            [
+                {"medsis_id": 1, "name": "Аспирин"},
+                {"medsis_id": 2, "name": "Аспирин Кардио"},
+                {"medsis_id": 3, "name": "Нурофен Экспресс"},
+                {"medsis_id": 4, "name": "Нурофен Форте"},
+            ]
+        )
+    )
+    (tmp_path / "products.json").write_text(
+        json.dumps(
+            [
+                {"ID": 10, "NAME": "Аспирин Кардио, таблетки 100 мг"},
+                {"ID": 11, "NAME": "Нурофен, таблетки"},
+                {"ID": 12, "NAME": "Но-шпа"},
+            ]
+        )
+    )
+
+    call_command("match_medsis", f"--data-dir={tmp_path}", "--compare-naive=3")
+
+    assert json.loads((tmp_path / "medsis_id_map.json").read_text()) == [
+        {"sber_id": 10, "medsis_ids": [2]},
+        {"sber_id": 11, "medsis_ids": [3, 4]},
+        {"sber_id": 12, "medsis_ids": []},
+    ]
+
+
+@pytest.mark.parametrize("sber", [["аспирин"], ["аспирин", "кардио", "100"], ["кардио"]])
+def test_index_prefix_product_name(sber):
+    medsis_names = [(1, ["аспирин", "кардио"]), (2, ["аспирин"]), (3, ["аспирин", "кардио", "форте"])]
+    assert _ids(MedsisNameIndex(medsis_names).match(sber)) == _ids(match_name_naive(sber, medsis_names))
@@ -0,0 +1,63 @@
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from uptech.product.medsis import iter_parsed_drugs
+from uptech.product.medsis_parse import ParseError, parse_drug
+
+DRUG_PAGE = """
+<html><body>
+  <progress value="81" max="100"></progress>
+  <progress value="72" max="100"></progress>
+  <progress value="63" max="100"></progress>
+  <progress value="54" max="100"></progress>
+  <progress value="45" max="100"></progress>
+  <progress value="36" max="100"></progress>
+  <div class="level-item digits"><div class="num">7.4</div><div class="num">10</div></div>
+  <a href="/drugs/2-aspirin" style="position:relative;display:none;">Аспирин</a>
+  <a href="/drugs/3-kardio" style="position:relative;display:none;">Кардио</a>
+  <a href="/drugs/4-visible">Видимый</a>
+</body></html>
+"""
+PARSED_DRUG = {
+    "medsis_id": 1,
+    "medsis_url": "https://meds.is/drugs/1-siofor",
+    "name": "Сиофор",
+    "effectiveness": 81,
+    "safety": 72,
+    "convenience": 63,
+    "contraindications": 54,
+    "side_effects": 45,
+    "tolerance": 36,
+    "score": "7.4",
+    "analogue_medsis_ids": [2, 3],
+}
+
+
+@pytest.mark.parametrize("features", ["html.parser", "lxml"])
+def test_parse_drug(features):
+    assert parse_drug(DRUG_PAGE.encode(), "1-siofor.html", {"1-siofor": "Сиофор"}, features) == PARSED_DRUG
+
+    with pytest.raises(ParseError, match="progress"):
+        parse_drug(b"<html></html>", "1-siofor.html", {"1-siofor": "Сиофор"}, features)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_parse_medsis(tmp_path, workers):
+    (tmp_path / "drugs.json").write_text(
+        json.dumps(
+            [
+                {"name": "Сиофор", "url": "https://meds.is/drugs/1-siofor"},
+                {"name": "Сломан", "url": "https://meds.is/drugs/5-broken"},
+            ]
+        )
+    )
+    (tmp_path / "medsis_dump").mkdir()
+    (tmp_path / "medsis_dump" / "1-siofor.html").write_text(DRUG_PAGE)
+    (tmp_path / "medsis_dump" / "5-broken.html").write_text("<html></html>")
+
+    with pytest.raises(CommandError, match="failed files: 1"):
+        call_command("parse_medsis", f"--data-dir={tmp_path}", f"--workers={workers}", "--parser=lxml")
+
+    assert [*iter_parsed_drugs(str(tmp_path))] == [PARSED_DRUG]
@@ -0,0 +1,85 @@
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from django.core.management import CommandError, call_command
+
+PAGES = {
+    "/alphabet/A": '<a href="/drugs/1-siofor">Сиофор</a><a href="/drugs/2-aspirin">Аспирин</a><a href="/about">x</a>',
+    "/alphabet/B": '<a href="/drugs/3-broken">Бромгексин</a>',
+    "/drugs/1-siofor": "<html>siofor</html>",
+    "/drugs/2-aspirin": "<html>aspirin</html>",
+}
+
+
+@pytest.fixture()
+def medsis_server():
+    requests = Counter()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests[self.path] += 1
+            # The first request of every page fails to check retries
+            if self.path in PAGES and requests[self.path] > 1:
+                body = PAGES[self.path].encode()
+                self.send_response(200)
+            elif self.path in PAGES:
+                body = b""
+                self.send_response(503)
+            else:
+                body = b""
+                self.send_response(404)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}", requests
+    server.shutdown()
+    server.server_close()
+
+
+def test_scrape_medsis(tmp_path, medsis_server):
+    base_url, requests = medsis_server
+    args = [f"--data-dir={tmp_path}", f"--base-url={base_url}", "--rate=1000", "--burst=10", "--backoff=0.01"]
+
+    with pytest.raises(CommandError, match="failed pages: 1"):
+        call_command("scrape_medsis", "--letters", "A", "B", *args)
+
+    drugs = json.loads((tmp_path / "drugs.json").read_text())
+    assert drugs == [
+        {"name": "Сиофор", "url": f"{base_url}/drugs/1-siofor"},
+        {"name": "Аспирин", "url": f"{base_url}/drugs/2-aspirin"},
+        {"name": "Бромгексин", "url": f"{base_url}/drugs/3-broken"},
+    ]
+    assert sorted(p.name for p in (tmp_path / "medsis_dump").iterdir()) == ["1-siofor.html", "2-aspirin.html"]
+    assert (tmp_path / "medsis_dump" / "1-siofor.html").read_text() == "<html>siofor</html>"
+    assert requests["/drugs/1-siofor"] == 2
+    assert requests["/drugs/3-broken"] == 1
+
+    (tmp_path / "medsis_dump" / "2-aspirin.html").unlink()
+    with pytest.raises(CommandError):
+        call_command("scrape_medsis", "--skip-alphabet", *args)
+
+    # Dumped pages are not requested again
+    assert requests["/drugs/1-siofor"] == 2
+    assert requests["/drugs/2-aspirin"] == 3
+    assert requests["/alphabet/A"] == 2
+
+
+def test_scrape_medsis_alphabet_errors(tmp_path, medsis_server):
+    base_url, requests = medsis_server
+    args = [f"--data-dir={tmp_path}", f"--base-url={base_url}", "--rate=1000", "--burst=10", "--retries=0"]
+
+    with pytest.raises(CommandError, match="drugs.json does not exist"):
+        call_command("scrape_medsis", "--skip-alphabet", *args)
+
+    with pytest.raises(CommandError, match=f"{base_url}/alphabet/Z: HTTP 404"):
+        call_command("scrape_medsis", "--letters", "Z", *args)
+    assert not (tmp_path / "drugs.json").exists()
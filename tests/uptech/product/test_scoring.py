@@ -0,0 +1,81 @@
+import random
+from decimal import Decimal
+
+import pytest
+from django.core.management import call_command
+
+from uptech.product.models import Product
+from uptech.product.scoring import CatalogArrays, score_catalog
+from uptech.product.verdicts import VERDICT_FIELDS, _iter_batches, compute_verdicts, refresh_verdicts
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+@pytest.fixture()
+def catalog():
+    rnd = random.Random(0)
+    metrics = [None, 0, 1, 40, 79, 80, 90, 100]
+    products = Product.objects.bulk_create(
+        [
+            Product(
+                sber_product_id=idx,
+                name=str(idx),
+                # Few distinct prices and scores to get ties
+                price=rnd.choice([None, Decimal(0), Decimal("9.99"), Decimal(10), Decimal("10.01"), Decimal(25)]),
+                score=rnd.choice([None, Decimal(0), Decimal("5.9"), Decimal(6), Decimal("6.1"), Decimal("9.5")]),
+                effectiveness=rnd.choice(metrics),
+                safety=rnd.choice(metrics[1:]),
+                side_effects=rnd.choice(metrics[1:]),
+                contraindications=rnd.choice(metrics[1:]),
+            )
+            for idx in range(300)
+        ]
+    )
+    ids = [p.pk for p in products]
+    for p in products:
+        # Duplicates, self references and unknown ids are kept in analogue_ids
+        p.analogue_ids = rnd.choices(ids + [0], k=rnd.choice([0, 1, 3, 7, 10, 20]))
+    Product.objects.bulk_update(products, ["analogue_ids"])
+    return products
+
+
+def test_score_catalog(catalog):
+    verdicts = score_catalog(CatalogArrays.load())
+    assert len(verdicts) == len(catalog)
+
+    compared_cnt = 0
+    for batch in _iter_batches(Product.objects.all(), 100):
+        for p in batch:
+            try:
+                live = compute_verdicts(p)
+            except TypeError:
+                # Unscored product with scored analogues
+                continue
+            assert verdicts.get(p.pk) == live, p
+            compared_cnt += 1
+    assert compared_cnt > len(catalog) / 2
+
+
+def test_score_catalog_empty():
+    verdicts = score_catalog(CatalogArrays.load())
+    assert len(verdicts) == 0
+
+
+def test_refresh_verdicts_vectorized(catalog):
+    # Scored products only, the model fails on some unscored ones
+    Product.objects.filter(score__isnull=True).update(score=0)
+
+    refresh_verdicts()
+    stored = [*Product.objects.order_by("pk").values_list(*VERDICT_FIELDS[1:])]
+    Product.objects.update(verdicts_computed_at=None)
+
+    assert refresh_verdicts(vectorized=True) == len(catalog)
+    assert [*Product.objects.order_by("pk").values_list(*VERDICT_FIELDS[1:])] == stored
+    assert refresh_verdicts(vectorized=True, only_changed=True) == 0
+
+
+def test_analyze_catalog(catalog, capsys):
+    call_command("analyze_catalog", "--compare=-1")
+    assert "Vectorized verdicts match the model" in capsys.readouterr().out
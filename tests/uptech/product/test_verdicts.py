@@ -0,0 +1,88 @@
+import pytest
+
+from uptech.product.clusters import ARRAY, CLUSTER
+from uptech.product.models import MedsisDrug, Product
+from uptech.product.verdicts import diff_verdicts, get_verdict_impact_ids, refresh_verdicts
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+@pytest.fixture()
+def products():
+    p1 = Product.objects.create(
+        sber_product_id=1,
+        name="a",
+        price=10,
+        score="5",
+        medsis_id=1,
+        effectiveness=1,
+        safety=10,
+        side_effects=1,
+        contraindications=1,
+    )
+    p2 = Product.objects.create(
+        sber_product_id=2,
+        name="b",
+        price=12,
+        score=8,
+        medsis_id=2,
+        effectiveness=80,
+        safety=90,
+        side_effects=1,
+        contraindications=1,
+    )
+    p = Product.objects.create(
+        sber_product_id=3,
+        name="c",
+        analogue_ids=[p1.pk, p2.pk],
+        price=15,
+        score=0,
+        medsis_id=3,
+    )
+    return p1, p2, p
+
+
+def test_refresh_verdicts(products):
+    p1, p2, p = products
+
+    assert refresh_verdicts() == 3
+
+    p2.refresh_from_db()
+    assert p2.verdicts_computed_at is not None
+    assert p2.verdict_is_effective is True
+    assert p2.verdict_is_trustworthy is True
+    assert p2.verdict_is_cheapest is False
+
+    p.refresh_from_db()
+    assert p.verdict_is_effective is False
+    assert p.verdict_is_cheapest is False
+    assert p.get_verdict("cheaper_analogue_ids") == []
+
+    assert [*diff_verdicts()] == []
+
+
+def test_diff_verdicts(products):
+    p1, p2, p = products
+    refresh_verdicts()
+
+    Product.objects.filter(pk=p2.pk).update(effectiveness=10)
+
+    assert [(d[0].pk, d[1], d[2], d[3]) for d in diff_verdicts()] == [(p2.pk, "is_effective", True, False)]
+
+
+@pytest.mark.parametrize("source", [ARRAY, CLUSTER])
+def test_verdict_impact_ids(products, source):
+    p1, p2, p = products
+    MedsisDrug.objects.create(medsis_id=3, analogue_medsis_ids=[1, 2])
+    refresh_verdicts()
+
+    assert get_verdict_impact_ids([p1.pk], source) == {p1.pk, p.pk}
+    assert get_verdict_impact_ids([p.pk, 0], source) == {p.pk}
+    assert get_verdict_impact_ids([0], source) == set()
+
+    Product.objects.filter(pk=p2.pk).update(price=1, score=9)
+    impact_ids = get_verdict_impact_ids([p2.pk], source)
+    refresh_verdicts(Product.objects.filter(pk__in=impact_ids))
+    assert [*diff_verdicts()] == []
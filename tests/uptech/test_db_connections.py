@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+from django.db import OperationalError, connection
+from psycopg2 import extensions
+
+from contrib.django.db.backends.postgresql.base import DatabaseWrapper
+from contrib.django.db.pool import ConnectionPool, PoolTimeout, _pools, pool_stats
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+def _wrapper(alias, **settings):
+    return DatabaseWrapper({**connection.settings_dict, **settings}, alias)
+
+
+def _backend_pid(wrapper):
+    with wrapper.cursor() as cursor:
+        cursor.execute("SELECT pg_backend_pid()")
+        return cursor.fetchone()[0]
+
+
+def _terminate(pid):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_terminate_backend(%s)", [pid])
+    # Termination is asynchronous
+    time.sleep(0.1)
+
+
+@pytest.fixture()
+def pooled():
+    settings = {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": True, "POOL": {"SIZE": 1, "TIMEOUT": 0.1}}
+    wrappers = []
+
+    def wrap():
+        wrappers.append(_wrapper("pooled", **settings))
+        return wrappers[-1]
+
+    yield wrap
+    for wrapper in wrappers:
+        wrapper.close()
+    for key in [key for key in _pools if key[1] == "pooled"]:
+        _pools.pop(key).close()
+
+
+def test_pool(pooled):
+    db1, db2 = pooled(), pooled()
+
+    pid = _backend_pid(db1)
+    db1.close()
+    assert _backend_pid(db1) == pid
+
+    # The only connection is taken by db1
+    with pytest.raises(OperationalError, match="No free connection"):
+        _backend_pid(db2)
+
+    db1.close()
+    assert _backend_pid(db2) == pid
+    db2.close()
+
+    # A broken idle connection is replaced
+    _terminate(pid)
+    assert _backend_pid(db1) != pid
+
+    stats = pool_stats()["pooled"]
+    assert stats["size"] == stats["open"] == 1
+    assert stats["acquired"] == 4
+    assert stats["timeouts"] == 1
+
+
+def test_health_checks():
+    db = _wrapper("persistent", CONN_MAX_AGE=None, CONN_HEALTH_CHECKS=True)
+    try:
+        pid = _backend_pid(db)
+        db.close_if_unusable_or_obsolete()
+        assert _backend_pid(db) == pid
+
+        # Checked on the first use after a request boundary
+        _terminate(pid)
+        db.close_if_unusable_or_obsolete()
+        assert _backend_pid(db) != pid
+    finally:
+        db.close()
+
+
+class FakeConnection:
+    closed = 0
+
+    class info:
+        transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+def test_connection_pool_wait():
+    pool = ConnectionPool(size=1, timeout=1)
+    conn = pool.acquire(FakeConnection)
+
+    acquired = []
+    thread = threading.Thread(target=lambda: acquired.append(pool.acquire(FakeConnection)))
+    thread.start()
+    time.sleep(0.05)
+    pool.release(conn)
+    thread.join()
+    assert acquired == [conn]
+
+    stats = pool.stats()
+    assert stats["waited"] == 1
+    assert stats["wait_seconds_max"] >= 0.05
+
+    pool.timeout = 0.01
+    with pytest.raises(PoolTimeout):
+        pool.acquire(FakeConnection)
+
+    # Closed connections are dropped and replaced
+    conn.close()
+    pool.release(conn)
+    assert pool.acquire(FakeConnection) is not conn
+    assert pool.stats()["open"] == 1
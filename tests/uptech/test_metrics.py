@@ -0,0 +1,111 @@
+import json
+import subprocess
+import sys
+
+import pytest
+from django.conf import settings
+from django.core.management import call_command
+from django.urls import reverse
+from prometheus_client import generate_latest
+from prometheus_client.parser import text_string_to_metric_families
+
+from uptech import metrics
+from uptech.api.products.cache import get_product_response_cache
+from uptech.product.models import Product
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+def _scrape(client, **headers) -> dict:
+    resp = client.get(reverse("metrics"), **headers)
+    assert resp.status_code == 200
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(resp.content.decode())
+        for sample in family.samples
+    }
+
+
+def _value(samples, name, **labels) -> float:
+    return samples.get((name, tuple(sorted(labels.items()))), 0)
+
+
+def test_request_metrics(client):
+    p = Product.objects.create(sber_product_id=1, name="a")
+    view = {"view": "api:products-detail", "action": "retrieve"}
+    before = _scrape(client)
+
+    assert client.get(reverse("api:products-detail", args=(p.pk,))).status_code == 200
+    assert client.get(reverse("api:products-detail", args=(0,))).status_code == 404
+    samples = _scrape(client)
+
+    def diff(name, **labels):
+        return _value(samples, name, **labels) - _value(before, name, **labels)
+
+    assert diff("uptech_request_duration_seconds_count", **view) == 2
+    assert diff("uptech_request_errors_total", status="404", **view) == 1
+    assert diff("uptech_request_db_queries_count", **view) == 2
+    # The product and its analogues, the missing product
+    assert diff("uptech_request_db_queries_sum", **view) >= 2 + 1
+    assert _value(samples, "uptech_worker_rss_bytes") > 0
+
+
+def test_response_cache_metrics(client, settings):
+    settings.PRODUCT_RESPONSE_CACHE_BACKEND = "locmem"
+    get_product_response_cache.cache_clear()
+    p = Product.objects.create(sber_product_id=1, name="a")
+    url = reverse("api:products-detail", args=(p.pk,))
+    before = _scrape(client)
+
+    try:
+        for _ in range(3):
+            client.get(url)
+    finally:
+        get_product_response_cache.cache_clear()
+    samples = _scrape(client)
+
+    for result, cnt in [("hit", 2), ("miss", 1)]:
+        labels = {"action": "retrieve", "result": result}
+        name = "uptech_response_cache_lookups_total"
+        assert _value(samples, name, **labels) - _value(before, name, **labels) == cnt
+
+
+def test_fill_metrics(client, tmp_path):
+    (tmp_path / "property.json").write_text(json.dumps([]))
+    (tmp_path / "products.json").write_text(json.dumps([{"ID": i, "NAME": f"name {i}"} for i in range(3)]))
+    call_command("fill", "--products", f"--data-dir={tmp_path}")
+
+    samples = _scrape(client)
+    assert _value(samples, "uptech_catalog_version") == 1
+    assert _value(samples, "uptech_fill_phase_rows", phase="products", result="inserted") == 3
+    assert _value(samples, "uptech_fill_phase_rows", phase="verdicts", result="changed") == 3
+    assert _value(samples, "uptech_fill_phase_duration_seconds", phase="products") > 0
+
+
+def test_multiprocess(tmp_path, monkeypatch):
+    # Workers import prometheus_client with the variable set and write their samples into files
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    code = (
+        "import django; django.setup(); "
+        "from uptech.metrics import REQUEST_LATENCY; REQUEST_LATENCY.labels('v', 'a').observe(0.1)"
+    )
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", code], check=True, cwd=settings.BASE_DIR)
+
+    samples = {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(generate_latest(metrics.get_registry()).decode())
+        for sample in family.samples
+    }
+    assert _value(samples, "uptech_request_duration_seconds_count", view="v", action="a") == 2
+
+
+def test_access(client, settings):
+    settings.BACKEND_ENV = "prod"
+    assert client.get(reverse("metrics")).status_code == 404
+
+    settings.METRICS_TOKEN = "secret"
+    assert client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong").status_code == 404
+    _scrape(client, HTTP_AUTHORIZATION="Bearer secret")
@@ -0,0 +1,105 @@
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+
+from uptech.management.commands.replay import load_entries
+from uptech.product.models import Product
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+@pytest.fixture()
+def log_path(settings, tmp_path):
+    settings.REQUEST_RECORDING_PATH = str(tmp_path / "requests.jsonl")
+    return settings.REQUEST_RECORDING_PATH
+
+
+def test_record(log_path):
+    p = Product.objects.create(sber_product_id=1, name="a")
+    client = Client()
+
+    client.get(reverse("api:products-detail", args=(p.pk,)), {"x": 1}, HTTP_ACCEPT="application/json")
+    resp = client.post(reverse("api:products-batch"), {"ids": [p.pk]}, content_type="application/json")
+    assert resp.status_code == 200
+    client.get(reverse("metrics"))
+
+    retrieve, batch = load_entries(log_path)
+    assert retrieve["path"] == reverse("api:products-detail", args=(p.pk,)) + "?x=1"
+    assert retrieve["headers"] == {"Accept": "application/json"}
+    assert (retrieve["body"], retrieve["status"]) == ("", 200)
+    assert batch["method"] == "POST"
+    assert json.loads(batch["body"]) == {"ids": [p.pk]}
+    assert batch["headers"]["Content-Type"] == "application/json"
+
+
+def test_sample_rate(log_path, settings):
+    settings.REQUEST_RECORDING_SAMPLE_RATE = 0
+    Client().get(reverse("api:products-search"))
+    assert not os.path.exists(log_path)
+
+
+def test_invalid_content_length(log_path):
+    resp = Client().get(reverse("api:products-search"), CONTENT_LENGTH="abc", HTTP_ACCEPT="application/json")
+    assert resp.status_code == 200
+    assert not os.path.exists(log_path)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_replay(live_server, tmp_path, capsys):
+    p = Product.objects.create(sber_product_id=1, name="a")
+    entries = [
+        {"path": reverse("api:products-detail", args=(p.pk,)), "method": "GET", "body": ""},
+        {"path": reverse("api:products-detail", args=(0,)), "method": "GET", "body": ""},
+        {"path": reverse("api:products-batch"), "method": "POST", "body": json.dumps({"ids": [p.pk]})},
+        {"path": "/unknown/", "method": "GET", "body": ""},
+    ]
+    log_path = tmp_path / "requests.jsonl"
+    log_path.write_text(
+        "".join(
+            json.dumps({"ts": 1000 + idx * 0.01, "headers": {"Content-Type": "application/json"}, **e}) + "\n"
+            for idx, e in enumerate(entries)
+        )
+    )
+
+    call_command("replay", str(log_path), f"--url={live_server.url}", "--preserve-timing", "--concurrency=2")
+
+    lines = dict(line.split(": ", 1) for line in capsys.readouterr().out.splitlines())
+    assert "2 requests" in lines["api:products-detail retrieve"]
+    assert "4xx 50.0%" in lines["api:products-detail retrieve"]
+    assert "errors 0.0%" in lines["api:products-batch batch"]
+    assert "4 requests" in lines["total"]
+
+
+def test_replay_timeout(tmp_path, capsys):
+    class SlowHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(0.5)
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    log_path = tmp_path / "requests.jsonl"
+    entry = {"path": reverse("api:products-search"), "method": "GET", "body": "", "headers": {}}
+    log_path.write_text("".join(json.dumps({"ts": idx, **entry}) + "\n" for idx in range(2)))
+    try:
+        call_command("replay", str(log_path), f"--url=http://127.0.0.1:{server.server_port}", "--timeout=0.1")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    lines = dict(line.split(": ", 1) for line in capsys.readouterr().out.splitlines())
+    assert "2 requests" in lines["total"]
+    assert "errors 100.0%" in lines["total"]
@@ -0,0 +1,88 @@
+import json
+import logging
+import re
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import reverse
+
+from contrib.django.request_timing import timed
+from uptech.product.models import Product
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+@pytest.fixture()
+def url():
+    analogue = Product.objects.create(
+        sber_product_id=1, name="a", score=7, safety=90, side_effects=1, contraindications=1
+    )
+    p = Product.objects.create(
+        sber_product_id=2,
+        name="b",
+        score=8,
+        safety=90,
+        side_effects=1,
+        contraindications=1,
+        analogue_ids=[analogue.pk],
+    )
+    return reverse("api:products-detail", args=(p.pk,))
+
+
+def _server_timing(resp) -> dict:
+    return {m.group(1): m.group(2) for m in re.finditer(r"(\w+);dur=([\d.]+)", resp["Server-Timing"])}
+
+
+@pytest.fixture()
+def caplog(caplog):
+    """The logger doesn't propagate to the root one caplog is attached to, see LOGGING."""
+    logger = logging.getLogger("contrib.django.request_timing")
+    logger.addHandler(caplog.handler)
+    yield caplog
+    logger.removeHandler(caplog.handler)
+
+
+def test_server_timing(client, url, caplog):
+    with caplog.at_level(logging.INFO, logger="contrib.django.request_timing"):
+        resp = client.get(url)
+    assert resp.status_code == 200
+
+    # Catalog version, product and its analogues
+    assert 'desc="3 queries"' in resp["Server-Timing"]
+    assert set(_server_timing(resp)) == {"db", "analogues", "serialize", "render", "total"}
+
+    (record,) = caplog.records
+    assert record.levelno == logging.INFO
+    line = json.loads(record.getMessage())
+    assert line["path"] == url
+    assert line["status"] == 200
+    assert line["db_queries"] == 3
+    assert "queries" not in line
+
+
+def test_slow_request(client, url, caplog, settings):
+    settings.REQUEST_TIMING_SLOW_MS = 0
+    settings.REQUEST_TIMING_SLOW_QUERIES = 2
+
+    with caplog.at_level(logging.INFO, logger="contrib.django.request_timing"):
+        client.get(url)
+
+    (record,) = caplog.records
+    assert record.levelno == logging.WARNING
+    queries = json.loads(record.getMessage())["queries"]
+    assert len(queries) == 2
+    assert all(q["sql"].startswith("SELECT") for q in queries)
+
+
+def test_async_request(url):
+    resp = async_to_sync(AsyncClient().get)(url)
+    assert resp.status_code == 200
+    assert 'desc="3 queries"' in resp["Server-Timing"]
+
+
+def test_timed_outside_request():
+    with timed("noop"):
+        pass
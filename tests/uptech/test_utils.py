@@ -0,0 +1,21 @@
+import io
+import json
+
+import pytest
+
+from uptech.utils import iter_json_array
+
+DATA = [{"ID": 1, "NAME": "Нурофен"}, {"ID": 22, "NAME": "Аспирин [500]"}, 12345, -1.5e3, None, True, "a, b]", []]
+
+
+@pytest.mark.parametrize("read_size", [1, 2, 7, 1 << 16])
+@pytest.mark.parametrize("indent", [None, 2])
+def test_iter_json_array(read_size, indent):
+    f = io.StringIO(json.dumps(DATA, indent=indent, ensure_ascii=False))
+    assert [*iter_json_array(f, read_size=read_size)] == DATA
+
+
+@pytest.mark.parametrize("document", ["", "{}", "[1, 2", "[1, 2,"])
+def test_iter_json_array_invalid(document):
+    with pytest.raises(ValueError):
+        [*iter_json_array(io.StringIO(document), read_size=2)]
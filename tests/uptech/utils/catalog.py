@@ -0,0 +1,104 @@
+import json
+import os
+import random
+import typing
+
+import factory
+
+from tests.uptech.utils.factories import ProductFactory
+
+FEED_PROPERTIES = [(1, "COUNTRY"), (2, "MANUFACTURER"), (3, "DRUG_FORM")]
+MEDSIS_FIELDS = ["effectiveness", "safety", "convenience", "contraindications", "side_effects", "tolerance", "score"]
+
+
+class SyntheticCatalog:
+    """
+    Deterministic feed files of `manage.py fill` for a catalog of any size.
+
+    Products come from `ProductFactory`. A `medsis_coverage` share of them is matched to medsis drugs,
+    `products_per_drug` products to each, like packings of one drug. Drugs are grouped into clusters of
+    `analogue_degree + 1` analogues of each other, so a covered product gets `analogue_degree * products_per_drug`
+    analogue ids unless it falls into the last, smaller cluster.
+    """
+
+    def __init__(
+        self,
+        products: int,
+        analogue_degree: int = 10,
+        medsis_coverage: float = 0.8,
+        products_per_drug: int = 1,
+        seed: int = 0,
+    ):
+        self.products = products
+        self.analogue_degree = analogue_degree
+        self.medsis_coverage = medsis_coverage
+        self.products_per_drug = products_per_drug
+        self.seed = seed
+
+    def params(self) -> dict:
+        return {
+            "products": self.products,
+            "analogue_degree": self.analogue_degree,
+            "medsis_coverage": self.medsis_coverage,
+            "products_per_drug": self.products_per_drug,
+            "seed": self.seed,
+        }
+
+    def build_products(self) -> list:
+        factory.random.reseed_random(self.seed)
+        ProductFactory.reset_sequence(0)
+        return ProductFactory.build_batch(self.products)
+
+    def feed(self) -> typing.Dict[str, typing.Any]:
+        products = self.build_products()
+        rnd = random.Random(self.seed)
+        covered = rnd.sample(products, int(len(products) * self.medsis_coverage))
+        medsis_ids = {p.sber_product_id: idx // self.products_per_drug + 1 for idx, p in enumerate(covered)}
+        # The first product of a drug describes it
+        drug_products = covered[:: self.products_per_drug]
+
+        drugs = []
+        cluster_size = self.analogue_degree + 1
+        for start in range(0, len(drug_products), cluster_size):
+            cluster = [medsis_ids[p.sber_product_id] for p in drug_products[start : start + cluster_size]]
+            for p, medsis_id in zip(drug_products[start : start + cluster_size], cluster):
+                drugs.append(
+                    {
+                        "medsis_id": medsis_id,
+                        "name": p.name,
+                        "analogue_medsis_ids": [m_id for m_id in cluster if m_id != medsis_id],
+                        **{f: float(getattr(p, f)) if f == "score" else getattr(p, f) for f in MEDSIS_FIELDS},
+                    }
+                )
+
+        return {
+            "property.json": [{"ID": prop_id, "CODE": code} for prop_id, code in FEED_PROPERTIES],
+            "products.json": [{"ID": p.sber_product_id, "NAME": p.name} for p in products],
+            "propertyValues.json": [
+                {
+                    "IBLOCK_ELEMENT_ID": p.sber_product_id,
+                    **{f"PROPERTY_{prop_id}": getattr(p, code.lower()) for prop_id, code in FEED_PROPERTIES},
+                }
+                for p in products
+            ],
+            "basket.json": [
+                {"PRODUCT_ID": p.sber_product_id, "PRICE": float(p.price), "DETAIL_PAGE_URL": p.detail_page_url}
+                for p in products
+            ],
+            "medsis_id_map.json": [
+                {
+                    "sber_id": p.sber_product_id,
+                    "medsis_ids": [medsis_ids[p.sber_product_id]] if p.sber_product_id in medsis_ids else [],
+                }
+                for p in products
+            ],
+            "parsed_drub_data.ndjson": drugs,
+        }
+
+    def write_feed(self, data_dir: str):
+        for file_name, data in self.feed().items():
+            with open(os.path.join(data_dir, file_name), "w") as f:
+                if file_name.endswith(".ndjson"):
+                    f.writelines(json.dumps(item, ensure_ascii=False) + "\n" for item in data)
+                else:
+                    json.dump(data, f, ensure_ascii=False)
@@ -0,0 +1,46 @@
+import factory
+from factory import fuzzy
+
+from uptech.product.models import Product
+
+NAME_STEMS = ["амокси", "ибу", "парацет", "лора", "цетири", "омепра", "аторва", "метфор", "валса", "кардио"]
+NAME_SUFFIXES = ["цин", "профен", "амол", "тадин", "зин", "зол", "статин", "мин", "ртан", "форте"]
+DRUG_FORMS = ["таблетки", "капсулы", "раствор", "сироп", "мазь"]
+
+
+def _name() -> str:
+    rnd = factory.random.randgen
+    return (
+        f"{rnd.choice(NAME_STEMS).capitalize()}{rnd.choice(NAME_SUFFIXES)}, "
+        f"{rnd.choice(DRUG_FORMS)} {rnd.choice([5, 10, 20, 50, 100, 250, 500])} мг, {rnd.randint(1, 60)} шт."
+    )
+
+
+class ProductFactory(factory.django.DjangoModelFactory):
+    """
+    Product with feed properties and medsis data.
+
+    Values come from `factory.random`, `factory.random.reseed_random(seed)` makes them deterministic.
+    Registered as the `product` and `product_factory` fixtures in `tests/uptech/conftest.py`.
+    """
+
+    class Meta:
+        model = Product
+
+    sber_product_id = factory.Sequence(lambda n: n + 1)
+    name = factory.LazyFunction(_name)
+    country = fuzzy.FuzzyChoice(["Россия", "Индия", "Германия", "Словения", "Израиль"])
+    manufacturer = factory.LazyAttribute(lambda p: f"Фармзавод {p.sber_product_id % 97}")
+    drug_form = fuzzy.FuzzyChoice(DRUG_FORMS)
+    is_recipe = fuzzy.FuzzyChoice([False, True])
+    price = fuzzy.FuzzyDecimal(50, 5000)
+    detail_page_url = factory.LazyAttribute(lambda p: f"/catalog/{p.sber_product_id}/")
+
+    medsis_id = None
+    effectiveness = fuzzy.FuzzyInteger(40, 100)
+    safety = fuzzy.FuzzyInteger(40, 100)
+    convenience = fuzzy.FuzzyInteger(40, 100)
+    contraindications = fuzzy.FuzzyInteger(0, 20)
+    side_effects = fuzzy.FuzzyInteger(0, 20)
+    tolerance = fuzzy.FuzzyInteger(40, 100)
+    score = fuzzy.FuzzyDecimal(1, 10, precision=1)
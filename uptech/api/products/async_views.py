@@ -0,0 +1,156 @@
+"""
+Async versions of the `ProductsViewSet` read actions for the ASGI deployment, see `uptech.asgi`.
+
+DRF views and the Django ORM are sync only, so the viewset provides negotiation, serializers, caching headers
+and error payloads while queries run in executor threads. The product and its analogues are fetched
+concurrently on separate connections. Responses are the same as the ones of the viewset.
+"""
+import asyncio
+import typing
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.db.models.expressions import RawSQL
+from django.http import Http404
+from django.http.response import HttpResponseBase
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework import response, status
+from rest_framework.renderers import BrowsableAPIRenderer
+
+from contrib.django.request_timing import timed
+from uptech.api.products.views import ProductsViewSet
+from uptech.product.analogues import AnalogueLoader, get_analogue_loader
+from uptech.product.clusters import CLUSTER, product_analogue_ids_sql
+from uptech.product.models import Product
+
+
+def _in_thread(func: typing.Callable) -> typing.Callable[..., typing.Awaitable]:
+    """
+    Run a sync function using the database in the executor, concurrent calls use separate connections.
+
+    The thread connection is closed, kept or returned to the pool by CONN_MAX_AGE like at the end of a request.
+    """
+
+    def run(*args):
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run, thread_sensitive=False)
+
+
+class _AsyncProductsViewSet(ProductsViewSet):
+    # The browsable API queries the database while rendering
+    renderer_classes = [r for r in ProductsViewSet.renderer_classes if not issubclass(r, BrowsableAPIRenderer)]
+
+
+def _viewset(request, action: str, **kwargs) -> ProductsViewSet:
+    """Viewset set up like `APIView.dispatch` does, `initial` has to be run in a thread before any work."""
+    initkwargs = getattr(getattr(ProductsViewSet, action), "kwargs", {})
+    view = _AsyncProductsViewSet(**initkwargs, action_map={"get": action})
+    view.args, view.kwargs = (), kwargs
+    view.request = view.initialize_request(request, **kwargs)
+    view.format_kwarg = view.get_format_suffix(**kwargs)
+    view.headers = view.default_response_headers
+    return view
+
+
+def _finalize(view: ProductsViewSet, resp: HttpResponseBase) -> HttpResponseBase:
+    resp = view.finalize_response(view.request, resp)
+    if isinstance(resp, response.Response):
+        resp.render()
+    return resp
+
+
+def _get_product(pk: int, loader: AnalogueLoader) -> typing.Optional[Product]:
+    product = Product.objects.filter(pk=pk).first()
+    if product is not None:
+        loader.resolve([product])
+    return product
+
+
+def _get_analogues(pk: int, loader: AnalogueLoader) -> typing.List[Product]:
+    # Doesn't wait for the product to know its analogue_ids
+    if loader.source == CLUSTER:
+        sql = product_analogue_ids_sql()
+    else:
+        sql = f"SELECT unnest(analogue_ids) FROM {Product._meta.db_table} WHERE id = %s"
+    analogues = [*Product.objects.filter(pk__in=RawSQL(sql, [pk]))]
+    loader.resolve(analogues)
+    return analogues
+
+
+async def _load_product(pk: int, context: dict) -> Product:
+    loader = get_analogue_loader(context)
+    with timed("product"):
+        product, analogues = await asyncio.gather(
+            _in_thread(_get_product)(pk, loader), _in_thread(_get_analogues)(pk, loader)
+        )
+    if product is None:
+        raise Http404
+    loader.add(analogues, product.analogue_ids)
+    return product
+
+
+async def _retrieve_data(view: ProductsViewSet, pk: int):
+    context = view.get_serializer_context()
+    product = await _load_product(pk, context)
+    view.serializer = view.get_serializer_class()(product, context=context)
+    if view.action == "info":
+        # Analogues of the picked analogues are fetched while serializing
+        return await _in_thread(view._serialized_data)()
+    return view._serialized_data()
+
+
+def _initial_validators(view: ProductsViewSet):
+    view.initial(view.request)
+    # After negotiation, the ETag depends on the format. The catalog stamp is cached in process,
+    # this rarely hits the database
+    return view.get_etag(), view.get_last_modified()
+
+
+async def _retrieve(request, action: str, pk: int) -> HttpResponseBase:
+    view = _viewset(request, action, pk=pk)
+    try:
+        etag, last_modified = await _in_thread(_initial_validators)(view)
+        etag = quote_etag(etag)
+        last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+
+        resp = get_conditional_response(request, etag=etag, last_modified=last_modified_ts)
+        if resp is None:
+            cache = view.get_response_cache()
+            if cache is not None and cache.is_cached(action):
+                resp = await _in_thread(view._cached_response)(view._retrieve_data)
+            else:
+                resp = response.Response(await _retrieve_data(view, pk))
+
+        if resp.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            resp["ETag"] = etag
+            if last_modified_ts is not None:
+                resp["Last-Modified"] = http_date(last_modified_ts)
+            patch_cache_control(resp, **view.get_cache_control())
+            patch_vary_headers(resp, ["Accept"])
+    except Exception as e:
+        resp = view.handle_exception(e)
+    return _finalize(view, resp)
+
+
+async def retrieve(request, pk: int) -> HttpResponseBase:
+    return await _retrieve(request, "retrieve", pk)
+
+
+async def info(request, pk: int) -> HttpResponseBase:
+    return await _retrieve(request, "info", pk)
+
+
+async def search(request) -> HttpResponseBase:
+    view = _viewset(request, "search")
+    try:
+        await _in_thread(view.initial)(view.request)
+        # The page and its analogues depend on each other, the event loop isn't blocked meanwhile
+        resp = await _in_thread(view._list)()
+    except Exception as e:
+        resp = view.handle_exception(e)
+    return _finalize(view, resp)
@@ -0,0 +1,36 @@
+import functools
+import typing
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from contrib.drf.cache import DjangoCacheBackend, LocMemLRUBackend, ResponseCache
+from uptech.metrics import RESPONSE_CACHE_LOOKUPS
+from uptech.product.catalog import get_current_catalog_version
+
+
+class ProductResponseCache(ResponseCache):
+    def record_lookup(self, action, hit):
+        super().record_lookup(action, hit)
+        RESPONSE_CACHE_LOOKUPS.labels(action, "hit" if hit else "miss").inc()
+
+
+@functools.lru_cache(maxsize=None)
+def get_product_response_cache() -> typing.Optional[ResponseCache]:
+    backend_name = settings.PRODUCT_RESPONSE_CACHE_BACKEND
+    if not backend_name:
+        return None
+
+    if backend_name == "locmem":
+        backend = LocMemLRUBackend(max_entries=settings.PRODUCT_RESPONSE_CACHE_MAX_ENTRIES)
+    elif backend_name == "shared":
+        backend = DjangoCacheBackend(alias="shared")
+    else:
+        raise ImproperlyConfigured(f"Unknown product response cache backend: {backend_name}")
+
+    return ProductResponseCache(
+        backend,
+        get_version=get_current_catalog_version,
+        ttls=settings.PRODUCT_RESPONSE_CACHE_TTLS,
+        key_prefix="products",
+    )
@@ -1,29 +1,40 @@
 from decimal import Decimal
-from typing import List
+from typing import List, Optional
 
 from rest_framework import serializers
 from rest_framework.serializers import ListSerializer
 
+from contrib.drf.compiled import CompiledSerializerMixin
 from contrib.drf.serializers import ModelSerializer, Serializer
+from uptech.product.analogues import get_analogue_loader
+from uptech.product.clusters import CLUSTER
 from uptech.product.models import Product
 
 
 class ProductListSerializer(ListSerializer):
     def to_representation(self, data: List[Product]):
-        analogues = Product.objects.in_bulk(
-            [a_id for item in data for a_id in item.analogue_ids]
-        )
-        for item in data:
-            item._analogues = [analogues[a_id] for a_id in item.analogue_ids]
-
+        data = [*data]
+        get_analogue_loader(self.context).load(data)
         return super().to_representation(data)
 
 
-class InnerProductSerializer(ModelSerializer):
+class VerdictField(serializers.BooleanField):
+    def __init__(self, **kwargs):
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def get_attribute(self, instance: Product):
+        return instance.get_verdict(self.source)
+
+    def compiled_attribute(self) -> str:
+        return f"obj.get_verdict({self.source!r})"
+
 
-    is_effective = serializers.BooleanField(read_only=True)
-    is_cheapest = serializers.BooleanField(read_only=True)
-    is_trustworthy = serializers.BooleanField(read_only=True)
+class InnerProductSerializer(CompiledSerializerMixin, ModelSerializer):
+
+    is_effective = VerdictField()
+    is_cheapest = VerdictField()
+    is_trustworthy = VerdictField()
 
     image_url = serializers.URLField(read_only=True)
 
@@ -58,16 +69,40 @@ class InnerProductSerializer(ModelSerializer):
         ]
 
 
+class ReferencingProductListSerializer(ListSerializer):
+    def to_representation(self, data: List[Product]):
+        data = [*data]
+        get_analogue_loader(self.context).resolve(data)
+        return super().to_representation(data)
+
+
+class ReferencingProductSerializer(InnerProductSerializer):
+    """Product listing another one among its analogues, without analogues of its own."""
+
+    class Meta(InnerProductSerializer.Meta):
+        list_serializer_class = ReferencingProductListSerializer
+
+
 class AnalogueProductSerializer(InnerProductSerializer):
     is_effective = serializers.BooleanField(read_only=True, source="_is_effective")
     is_cheapest = serializers.BooleanField(read_only=True, source="_is_cheapest")
     is_trustworthy = serializers.BooleanField(read_only=True, source="_is_trustworthy")
 
 
+def mark_analogues(obj: Product) -> None:
+    """Set verdicts of the loaded analogues relative to the product."""
+    cheapest_analogue_ids = set(obj.get_verdict("cheaper_analogue_ids"))
+    for a in obj._analogues:
+        a._is_cheapest = a.pk in cheapest_analogue_ids
+        a._is_trustworthy = a.trustworthy_rate > obj.trustworthy_rate
+
+        a._is_effective = False
+        if a.effectiveness:
+            a._is_effective = not obj.effectiveness or a.effectiveness > obj.effectiveness
+
+
 class ProductSerializer(InnerProductSerializer):
-    analogues = AnalogueProductSerializer(
-        read_only=True, many=True, source="_analogues"
-    )
+    analogues = AnalogueProductSerializer(read_only=True, many=True, source="_analogues")
 
     class Meta(InnerProductSerializer.Meta):
         list_serializer_class = ProductListSerializer
@@ -76,20 +111,78 @@ class ProductSerializer(InnerProductSerializer):
         ]
 
     def to_representation(self, obj: Product) -> dict:
-        if not hasattr(obj, "_analogues"):
-            obj._analogues = [*Product.objects.filter(pk__in=obj.analogue_ids)]
+        get_analogue_loader(self.context).load([obj])
+        mark_analogues(obj)
+        return super().to_representation(obj)
+
+
+class AnalogueSummarySerializer(AnalogueProductSerializer):
+    """Analogue fields of list pages, stored in `Product.analogue_summary`."""
+
+    class Meta(AnalogueProductSerializer.Meta):
+        fields = read_only_fields = [
+            "id",
+            "sber_product_id",
+            "name",
+            "price",
+            "detail_page_url",
+            "image_url",
+            "medsis_id",
+            "effectiveness",
+            "score",
+            "is_effective",
+            "is_cheapest",
+            "is_trustworthy",
+        ]
+
+
+def get_analogue_summary(obj: Product) -> Optional[List[dict]]:
+    """Stored summary in field order, None if it's missing or written for other fields."""
+    if obj.analogue_summary is None:
+        return None
+    fields = AnalogueSummarySerializer.Meta.fields
+    try:
+        # jsonb doesn't keep key order
+        return [{f: a[f] for f in fields} for a in obj.analogue_summary]
+    except KeyError:
+        return None
+
+
+def build_analogue_summary(obj: Product) -> List[dict]:
+    obj._preload_analogues()
+    mark_analogues(obj)
+    return [dict(a) for a in AnalogueSummarySerializer(obj._analogues, many=True).data]
 
-        cheapest_analogue_ids = obj.get_cheaper_analogue_ids()
-        for a in obj._analogues:
-            a._is_cheapest = a.pk in cheapest_analogue_ids
-            a._is_trustworthy = a.trustworthy_rate > obj.trustworthy_rate
 
-            a._is_effective = False
-            if a.effectiveness:
-                a._is_effective = (
-                    not obj.effectiveness or a.effectiveness > obj.effectiveness
-                )
+class ProductSummaryListSerializer(ListSerializer):
+    def to_representation(self, data: List[Product]):
+        data = [*data]
+        loader = get_analogue_loader(self.context)
+        # Products written outside of `fill` have no summary yet, loading resolves their analogue ids too
+        loader.load([p for p in data if get_analogue_summary(p) is None])
+        if loader.source == CLUSTER:
+            # Summaries list resolved analogues in order, so the page needs no resolve query
+            for p in data:
+                if not hasattr(p, "_analogues"):
+                    p.analogue_ids = [a["id"] for a in p.analogue_summary]
+        return super().to_representation(data)
+
+
+class ProductSummarySerializer(InnerProductSerializer):
+    """`ProductSerializer` rendering analogue summaries, without fetching analogues."""
+
+    # A plain attribute keeps the whole serializer compiled
+    analogues = serializers.ReadOnlyField(source="_analogue_summary")
+
+    class Meta(InnerProductSerializer.Meta):
+        list_serializer_class = ProductSummaryListSerializer
+        fields = read_only_fields = InnerProductSerializer.Meta.fields + [
+            "analogues",
+        ]
 
+    def to_representation(self, obj: Product) -> dict:
+        summary = get_analogue_summary(obj)
+        obj._analogue_summary = summary if summary is not None else build_analogue_summary(obj)
         return super().to_representation(obj)
 
 
@@ -98,11 +191,9 @@ class ProductInfoSerializer(Serializer):
     effective = ProductSerializer(read_only=True)
 
     def to_representation(self, obj: Product) -> dict:
-        analogues = [
-            *Product.objects.filter(
-                pk__in=obj.analogue_ids, medsis_id__isnull=False, price__isnull=False
-            )
-        ]
+        loader = get_analogue_loader(self.context)
+        loader.load([obj])
+        analogues = [a for a in obj._analogues if a.medsis_id is not None and a.price is not None]
         if not analogues:
             return {"cheapest": None, "effective": None}
 
@@ -114,9 +205,7 @@ class ProductInfoSerializer(Serializer):
         else:
             cheapest = sorted_by_price[0] if sorted_by_price else None
 
-        sorted_by_effectiveness = sorted(
-            analogues, key=lambda item: -item.effectiveness
-        )
+        sorted_by_effectiveness = sorted(analogues, key=lambda item: -item.effectiveness)
         for p in sorted_by_effectiveness:
             if p.score >= Decimal("6") and p.effectiveness >= 80:
                 effective = p
@@ -124,4 +213,33 @@ class ProductInfoSerializer(Serializer):
         else:
             effective = sorted_by_effectiveness[0] if sorted_by_effectiveness else None
 
+        # Both are rendered with their own analogues, fetch them together
+        loader.load([cheapest, effective])
         return super().to_representation({"cheapest": cheapest, "effective": effective})
+
+
+class ProductSuggestQuerySerializer(Serializer):
+    q = serializers.CharField()
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+
+class ProductSuggestSerializer(Serializer):
+    id = serializers.IntegerField(read_only=True)
+    name = serializers.CharField(read_only=True)
+
+
+class ProductBatchQuerySerializer(Serializer):
+    MAX_IDS = 300
+
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=MAX_IDS)
+    sber_product_ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=MAX_IDS)
+
+    def validate(self, attrs: dict) -> dict:
+        if len(attrs) != 1:
+            raise serializers.ValidationError("Exactly one of ids and sber_product_ids is required.")
+        return attrs
+
+
+class ProductBatchSerializer(Serializer):
+    results = ProductSerializer(read_only=True, many=True)
+    not_found = serializers.ListField(child=serializers.IntegerField(), read_only=True)
@@ -0,0 +1,41 @@
+"""
+Denormalized analogue summaries for the `analogues=summary` mode of product search.
+
+`manage.py fill` stores the `AnalogueSummarySerializer` representation of product analogues, with their flags relative
+to the product, in `Product.analogue_summary`. Search pages are then rendered from the product rows alone,
+without fetching and instantiating every analogue. Summaries are only current after a fill, so fill clears them
+when PRODUCT_ANALOGUE_SUMMARY_ENABLED is off rather than leaving stale ones.
+"""
+from uptech.api.products.serializers import build_analogue_summary, get_analogue_summary
+from uptech.product.analogues import AnalogueLoader
+from uptech.product.models import Product
+from uptech.utils import chunks
+
+
+def refresh_analogue_summaries(queryset=None, batch_size: int = 1000, only_changed: bool = False) -> int:
+    """
+    Recompute and store summaries for every product in queryset (all products by default), after verdicts.
+
+    With `only_changed` products whose stored summary is still valid are not rewritten.
+    Return the number of written products.
+    """
+    if queryset is None:
+        queryset = Product.objects.all()
+
+    cnt = 0
+    for batch in chunks(queryset.order_by("pk").iterator(chunk_size=batch_size), batch_size):
+        AnalogueLoader().load(batch)
+        products_to_update = []
+        for p in batch:
+            summary = build_analogue_summary(p)
+            if only_changed and get_analogue_summary(p) == summary:
+                continue
+            p.analogue_summary = summary
+            products_to_update.append(p)
+        Product.objects.bulk_update(products_to_update, ["analogue_summary"])
+        cnt += len(products_to_update)
+    return cnt
+
+
+def clear_analogue_summaries() -> int:
+    return Product.objects.filter(analogue_summary__isnull=False).update(analogue_summary=None)
@@ -1,23 +1,86 @@
+import hashlib
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Cast, Lower
 from django_filters import rest_framework as filters
 from drf_spectacular.utils import extend_schema
+from rest_framework import response
 from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
 from rest_framework.permissions import AllowAny
 
 from contrib.drf.viewsets import BaseViewSet
-from uptech.api.products.serializers import ProductInfoSerializer, ProductSerializer
+from uptech.api.products.cache import get_product_response_cache
+from uptech.api.products.serializers import (
+    ProductBatchQuerySerializer,
+    ProductBatchSerializer,
+    ProductInfoSerializer,
+    ProductSerializer,
+    ProductSuggestQuerySerializer,
+    ProductSuggestSerializer,
+    ProductSummarySerializer,
+    ReferencingProductSerializer,
+)
+from uptech.product.analogues import get_referencing_products
+from uptech.product.catalog import get_current_catalog, get_current_catalog_version
+from uptech.product.lookups import NormalizedName, TrigramWordSimilarity
 from uptech.product.models import Product
+from uptech.product.suggest import suggest_index
+
+
+def product_etag(action: str, pk, version: int, format: str) -> str:
+    # Analogues of a product only change with the catalog version, JSON and MessagePack bodies differ
+    return hashlib.md5(f"{version}:{action}:{pk}:{format}".encode()).hexdigest()
 
 
 class ProductFilterSet(filters.FilterSet):
+    PREFIX = "prefix"
+    RANKED = "ranked"
+    DEFAULT_SIMILARITY = 0.4
+    FULL = "full"
+    SUMMARY = "summary"
+
     name = filters.CharFilter(method="filter_by_name")
+    mode = filters.ChoiceFilter(
+        choices=[(PREFIX, "Name prefix"), (RANKED, "Substring and similar names ordered by relevance")],
+        method="filter_noop",
+    )
+    similarity = filters.NumberFilter(min_value=0, max_value=1, method="filter_noop")
+    analogues = filters.ChoiceFilter(
+        choices=[(FULL, "Full analogues"), (SUMMARY, "Compact analogues stored by fill")],
+        method="filter_noop",
+    )
 
     class Meta:
         model = Product
-        fields = ["name"]
+        fields = ["name", "mode", "similarity", "analogues"]
+
+    def filter_noop(self, queryset, name, value):
+        # Options for `filter_by_name` and the serializer
+        return queryset
 
     def filter_by_name(self, queryset, name, value):
         assert name == "name"
-        return queryset.filter(name__istartswith=value)
+        if self.form.cleaned_data.get("mode") == self.RANKED:
+            return self.filter_ranked(queryset, value)
+
+        # Served by `name_lower_pattern_idx`. Lowered in SQL as well, Python and the database ctype may disagree
+        return queryset.alias(name_lower=Lower("name")).filter(name_lower__startswith=Lower(Value(value)))
+
+    def filter_ranked(self, queryset, value):
+        similarity = self.form.cleaned_data.get("similarity")
+        if similarity is None:
+            similarity = self.DEFAULT_SIMILARITY
+
+        # `%>` takes its threshold from the session, both match branches are served by `name_gin_idx`
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, false)", [str(similarity)])
+
+        return queryset.annotate(
+            search_rank=Cast(TrigramWordSimilarity(value, F("name")), FloatField()),
+        ).filter(Q(name__trigram_icontains=value) | Q(name__trigram_word_similar=value))
 
 
 @extend_schema(tags=["products"])
@@ -29,13 +92,48 @@ class ProductsViewSet(BaseViewSet):
         "search": ProductSerializer,
         "info": ProductInfoSerializer,
         "retrieve": ProductSerializer,
+        "suggest": ProductSuggestSerializer,
+        "batch": ProductBatchSerializer,
+        "referenced_by": ReferencingProductSerializer,
     }
 
-    ordering = "id"
+    @property
+    def ordering(self):
+        if (
+            getattr(self, "action", None) == "search"
+            and self.request.query_params.get("mode") == ProductFilterSet.RANKED
+            and self.request.query_params.get("name")
+        ):
+            return ("-search_rank", "id")
+        return "id"
+
+    def get_serializer_class(self):
+        if self.action == "search" and self.request.query_params.get("analogues") == ProductFilterSet.SUMMARY:
+            return ProductSummarySerializer
+        return super().get_serializer_class()
 
     def get_queryset(self):
+        # Schema generation has no pk
+        if self.action == "referenced_by" and "pk" in self.kwargs:
+            return get_referencing_products([get_object_or_404(Product, pk=self.kwargs["pk"])])
         return Product.objects.all()
 
+    def get_response_cache(self):
+        return get_product_response_cache()
+
+    def get_etag(self):
+        if self.action not in ("retrieve", "info"):
+            return None
+        return product_etag(
+            self.action, self.kwargs["pk"], get_current_catalog_version(), self.request.accepted_renderer.format
+        )
+
+    def get_last_modified(self):
+        return get_current_catalog().updated_at
+
+    def get_cache_control(self):
+        return {"public": True, "max_age": settings.PRODUCT_HTTP_CACHE_MAX_AGE}
+
     @extend_schema(responses=ProductSerializer(many=True))
     @action(
         ["get"],
@@ -47,6 +145,57 @@ class ProductsViewSet(BaseViewSet):
     def search(self, request):
         return self._list()
 
+    @extend_schema(parameters=[ProductSuggestQuerySerializer], responses=ProductSuggestSerializer(many=True))
+    @action(["get"], detail=False, permission_classes=[AllowAny])
+    def suggest(self, request):
+        query_serializer = ProductSuggestQuerySerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        prefix, limit = query_serializer.validated_data["q"], query_serializer.validated_data["limit"]
+
+        index = suggest_index.get()
+        if index is not None:
+            items = index.lookup(prefix, limit)
+        else:
+            items = (
+                # Normalized in SQL on both sides like the index does in Python, served by `name_normalized_pattern_idx`
+                Product.objects.alias(name_normalized=NormalizedName("name"))
+                .filter(name_normalized__startswith=NormalizedName(Value(prefix)))
+                .order_by("name_normalized", "id")
+                .values_list("id", "name")[:limit]
+            )
+
+        self.serializer = self.get_serializer([{"id": pk, "name": name} for pk, name in items], many=True)
+        return response.Response(self._serialized_data())
+
+    @extend_schema(request=ProductBatchQuerySerializer, responses=ProductBatchSerializer)
+    @action(["post"], detail=False, permission_classes=[AllowAny])
+    def batch(self, request):
+        """
+        Products with analogues by `ids` or `sber_product_ids`, in the requested order.
+
+        Analogues of all products are fetched with one query, unknown ids are listed in `not_found`.
+        """
+        query_serializer = ProductBatchQuerySerializer(data=request.data)
+        query_serializer.is_valid(raise_exception=True)
+        ((field, ids),) = query_serializer.validated_data.items()
+        lookup = "pk" if field == "ids" else "sber_product_id"
+
+        ids = [*dict.fromkeys(ids)]
+        products = Product.objects.in_bulk(ids, field_name=lookup)
+        self.serializer = self.get_serializer(
+            {
+                "results": [products[pk] for pk in ids if pk in products],
+                "not_found": [pk for pk in ids if pk not in products],
+            }
+        )
+        return response.Response(self._serialized_data())
+
+    @extend_schema(responses=ReferencingProductSerializer(many=True))
+    @action(["get"], detail=True, permission_classes=[AllowAny])
+    def referenced_by(self, request, **kwargs):
+        """Products listing the product among their analogues, whose verdicts depend on its price and score."""
+        return self._list()
+
     @action(["get"], detail=True, permission_classes=[AllowAny])
     def info(self, request, **kwargs):
         return self._retrieve()
@@ -1,6 +1,9 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from uptech.api.products import async_views
 from uptech.api.products.views import ProductsViewSet
 
 router = DefaultRouter()
@@ -10,3 +13,17 @@ router.register(r"v1/products", ProductsViewSet, basename="products")
 urlpatterns = [
     path("", include(router.urls)),
 ]
+
+if settings.PRODUCT_ASYNC_VIEWS_ENABLED:
+    # Every executor thread query would open and close its own connection
+    if settings.DB_CONNECTION_MODE not in ("persistent", "pool"):
+        raise ImproperlyConfigured(
+            f"Async product views need DB_CONNECTION_MODE pool or persistent, got {settings.DB_CONNECTION_MODE!r}"
+        )
+    # Take precedence over the router routes of the same actions
+    urlpatterns = [
+        path("v1/products/search/", async_views.search, name="products-search"),
+        path("v1/products/<int:pk>/", async_views.retrieve, name="products-detail"),
+        path("v1/products/<int:pk>/info/", async_views.info, name="products-info"),
+        *urlpatterns,
+    ]
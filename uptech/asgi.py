@@ -0,0 +1,30 @@
+"""
+ASGI config for uptech project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Product read actions are served by async views here, see `uptech.api.products.async_views`:
+
+    gunicorn uptech.asgi -k uvicorn.workers.UvicornWorker
+
+Queries of concurrent requests run in executor threads, which open a connection per query unless
+connections are kept, so DB_CONNECTION_MODE defaults to "pool" here to bound the number of database
+connections of a worker. The async views refuse to start without "pool" or "persistent".
+
+For more information on this file, see
+https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "uptech.settings")
+os.environ.setdefault("PRODUCT_ASYNC_VIEWS_ENABLED", "1")
+os.environ.setdefault("DB_CONNECTION_MODE", "pool")
+
+application = get_asgi_application()
+
+# Imported after setup, the index is built in a background thread if enabled
+from uptech.product.suggest import suggest_index  # noqa: E402
+
+suggest_index.start()
@@ -0,0 +1,85 @@
+import random
+import time
+
+import numpy as np
+from django.core.management import BaseCommand, CommandError
+
+from uptech.product.models import Product
+from uptech.product.scoring import CatalogArrays, score_catalog
+from uptech.product.verdicts import _iter_batches, compute_verdicts
+
+
+class Command(BaseCommand):
+    help = "Compute verdicts of the whole catalog with NumPy and print their distribution"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--compare",
+            type=int,
+            default=0,
+            metavar="N",
+            help="Check results against the model properties on N random products, -1 for all of them",
+        )
+        parser.add_argument("--limit", type=int, default=100, help="Max number of mismatches to print")
+
+    def handle(self, *args, **options):
+        started_at = time.perf_counter()
+        catalog = CatalogArrays.load()
+        loaded_at = time.perf_counter()
+        verdicts = score_catalog(catalog)
+        scored_at = time.perf_counter()
+        print(
+            f"Products: {len(catalog)}, analogue links: {len(catalog.indices)}, "
+            f"loaded in {loaded_at - started_at:.2f}s, scored in {scored_at - loaded_at:.3f}s"
+        )
+
+        analogues_cnt = np.diff(catalog.indptr)
+        if len(catalog):
+            print(
+                f"Analogues per product: mean {analogues_cnt.mean():.1f}, "
+                f"p50 {np.percentile(analogues_cnt, 50):.0f}, p99 {np.percentile(analogues_cnt, 99):.0f}, "
+                f"max {analogues_cnt.max()}"
+            )
+        print(f"Scored: {int((~catalog.score_null).sum())}, priced: {int((~catalog.price_null).sum())}")
+        for name in ("is_effective", "is_cheapest", "is_trustworthy"):
+            values = getattr(verdicts, name)
+            null = getattr(verdicts, f"{name}_null", np.zeros(len(values), dtype=bool))
+            print(
+                f"{name}: true {int((values & ~null).sum())}, false {int((~values & ~null).sum())}, "
+                f"null {int(null.sum())}"
+            )
+        print(f"cheaper_analogue_ids: {int((np.diff(verdicts.cheaper_indptr) > 0).sum())} products")
+
+        if options["compare"]:
+            self.compare(verdicts, options["compare"], options["limit"])
+
+    def compare(self, verdicts, sample_size, limit):
+        queryset = Product.objects.all()
+        if 0 <= sample_size < len(verdicts):
+            queryset = queryset.filter(pk__in=random.sample(verdicts.ids.tolist(), sample_size))
+
+        started_at = time.perf_counter()
+        compared_cnt = mismatches = failed_cnt = 0
+        for batch in _iter_batches(queryset, 1000):
+            for p in batch:
+                try:
+                    live = compute_verdicts(p)
+                except TypeError:
+                    # The model fails on missing medsis metrics or score, see `score_catalog`
+                    failed_cnt += 1
+                    continue
+                compared_cnt += 1
+                vectorized = verdicts.get(p.pk)
+                for name, value in live.items():
+                    if value != vectorized[name]:
+                        mismatches += 1
+                        if mismatches <= limit:
+                            print(f"{p}: {name} model={value!r} vectorized={vectorized[name]!r}")
+        print(
+            f"Compared {compared_cnt} products with the model in {time.perf_counter() - started_at:.2f}s, "
+            f"model failed on {failed_cnt}"
+        )
+
+        if mismatches:
+            raise CommandError(f"Number of mismatches: {mismatches}")
+        print("Vectorized verdicts match the model")
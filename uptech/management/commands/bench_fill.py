@@ -0,0 +1,103 @@
+import json
+import random
+import tempfile
+import time
+
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from uptech.management.commands.fill import Command as FillCommand
+from uptech.product.models import Product
+
+
+class Command(BaseCommand):
+    help = "Time `fill` loaders on a synthetic feed, all writes are rolled back"
+
+    PROPERTIES = {1: "COUNTRY", 2: "DOSAGE", 3: "DRUG_FORM", 4: "MANUFACTURER", 5: "PACKING"}
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100000, help="Number of products in the synthetic feed")
+        parser.add_argument("--loader", action="append", choices=FillCommand.LOADERS, help="Loaders to compare")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Batch size of the ORM loader")
+        parser.add_argument("--delta", action="store_true", help="Time a repeated delta fill of an unchanged feed")
+
+    def write_feed(self, data_dir, rows):
+        rnd = random.Random(rows)
+        sber_ids = range(1, rows + 1)
+        medsis_ids = [rnd.randint(1, max(rows // 10, 1)) for _ in sber_ids]
+
+        feed = {
+            "property.json": [{"ID": prop_id, "CODE": code} for prop_id, code in self.PROPERTIES.items()],
+            "products.json": ({"ID": i, "NAME": f"Product {i} {rnd.random():.6f}"} for i in sber_ids),
+            "propertyValues.json": (
+                {
+                    "IBLOCK_ELEMENT_ID": i,
+                    **{f"PROPERTY_{prop_id}": f"{code} {i % 97}" for prop_id, code in self.PROPERTIES.items()},
+                }
+                for i in sber_ids
+            ),
+            "basket.json": (
+                {"PRODUCT_ID": i, "PRICE": round(rnd.uniform(10, 5000), 2), "DETAIL_PAGE_URL": f"/goods/id{i}/"}
+                for i in sber_ids
+            ),
+            "medsis_id_map.json": ({"sber_id": i, "medsis_ids": [m_id]} for i, m_id in zip(sber_ids, medsis_ids)),
+            "parsed_drub_data.json": (
+                {
+                    "medsis_id": m_id,
+                    "effectiveness": rnd.randint(0, 100),
+                    "safety": rnd.randint(0, 100),
+                    "convenience": rnd.randint(0, 100),
+                    "contraindications": rnd.randint(0, 100),
+                    "side_effects": rnd.randint(0, 100),
+                    "tolerance": rnd.randint(0, 100),
+                    "score": round(rnd.uniform(0, 10), 1),
+                    "analogue_medsis_ids": rnd.sample(medsis_ids, min(5, rows)),
+                }
+                for m_id in sorted(set(medsis_ids))
+            ),
+        }
+        for file_name, items in feed.items():
+            with open(f"{data_dir}/{file_name}", "w") as f:
+                # Items are written one by one so a 1M rows feed isn't kept in memory
+                f.write("[")
+                for idx, item in enumerate(items):
+                    f.write(",\n" if idx else "\n")
+                    json.dump(item, f, ensure_ascii=False)
+                f.write("\n]")
+
+    def run_loader(self, data_dir, loader, batch_size, rows, delta):
+        fill = FillCommand()
+        fill.PRODUCTS_LIMIT = Product.objects.count() + rows
+        fill.setup(data_dir, batch_size=batch_size, loader=loader)
+
+        timings = {}
+        with transaction.atomic():
+            if delta:
+                for phase in ("products", "basket", "medsis"):
+                    getattr(fill, f"fill_{phase}")()
+                fill.setup(data_dir, batch_size=batch_size, loader=loader, delta=True)
+
+            for phase in ("products", "basket", "medsis"):
+                started_at = time.perf_counter()
+                getattr(fill, f"fill_{phase}")()
+                timings[phase] = time.perf_counter() - started_at
+            transaction.set_rollback(True)
+        return timings
+
+    def handle(self, *args, **options):
+        rows = options["rows"]
+        loaders = options["loader"] or list(FillCommand.LOADERS)
+        with tempfile.TemporaryDirectory() as data_dir:
+            started_at = time.perf_counter()
+            self.write_feed(data_dir, rows)
+            print(f"Synthetic feed of {rows} products is generated in {time.perf_counter() - started_at:.1f}s")
+
+            results = {
+                loader: self.run_loader(data_dir, loader, options["batch_size"], rows, options["delta"])
+                for loader in loaders
+            }
+
+        print(f"{'loader':<8}{'products':>12}{'basket':>12}{'medsis':>12}{'total':>12}")
+        for loader, timings in results.items():
+            cells = "".join(f"{t:>11.2f}s" for t in [*timings.values(), sum(timings.values())])
+            print(f"{loader:<8}{cells}")
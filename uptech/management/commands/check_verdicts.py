@@ -0,0 +1,21 @@
+from django.core.management import BaseCommand, CommandError
+
+from uptech.product.verdicts import diff_verdicts
+
+
+class Command(BaseCommand):
+    help = "Compare verdicts stored by `fill` with the live product logic"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=100, help="Max number of mismatches to print")
+
+    def handle(self, *args, **options):
+        mismatches = 0
+        for product, name, stored, live in diff_verdicts():
+            mismatches += 1
+            if mismatches <= options["limit"]:
+                print(f"{product}: {name} stored={stored!r} live={live!r}")
+
+        if mismatches:
+            raise CommandError(f"Number of stale verdicts: {mismatches}")
+        print("Stored verdicts are consistent")
@@ -0,0 +1,85 @@
+import random
+import time
+
+import numpy as np
+from django.core.management import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from uptech.product.analogues import AnalogueLoader
+from uptech.product.clusters import ANALOGUE_SOURCES, ARRAY, CLUSTER
+from uptech.product.models import MedsisDrug, Product
+
+
+def _fetch_one(sql: str):
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        return cursor.fetchone()
+
+
+class Command(BaseCommand):
+    help = "Compare size and latency of stored analogue_ids arrays and medsis drug clusters"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sample", type=int, default=500, help="Number of random products to load")
+        parser.add_argument("--limit", type=int, default=10, help="Max number of mismatches to print")
+
+    def storage(self):
+        product, drug = Product._meta.db_table, MedsisDrug._meta.db_table
+        array_bytes, array_entries = _fetch_one(
+            f"SELECT coalesce(sum(pg_column_size(analogue_ids)), 0), coalesce(sum(cardinality(analogue_ids)), 0) "
+            f"FROM {product}"
+        )
+        drug_bytes, index_bytes, drug_entries = _fetch_one(
+            f"SELECT pg_total_relation_size('{drug}'), pg_relation_size('product_medsis_id_idx'), "
+            f"(SELECT coalesce(sum(cardinality(analogue_medsis_ids)), 0) FROM {drug})"
+        )
+        print(f"array: {array_entries} analogue ids, {array_bytes / 1024:.0f}KB of product rows")
+        print(
+            f"cluster: {drug_entries} analogue drug ids, {drug_bytes / 1024:.0f}KB medsis_drug table, "
+            f"{index_bytes / 1024:.0f}KB product_medsis_id_idx"
+        )
+        return array_entries
+
+    def load(self, pk: int, source: str):
+        """(analogue ids, seconds, queries) of a product loaded with its analogues like the retrieve action."""
+        with CaptureQueriesContext(connection) as queries:
+            started_at = time.perf_counter()
+            product = Product.objects.get(pk=pk)
+            AnalogueLoader(source).load([product])
+            seconds = time.perf_counter() - started_at
+        return product.analogue_ids, seconds, len(queries)
+
+    def handle(self, *args, **options):
+        if not MedsisDrug.objects.exists():
+            raise CommandError("medsis_drug is empty, run `manage.py fill --medsis` first")
+        arrays_filled = self.storage() > 0
+        if not arrays_filled:
+            print("analogue_ids arrays are empty, fill in array mode to compare loaded analogues")
+
+        ids = [*Product.objects.filter(medsis_id__isnull=False).values_list("pk", flat=True)]
+        sample = random.sample(ids, min(options["sample"], len(ids)))
+        seconds = {source: [] for source in ANALOGUE_SOURCES}
+        queries = {source: [] for source in ANALOGUE_SOURCES}
+        mismatches = 0
+        for pk in sample:
+            results = {}
+            # Alternated so both sources see the same cache state
+            for source in ANALOGUE_SOURCES:
+                results[source], s, q = self.load(pk, source)
+                seconds[source].append(s)
+                queries[source].append(q)
+            if arrays_filled and results[ARRAY] != results[CLUSTER]:
+                mismatches += 1
+                if mismatches <= options["limit"]:
+                    print(f"Product {pk}: array={results[ARRAY]} cluster={results[CLUSTER]}")
+
+        for source in ANALOGUE_SOURCES:
+            ms = np.array(seconds[source]) * 1000
+            if len(ms):
+                print(
+                    f"{source} load of {len(ms)} products: p50 {np.percentile(ms, 50):.2f}ms, "
+                    f"p95 {np.percentile(ms, 95):.2f}ms, {np.mean(queries[source]):.1f} queries"
+                )
+        if arrays_filled:
+            print(f"Mismatched analogues: {mismatches} of {len(sample)}")
@@ -1,158 +1,221 @@
 import json
 import os
+import time
 from collections import defaultdict
 
 from django.conf import settings
 from django.core.management import BaseCommand
 
+from uptech.api.products.summary import clear_analogue_summaries, refresh_analogue_summaries
+from uptech.metrics import record_fill_phase
+from uptech.product.catalog import bump_catalog_version
+from uptech.product.clusters import CLUSTER, sync_medsis_drugs
+from uptech.product.loaders import CopyLoader, LoadStats, OrmLoader
+from uptech.product.medsis import iter_parsed_drugs
 from uptech.product.models import Product
-from uptech.utils import chunks
+from uptech.product.verdicts import refresh_verdicts
+from uptech.utils import iter_json_array
 
 
 class Command(BaseCommand):
 
     PROPERTY_NAME_OVERRIDES = {}
     PRODUCTS_LIMIT = 100000
+    MEDSIS_DATA_FIELDS = [
+        "effectiveness",
+        "safety",
+        "convenience",
+        "contraindications",
+        "side_effects",
+        "tolerance",
+        "score",
+    ]
+    LOADERS = {"orm": OrmLoader, "copy": CopyLoader}
 
     def add_arguments(self, parser):
         parser.add_argument("--products", action="store_true", help="Fill product database")
         parser.add_argument("--basket", action="store_true", help="Fill basket in database")
         parser.add_argument("--medsis", action="store_true", help="Fill medsis data")
+        parser.add_argument("--verdicts", action="store_true", help="Only refresh precomputed product verdicts")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Number of rows written at once")
+        parser.add_argument(
+            "--loader",
+            choices=self.LOADERS,
+            default="orm",
+            help="Write rows with ORM bulk queries or stream them with COPY into a staging table",
+        )
+        parser.add_argument("--data-dir", help="Directory with feed files, BASE_DIR/HackData by default")
+        parser.add_argument("--delta", action="store_true", help="Only write rows changed since the previous fill")
+        parser.add_argument("--prune", action="store_true", help="Delete products missing from products.json")
+        parser.add_argument(
+            "--vectorized-verdicts",
+            action="store_true",
+            help="Compute verdicts of the whole catalog at once with NumPy instead of product by product",
+        )
 
-    def fill_products(self):
-        products_data = {}
-        with open(os.path.join(settings.BASE_DIR, "HackData", "products.json"), "r") as f:
-            for p in json.load(f):
-                products_data[p["ID"]] = {"sber_product_id": p["ID"], "name": p["NAME"]}
+    def _open(self, file_name):
+        return open(os.path.join(self.data_dir, file_name), "r")
+
+    def _iter_json(self, file_name):
+        with self._open(file_name) as f:
+            yield from iter_json_array(f)
 
-        print(f"Number of products: {len(products_data)}")
+    def _progress(self, rows, label):
+        for cnt, row in enumerate(rows, 1):
+            yield row
+            if not cnt % self.batch_size:
+                print(f"{label}: {cnt}")
 
+    def fill_products(self):
         model_fields = {f.name: f for f in Product._meta.get_fields()}
         print(f"DB product fields: {model_fields.keys()}")
 
-        with open(os.path.join(settings.BASE_DIR, "HackData", "property.json"), "r") as f:
+        with self._open("property.json") as f:
             properties = [
                 p for p in json.load(f) if self.PROPERTY_NAME_OVERRIDES.get(p["ID"], p["CODE"].lower()) in model_fields
             ]
         properties_data = {p["ID"]: self.PROPERTY_NAME_OVERRIDES.get(p["ID"], p["CODE"].lower()) for p in properties}
         print(f"Properties to parse: {properties_data}")
 
-        with open(os.path.join(settings.BASE_DIR, "HackData", "propertyValues.json"), "r") as f:
-            values = json.load(f)
+        rows = ((p["ID"], p["NAME"]) for p in self._iter_json("products.json"))
+        stats = self.loader.upsert_products(
+            self._progress(rows, "Products read"), self.PRODUCTS_LIMIT, "products_hash", prune=self.prune
+        )
+        self._report("Products", stats)
+
+        property_fields = sorted({*properties_data.values()})
+        if not property_fields:
+            return
 
-        for v in values:
+        rows = self._iter_property_values(properties_data, property_fields)
+        stats = self.loader.update_products(
+            property_fields, self._progress(rows, "Property values read"), "properties_hash"
+        )
+        self._report("Product properties", stats)
+
+    def _iter_property_values(self, properties_data, property_fields):
+        for v in self._iter_json("propertyValues.json"):
             product_id = v["IBLOCK_ELEMENT_ID"]
             assert product_id and isinstance(product_id, int), f"Invalid product id: {product_id}"
+
+            values = {}
             for field_name, field_value in v.items():
                 if not field_name.startswith("PROPERTY_"):
                     continue
                 prop_id = int(field_name.split("_")[1])
                 if prop_id not in properties_data:
                     continue
-                products_data[product_id][properties_data[prop_id]] = field_value
-
-        products_to_create = []
-        products_to_update = Product.objects.in_bulk(products_data.keys(), field_name="sber_product_id")
-        for product_id, data in products_data.items():
-            if product_id in products_to_update:
-                for field_name, field_value in data.items():
-                    setattr(products_to_update[product_id], field_name, field_value)
-            else:
-                products_to_create.append(Product(**data))
-
-        if len(products_to_create) + len(products_to_update) > self.PRODUCTS_LIMIT:
-            products_to_create = products_to_create[: self.PRODUCTS_LIMIT - len(products_to_update)]
-
-        print(f"Number of products to create: {len(products_to_create)}")
-
-        print(f"Number of products to update: {len(products_to_update)}")
-
-        Product.objects.bulk_create(products_to_create)
-        Product.objects.bulk_update(
-            products_to_update.values(),
-            fields={*model_fields.keys()} - {"id", "sber_product_id"},
-        )
+                values[properties_data[prop_id]] = field_value
+            yield (product_id, *(values.get(f) for f in property_fields))
 
     def fill_basket(self):
-        with open(os.path.join(settings.BASE_DIR, "HackData", "basket.json"), "r") as f:
-            data = json.load(f)
-
-        products_map = Product.objects.in_bulk([d["PRODUCT_ID"] for d in data], field_name="sber_product_id")
-        products_to_update = []
-        for data_item in data:
-            if data_item["PRODUCT_ID"] not in products_map:
-                continue
-            p = products_map[data_item["PRODUCT_ID"]]
-            p.price = data_item["PRICE"]
-            p.detail_page_url = data_item["DETAIL_PAGE_URL"]
-            products_to_update.append(p)
-
-        print(f"Number of products to update basket: {len(products_to_update)}")
-        cnt = 0
-        for p_chunk in chunks(products_to_update, 500):
-            Product.objects.bulk_update(p_chunk, ["price", "detail_page_url"])
-            cnt += len(p_chunk)
-            print(cnt)
+        rows = ((d["PRODUCT_ID"], d["PRICE"], d["DETAIL_PAGE_URL"]) for d in self._iter_json("basket.json"))
+        stats = self.loader.update_products(
+            ["price", "detail_page_url"], self._progress(rows, "Basket items read"), "basket_hash"
+        )
+        self._report("Basket", stats)
 
     def fill_medsis(self):
-        with open(os.path.join(settings.BASE_DIR, "HackData", "medsis_id_map.json"), "r") as f:
+        with self._open("medsis_id_map.json") as f:
             sber_to_medsis = {item["sber_id"]: item["medsis_ids"][0] for item in json.load(f) if item["medsis_ids"]}
+        # Products of a drug are ordered by sber_product_id, like `uptech.product.clusters` resolves them
         medsis_to_sber = defaultdict(list)
-        for sber_id, medsis_id in sber_to_medsis.items():
+        for sber_id, medsis_id in sorted(sber_to_medsis.items()):
             medsis_to_sber[medsis_id].append(sber_id)
 
-        with open(os.path.join(settings.BASE_DIR, "HackData", "parsed_drub_data.json"), "r") as f:
-            data = {item["medsis_id"]: item for item in json.load(f)}
+        data = {item["medsis_id"]: item for item in iter_parsed_drugs(self.data_dir)}
 
-        product_map = Product.objects.in_bulk(sber_to_medsis.keys(), field_name="sber_product_id")
-        products_to_update = []
-        for sber_id, p in product_map.items():
+        product_ids = dict(
+            Product.objects.filter(sber_product_id__in=sber_to_medsis.keys()).values_list("sber_product_id", "pk")
+        )
+        # Analogues are resolved through drugs in cluster mode, arrays are left empty
+        is_cluster = settings.PRODUCT_ANALOGUE_SOURCE == CLUSTER
+        rows = []
+        drugs = {}
+        for sber_id in product_ids:
             if not sber_to_medsis.get(sber_id):
                 continue
 
             medsis_id = sber_to_medsis[sber_id]
-
-            p.medsis_id = medsis_id
-            p.effectiveness = data[medsis_id]["effectiveness"]
-            p.safety = data[medsis_id]["safety"]
-            p.convenience = data[medsis_id]["convenience"]
-            p.contraindications = data[medsis_id]["contraindications"]
-            p.side_effects = data[medsis_id]["side_effects"]
-            p.tolerance = data[medsis_id]["tolerance"]
-            p.score = data[medsis_id]["score"]
-            p.analogue_ids = [
-                product_map[s_id].pk
-                for m_id in data[medsis_id]["analogue_medsis_ids"]
-                for s_id in medsis_to_sber[m_id]
-                if s_id in product_map
-            ]
-
-            products_to_update.append(p)
-
-        print(f"Number of products to update medsis: {len(products_to_update)}")
-        cnt = 0
-        for p_chunk in chunks(products_to_update, 500):
-            Product.objects.bulk_update(
-                p_chunk,
-                [
-                    "medsis_id",
-                    "effectiveness",
-                    "safety",
-                    "convenience",
-                    "contraindications",
-                    "side_effects",
-                    "tolerance",
-                    "score",
-                    "analogue_ids",
-                ],
+            drugs[medsis_id] = data[medsis_id]["analogue_medsis_ids"]
+            if is_cluster:
+                analogue_ids = []
+            else:
+                analogue_ids = [
+                    product_ids[s_id]
+                    for m_id in data[medsis_id]["analogue_medsis_ids"]
+                    for s_id in medsis_to_sber[m_id]
+                    if s_id in product_ids
+                ]
+            rows.append(
+                (sber_id, medsis_id, *(data[medsis_id][f] for f in self.MEDSIS_DATA_FIELDS), analogue_ids),
             )
-            cnt += len(p_chunk)
-            print(cnt)
+
+        print(f"Number of products to update medsis: {len(rows)}")
+        stats = self.loader.update_products(
+            ["medsis_id", *self.MEDSIS_DATA_FIELDS, "analogue_ids"], rows, "medsis_hash"
+        )
+        self._report("Medsis", stats)
+        self._report("Medsis drugs", sync_medsis_drugs(drugs, batch_size=self.batch_size))
+
+    def fill_verdicts(self):
+        # In delta mode only verdicts which differ from the stored ones are rewritten
+        cnt = refresh_verdicts(only_changed=self.delta, vectorized=self.vectorized_verdicts)
+        self.written_cnt += cnt
+        print(f"Number of products with refreshed verdicts: {cnt}")
+        self._record_phase("Verdicts", LoadStats(changed=cnt))
+
+    def fill_analogue_summaries(self):
+        if not settings.PRODUCT_ANALOGUE_SUMMARY_ENABLED:
+            cnt = clear_analogue_summaries()
+            print(f"Number of cleared analogue summaries: {cnt}")
+        else:
+            cnt = refresh_analogue_summaries(only_changed=self.delta)
+            print(f"Number of products with refreshed analogue summaries: {cnt}")
+        self.written_cnt += cnt
+        self._record_phase("Analogue summaries", LoadStats(changed=cnt))
+
+    def _report(self, label, stats):
+        self.written_cnt += stats.written
+        print(f"{label}: {stats}")
+        self._record_phase(label, stats)
+
+    def _record_phase(self, label, stats):
+        # A phase lasts since the end of the previous one, reading of its feed files included
+        now = time.monotonic()
+        record_fill_phase(label.lower().replace(" ", "_"), now - self.phase_started_at, stats)
+        self.phase_started_at = now
+
+    def setup(self, data_dir, batch_size=1000, loader="orm", delta=False, prune=False, vectorized_verdicts=False):
+        self.data_dir = data_dir
+        self.batch_size = batch_size
+        self.delta = delta
+        self.prune = prune
+        self.vectorized_verdicts = vectorized_verdicts
+        self.loader = self.LOADERS[loader](batch_size=batch_size, delta=delta)
+        self.written_cnt = 0
+        self.phase_started_at = time.monotonic()
 
     def handle(self, *args, **options):
+        self.setup(
+            options["data_dir"] or os.path.join(settings.BASE_DIR, "HackData"),
+            batch_size=options["batch_size"],
+            loader=options["loader"],
+            delta=options["delta"],
+            prune=options["prune"],
+            vectorized_verdicts=options["vectorized_verdicts"],
+        )
         if options["products"]:
             self.fill_products()
         if options["basket"]:
             self.fill_basket()
         if options["medsis"]:
             self.fill_medsis()
+        if any(options[phase] for phase in ("products", "basket", "medsis", "verdicts")):
+            self.fill_verdicts()
+            self.fill_analogue_summaries()
+            if self.delta and not self.written_cnt:
+                print("Catalog is not changed")
+                return
+            catalog_version = bump_catalog_version()
+            print(f"Catalog version: {catalog_version.version}")
@@ -0,0 +1,187 @@
+import asyncio
+import contextlib
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import aiohttp
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from uptech.product.models import Product
+
+SERVER_COMMANDS = {
+    "wsgi": ["uptech.wsgi"],
+    "asgi": ["uptech.asgi", "--worker-class", "uvicorn.workers.UvicornWorker"],
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _process_tree_rss(pid: int) -> int:
+    """Resident memory of the process and its descendants in bytes, Linux only."""
+    rss, pids = 0, [pid]
+    while pids:
+        pid = pids.pop()
+        try:
+            with open(f"/proc/{pid}/status") as f:
+                rss += next((int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:")), 0)
+            for task in os.listdir(f"/proc/{pid}/task"):
+                with open(f"/proc/{pid}/task/{task}/children") as f:
+                    pids.extend(map(int, f.read().split()))
+        except (FileNotFoundError, ProcessLookupError):
+            continue
+    return rss
+
+
+class _MemorySampler(threading.Thread):
+    def __init__(self, pid: int, interval: float = 0.2):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.max_rss = 0
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.max_rss = max(self.max_rss, _process_tree_rss(self.pid))
+
+    def stop(self) -> int:
+        self._stopped.set()
+        self.join()
+        return self.max_rss
+
+
+class Command(BaseCommand):
+    help = "Compare requests/sec, latency and memory per client of the WSGI and ASGI deployments"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--server",
+            action="append",
+            choices=SERVER_COMMANDS,
+            help="Deployments to start with gunicorn, both by default",
+        )
+        parser.add_argument("--url", help="Load an already running server instead of starting one")
+        parser.add_argument("--pid", type=int, help="Server master process of --url to measure memory of")
+        parser.add_argument("--workers", type=int, default=2, help="Number of gunicorn workers")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50], help="Concurrent clients")
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+        parser.add_argument(
+            "--path",
+            action="append",
+            help="Requested paths, retrieve, info and search of random products by default",
+        )
+
+    def default_paths(self, cnt=100):
+        products = [*Product.objects.order_by("?").values_list("id", "name")[:cnt]]
+        if not products:
+            raise CommandError("The catalog is empty, run `fill` or pass --path")
+        paths = []
+        for pk, name in products:
+            paths += [
+                f"/api/v1/products/{pk}/",
+                f"/api/v1/products/{pk}/info/",
+                f"/api/v1/products/search/?name={name[:4]}",
+            ]
+        return paths
+
+    async def _run_client(self, session, base_url, paths, deadline, latencies, errors):
+        rnd = random.Random()
+        while time.monotonic() < deadline:
+            started_at = time.perf_counter()
+            try:
+                async with session.get(base_url + rnd.choice(paths)) as resp:
+                    await resp.read()
+                    if resp.status >= 500:
+                        errors.append(resp.status)
+                        continue
+            except aiohttp.ClientError as e:
+                errors.append(e)
+                continue
+            latencies.append(time.perf_counter() - started_at)
+
+    async def load(self, base_url, paths, concurrency, duration):
+        latencies, errors = [], []
+        connector = aiohttp.TCPConnector(limit=concurrency)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            deadline = time.monotonic() + duration
+            await asyncio.gather(
+                *(self._run_client(session, base_url, paths, deadline, latencies, errors) for _ in range(concurrency))
+            )
+        return latencies, errors
+
+    def report(self, label, concurrency, duration, latencies, errors, rss):
+        latencies = sorted(latencies)
+        p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+        p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+        memory = f", rss {rss / 2**20:.0f}MB, {rss / 2**10 / concurrency:.0f}KB per client" if rss else ""
+        print(
+            f"{label} x{concurrency}: {len(latencies) / duration:.0f} req/s, p50 {p50:.1f}ms, p99 {p99:.1f}ms, "
+            f"errors {len(errors)}{memory}"
+        )
+
+    def run_levels(self, label, base_url, pid, paths, options):
+        for concurrency in options["concurrency"]:
+            sampler = _MemorySampler(pid) if pid else None
+            if sampler:
+                sampler.start()
+            latencies, errors = asyncio.run(self.load(base_url, paths, concurrency, options["duration"]))
+            rss = sampler.stop() if sampler else 0
+            self.report(label, concurrency, options["duration"], latencies, errors, rss)
+
+    @contextlib.contextmanager
+    def start_server(self, server, workers):
+        port = _free_port()
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "gunicorn",
+                *SERVER_COMMANDS[server],
+                "--workers",
+                str(workers),
+                "--bind",
+                f"127.0.0.1:{port}",
+                "--log-level",
+                "warning",
+            ],
+            cwd=settings.BASE_DIR,
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            self.wait_ready(base_url, process)
+            yield base_url, process.pid
+        finally:
+            process.terminate()
+            process.wait()
+
+    def wait_ready(self, base_url, process, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(f"Server exited with code {process.returncode}")
+            with contextlib.suppress(OSError), socket.create_connection(("127.0.0.1", int(base_url.split(":")[-1]))):
+                return
+            time.sleep(0.2)
+        raise CommandError(f"Server at {base_url} is not ready in {timeout}s")
+
+    def handle(self, *args, **options):
+        paths = options["path"] or self.default_paths()
+        if options["url"]:
+            self.run_levels(options["url"], options["url"].rstrip("/"), options["pid"], paths, options)
+            return
+
+        for server in options["server"] or list(SERVER_COMMANDS):
+            with self.start_server(server, options["workers"]) as (base_url, pid):
+                # Warm up imports, connections and the catalog stamp of every worker
+                asyncio.run(self.load(base_url, paths, options["workers"] * 2, 1))
+                self.run_levels(server, base_url, pid, paths, options)
@@ -0,0 +1,72 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from uptech.product.medsis import MedsisNameIndex, iter_parsed_drugs, match_name_naive, tokenize_name
+from uptech.utils import iter_json_array
+
+
+class Command(BaseCommand):
+    help = "Match products.json names with parsed medsis drugs and write medsis_id_map.json for `fill --medsis`"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--data-dir", help="Directory with feed files, BASE_DIR/HackData by default")
+        parser.add_argument("--output", help="Result file, medsis_id_map.json in the data directory by default")
+        parser.add_argument(
+            "--compare-naive",
+            type=int,
+            default=0,
+            metavar="N",
+            help="Also match the first N products by comparing with every medsis name, check and time both",
+        )
+
+    def compare_naive(self, index, medsis_names, products, result):
+        started_at = time.perf_counter()
+        for p in products:
+            match = match_name_naive(tokenize_name(p["NAME"]), medsis_names)
+            if (match.ids if match else []) != result[p["ID"]]:
+                raise CommandError(f"Index and naive matches differ for product {p['ID']} {p['NAME']!r}")
+        naive_time = time.perf_counter() - started_at
+
+        started_at = time.perf_counter()
+        for p in products:
+            index.match(tokenize_name(p["NAME"]))
+        index_time = time.perf_counter() - started_at
+
+        print(
+            f"{len(products)} products: naive {naive_time:.2f}s, index {index_time:.4f}s, "
+            f"x{naive_time / max(index_time, 1e-9):.0f} faster"
+        )
+
+    def handle(self, *args, **options):
+        data_dir = options["data_dir"] or os.path.join(settings.BASE_DIR, "HackData")
+        output = options["output"] or os.path.join(data_dir, "medsis_id_map.json")
+
+        started_at = time.perf_counter()
+        medsis_names = [(item["medsis_id"], tokenize_name(item["name"])) for item in iter_parsed_drugs(data_dir)]
+        index = MedsisNameIndex(medsis_names)
+        print(f"Index of {len(medsis_names)} medsis names is built in {time.perf_counter() - started_at:.2f}s")
+
+        started_at = time.perf_counter()
+        result = {}
+        sample = []
+        with open(os.path.join(data_dir, "products.json"), "r") as f:
+            for p in iter_json_array(f):
+                match = index.match(tokenize_name(p["NAME"]))
+                result[p["ID"]] = match.ids if match else []
+                if len(sample) < options["compare_naive"]:
+                    sample.append(p)
+        print(f"{len(result)} products are matched in {time.perf_counter() - started_at:.2f}s")
+        print(f"Not matched: {sum(1 for ids in result.values() if not ids)}")
+        print(f"Single match: {sum(1 for ids in result.values() if len(ids) == 1)}")
+        print(f"Multiple matches: {sum(1 for ids in result.values() if len(ids) > 1)}")
+
+        if sample:
+            self.compare_naive(index, medsis_names, sample, result)
+
+        with open(output, "w") as f:
+            json.dump([{"sber_id": sber_id, "medsis_ids": ids} for sber_id, ids in result.items()], f)
+        print(f"Medsis id map is written to {output}")
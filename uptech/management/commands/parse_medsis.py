@@ -0,0 +1,56 @@
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from uptech.product.medsis import PARSED_DATA_FILES
+from uptech.product.medsis_parse import parse_dump
+
+
+class Command(BaseCommand):
+    help = "Parse medsis_dump pages into parsed_drub_data.ndjson for `match_medsis` and `fill --medsis`"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--data-dir", help="Directory with drugs.json and medsis_dump, BASE_DIR/HackData by default"
+        )
+        parser.add_argument("--output", help=f"Result file, {PARSED_DATA_FILES[0]} in the data directory by default")
+        parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of parser processes")
+        parser.add_argument(
+            "--parser",
+            choices=["html.parser", "lxml"],
+            default="html.parser",
+            help="BeautifulSoup parser backend, lxml is several times faster",
+        )
+
+    def handle(self, *args, **options):
+        data_dir = options["data_dir"] or os.path.join(settings.BASE_DIR, "HackData")
+        output = options["output"] or os.path.join(data_dir, PARSED_DATA_FILES[0])
+
+        started_at = time.perf_counter()
+        parsed_cnt = 0
+        failed = {}
+        with open(output, "w") as f:
+            for cnt, (file_name, drug, error) in enumerate(
+                parse_dump(data_dir, workers=options["workers"], features=options["parser"]), start=1
+            ):
+                if error:
+                    failed[file_name] = error
+                else:
+                    f.write(json.dumps(drug, ensure_ascii=False) + "\n")
+                    parsed_cnt += 1
+                if cnt % 1000 == 0:
+                    print(f"{cnt} files, {cnt / (time.perf_counter() - started_at):.0f} files/sec")
+
+        elapsed = time.perf_counter() - started_at
+        total_cnt = parsed_cnt + len(failed)
+        print(
+            f"Parsed: {parsed_cnt}, failed: {len(failed)} in {elapsed:.1f}s, "
+            f"{total_cnt / max(elapsed, 1e-9):.0f} files/sec"
+        )
+        for file_name, error in failed.items():
+            print(f"{file_name}: {error}")
+        if failed:
+            raise CommandError(f"Number of failed files: {len(failed)}")
@@ -0,0 +1,130 @@
+import asyncio
+import json
+import time
+import typing
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+import aiohttp
+from django.core.management import BaseCommand, CommandError
+from django.urls import Resolver404, resolve
+
+from uptech.metrics import get_view_labels
+
+
+class ActionStats:
+    def __init__(self):
+        self.latencies: typing.List[float] = []
+        self.client_errors = 0
+        self.errors = 0
+
+    @property
+    def cnt(self) -> int:
+        return len(self.latencies) + self.errors
+
+    def percentile(self, q: float) -> float:
+        latencies = sorted(self.latencies)
+        return latencies[min(int(len(latencies) * q), len(latencies) - 1)] * 1000 if latencies else 0
+
+
+def load_entries(path: str, limit: typing.Optional[int] = None) -> typing.List[dict]:
+    """Requests recorded by `contrib.django.request_recording`, workers append them slightly out of order."""
+    with open(path) as f:
+        entries = sorted((json.loads(line) for line in f if line.strip()), key=lambda e: e["ts"])
+    return entries[:limit]
+
+
+def action_label(entry: dict) -> str:
+    try:
+        match = resolve(urlsplit(entry["path"]).path)
+    except Resolver404:
+        match = None
+    view, action = get_view_labels(match, entry["method"])
+    return f"{view} {action}".strip()
+
+
+class Command(BaseCommand):
+    help = "Replay requests recorded by RequestRecordingMiddleware against a running server"
+
+    def add_arguments(self, parser):
+        parser.add_argument("log", help="JSON lines file written by RequestRecordingMiddleware")
+        parser.add_argument("--url", default="http://127.0.0.1:8000", help="Server to replay the requests against")
+        parser.add_argument("--concurrency", type=int, default=10, help="Maximum of requests in flight")
+        pacing = parser.add_mutually_exclusive_group()
+        pacing.add_argument("--rate", type=float, help="Requests per second, as fast as possible by default")
+        pacing.add_argument(
+            "--preserve-timing", action="store_true", help="Send requests with their recorded inter-arrival times"
+        )
+        parser.add_argument("--speed", type=float, default=1.0, help="Speedup of --preserve-timing")
+        parser.add_argument("--limit", type=int, help="Replay only the first requests of the log")
+        parser.add_argument("--timeout", type=float, default=30.0, help="Request timeout in seconds, counted as error")
+
+    def send_offsets(self, entries, options) -> typing.List[float]:
+        """Seconds since the start of the replay to send every entry at."""
+        if options["preserve_timing"]:
+            first_ts = entries[0]["ts"] if entries else 0
+            return [(e["ts"] - first_ts) / options["speed"] for e in entries]
+        if options["rate"]:
+            return [idx / options["rate"] for idx in range(len(entries))]
+        return [0.0] * len(entries)
+
+    async def send(self, session, base_url, entry, stats: ActionStats, semaphore):
+        started_at = time.perf_counter()
+        try:
+            async with session.request(
+                entry["method"], base_url + entry["path"], data=entry["body"].encode() or None, headers=entry["headers"]
+            ) as resp:
+                await resp.read()
+                if resp.status >= 500:
+                    stats.errors += 1
+                    return
+                if resp.status >= 400:
+                    stats.client_errors += 1
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            stats.errors += 1
+            return
+        finally:
+            semaphore.release()
+        stats.latencies.append(time.perf_counter() - started_at)
+
+    async def replay(self, entries, base_url, options) -> typing.Tuple[typing.Dict[str, ActionStats], float]:
+        stats = defaultdict(ActionStats)
+        labels = [action_label(e) for e in entries]
+        semaphore = asyncio.Semaphore(options["concurrency"])
+        tasks = set()
+        connector = aiohttp.TCPConnector(limit=options["concurrency"])
+        timeout = aiohttp.ClientTimeout(total=options["timeout"])
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            started_at = time.monotonic()
+            for entry, label, offset in zip(entries, labels, self.send_offsets(entries, options)):
+                delay = started_at + offset - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                # Requests are late rather than piling up when the server is slower than the log
+                await semaphore.acquire()
+                task = asyncio.create_task(self.send(session, base_url, entry, stats[label], semaphore))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+            return stats, time.monotonic() - started_at
+
+    def report(self, stats: typing.Dict[str, ActionStats], duration: float):
+        rows = sorted(stats.items(), key=lambda item: -item[1].cnt)
+        total = ActionStats()
+        for _, s in rows:
+            total.latencies += s.latencies
+            total.client_errors += s.client_errors
+            total.errors += s.errors
+        for label, s in [*rows, ("total", total)]:
+            print(
+                f"{label}: {s.cnt} requests, {s.cnt / duration:.1f} req/s, p50 {s.percentile(0.5):.1f}ms, "
+                f"p95 {s.percentile(0.95):.1f}ms, p99 {s.percentile(0.99):.1f}ms, "
+                f"4xx {s.client_errors / s.cnt:.1%}, errors {s.errors / s.cnt:.1%}"
+            )
+
+    def handle(self, *args, **options):
+        entries = load_entries(options["log"], options["limit"])
+        if not entries:
+            raise CommandError(f"No requests in {options['log']}")
+        stats, duration = asyncio.run(self.replay(entries, options["url"].rstrip("/"), options))
+        self.report(stats, duration)
@@ -0,0 +1,56 @@
+import asyncio
+import os
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from uptech.product.medsis_scrape import BASE_URL, LETTERS, FetchError, MedsisScraper
+
+
+class Command(BaseCommand):
+    help = "Download meds.is drug pages into medsis_dump, interrupted runs continue where they stopped"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--data-dir", help="Directory for drugs.json and medsis_dump, BASE_DIR/HackData by default")
+        parser.add_argument("--base-url", default=BASE_URL)
+        parser.add_argument("--letters", nargs="+", default=LETTERS, help="Alphabet pages to crawl")
+        parser.add_argument("--skip-alphabet", action="store_true", help="Reuse drugs.json of a previous run")
+        parser.add_argument("--force", action="store_true", help="Download pages which are already dumped")
+        parser.add_argument("--concurrency", type=int, default=10, help="Max number of open connections")
+        parser.add_argument("--rate", type=float, default=3.0, help="Max requests per second to a host")
+        parser.add_argument("--burst", type=float, default=1, help="Max requests to a host sent at once")
+        parser.add_argument("--retries", type=int, default=5)
+        parser.add_argument("--backoff", type=float, default=1.0, help="First retry delay, doubled on every retry")
+        parser.add_argument("--timeout", type=float, default=10.0, help="Request timeout in seconds")
+
+    def handle(self, *args, **options):
+        scraper = MedsisScraper(
+            options["data_dir"] or os.path.join(settings.BASE_DIR, "HackData"),
+            base_url=options["base_url"],
+            concurrency=options["concurrency"],
+            rate=options["rate"],
+            burst=options["burst"],
+            retries=options["retries"],
+            backoff=options["backoff"],
+            timeout=options["timeout"],
+        )
+
+        drugs_path = os.path.join(scraper.data_dir, "drugs.json")
+        if options["skip_alphabet"] and not os.path.exists(drugs_path):
+            raise CommandError(f"{drugs_path} does not exist, run the command without --skip-alphabet first")
+
+        started_at = time.perf_counter()
+        try:
+            asyncio.run(scraper.run(options["letters"], skip_alphabet=options["skip_alphabet"], force=options["force"]))
+        except FetchError as e:
+            raise CommandError(f"Failed to download an alphabet page, {e}") from e
+        print(
+            f"Successes: {scraper.success_cnt}, already dumped: {scraper.skipped_cnt}, fails: {len(scraper.failed)} "
+            f"in {time.perf_counter() - started_at:.1f}s"
+        )
+
+        for url, error in scraper.failed.items():
+            print(f"{url}: {error}")
+        if scraper.failed:
+            raise CommandError(f"Number of failed pages: {len(scraper.failed)}, run the command again to retry them")
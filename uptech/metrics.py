@@ -0,0 +1,193 @@
+"""
+Prometheus metrics of the API workers and of the last `manage.py fill`, served by `metrics_view`.
+
+`MetricsMiddleware` observes latency, errors and DB queries of every request labelled by the view and its viewset
+action, and the resident memory of the worker. A scrape reaches a single gunicorn worker, so with
+PROMETHEUS_MULTIPROC_DIR set (see gunicorn.conf.py) workers write samples into files of that directory and the
+view merges the files of all of them. Fill runs in a separate short-lived process, possibly on another machine,
+its phases are stored in the `fill_phase` table and read on scrape.
+"""
+import asyncio
+import os
+import time
+import typing
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.urls import ResolverMatch
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.exposition import CONTENT_TYPE_LATEST
+
+from contrib.django.request_timing import current_timings
+from uptech.product.catalog import get_catalog_version
+from uptech.product.models import FillPhase
+
+REQUEST_LATENCY = Histogram(
+    "uptech_request_duration_seconds",
+    "Time from the first middleware to the rendered response",
+    ["view", "action"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUEST_ERRORS = Counter(
+    "uptech_request_errors_total", "Responses with 4xx and 5xx status codes", ["view", "action", "status"]
+)
+REQUEST_DB_QUERIES = Histogram(
+    "uptech_request_db_queries",
+    "DB queries per request",
+    ["view", "action"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "uptech_response_cache_lookups_total", "Response cache lookups of product actions", ["action", "result"]
+)
+# A sample per live worker, dead ones are removed by the child_exit hook of gunicorn.conf.py
+WORKER_RSS = Gauge("uptech_worker_rss_bytes", "Resident memory of the worker process", multiprocess_mode="liveall")
+
+# Seconds between RSS reads of a worker
+RSS_UPDATE_INTERVAL = 10
+
+_rss_updated_at = {"at": None}
+
+
+def _read_rss() -> typing.Optional[int]:
+    """Linux only."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (FileNotFoundError, ValueError, IndexError):
+        return None
+
+
+def update_worker_rss():
+    now = time.monotonic()
+    updated_at = _rss_updated_at["at"]
+    if updated_at is not None and now - updated_at < RSS_UPDATE_INTERVAL:
+        return
+    _rss_updated_at["at"] = now
+    rss = _read_rss()
+    if rss is not None:
+        WORKER_RSS.set(rss)
+
+
+def get_view_labels(match: typing.Optional[ResolverMatch], method: str) -> typing.Tuple[str, str]:
+    """View name and viewset action of a resolved request."""
+    if match is None:
+        return "unmatched", ""
+    # Viewset routes map methods to actions, async product views are named after theirs
+    actions = getattr(match.func, "actions", None) or {}
+    return match.view_name, actions.get(method.lower(), match.func.__name__)
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Mark the middleware as a coroutine function for Django
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        started_at = time.perf_counter()
+        response = self.get_response(request)
+        self._observe(request, response, started_at)
+        return response
+
+    async def __acall__(self, request):
+        started_at = time.perf_counter()
+        response = await self.get_response(request)
+        self._observe(request, response, started_at)
+        return response
+
+    def _observe(self, request, response, started_at: float):
+        # Includes the middleware above when RequestTimingMiddleware is installed
+        timings = current_timings()
+        seconds = timings.total_seconds if timings else time.perf_counter() - started_at
+
+        view, action = get_view_labels(request.resolver_match, request.method)
+        REQUEST_LATENCY.labels(view, action).observe(seconds)
+        if response.status_code >= 400:
+            REQUEST_ERRORS.labels(view, action, str(response.status_code)).inc()
+        if timings:
+            REQUEST_DB_QUERIES.labels(view, action).observe(timings.db_cnt)
+        update_worker_rss()
+
+
+def record_fill_phase(name: str, seconds: float, stats):
+    """Store `LoadStats` of a finished fill phase."""
+    FillPhase.objects.update_or_create(
+        name=name,
+        defaults={
+            "finished_at": timezone.now(),
+            "duration": seconds,
+            "inserted": stats.inserted,
+            "changed": stats.changed,
+            "unchanged": stats.unchanged,
+            "skipped": stats.skipped,
+            "deleted": stats.deleted,
+        },
+    )
+
+
+class CatalogCollector:
+    """Catalog version and the last fill phases, read from the database on scrape."""
+
+    ROW_RESULTS = ["inserted", "changed", "unchanged", "skipped", "deleted"]
+
+    def collect(self):
+        version = GaugeMetricFamily("uptech_catalog_version", "Catalog version bumped by fill")
+        version.add_metric([], get_catalog_version().version)
+        yield version
+
+        duration = GaugeMetricFamily(
+            "uptech_fill_phase_duration_seconds", "Duration of the last run of a fill phase", labels=["phase"]
+        )
+        finished_at = GaugeMetricFamily(
+            "uptech_fill_phase_finished_timestamp_seconds", "End of the last run of a fill phase", labels=["phase"]
+        )
+        rows = GaugeMetricFamily(
+            "uptech_fill_phase_rows", "Feed rows of the last run of a fill phase", labels=["phase", "result"]
+        )
+        for phase in FillPhase.objects.order_by("name"):
+            duration.add_metric([phase.name], phase.duration)
+            finished_at.add_metric([phase.name], phase.finished_at.timestamp())
+            for result in self.ROW_RESULTS:
+                rows.add_metric([phase.name, result], getattr(phase, result))
+        yield from (duration, finished_at, rows)
+
+
+class _ProcessCollector:
+    """Metrics of this process only, without PROMETHEUS_MULTIPROC_DIR."""
+
+    def collect(self):
+        return REGISTRY.collect()
+
+
+def get_registry() -> CollectorRegistry:
+    registry = CollectorRegistry()
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry.register(_ProcessCollector())
+    registry.register(CatalogCollector())
+    return registry
+
+
+def metrics_view(request) -> HttpResponse:
+    # Scraped by internal infrastructure only, open without the token on local environment
+    token = settings.METRICS_TOKEN
+    if token:
+        if not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            raise Http404
+    elif settings.BACKEND_ENV != settings.LOCAL:
+        raise Http404
+
+    update_worker_rss()
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,72 @@
+import typing
+
+from django.conf import settings
+
+from contrib.django.request_timing import timed
+from uptech.product.clusters import CLUSTER, resolve_cluster_analogue_ids
+from uptech.product.models import MedsisDrug, Product
+
+
+class AnalogueLoader:
+    """
+    Fetches analogues for a batch of products with a single query and remembers every product it has seen.
+
+    One loader is shared by all serializers of a request (see `get_analogue_loader`), so analogues
+    of nested products that were already fetched for the top level ones don't hit the database again.
+    Analogue ids come from PRODUCT_ANALOGUE_SOURCE, see `uptech.product.clusters`.
+    """
+
+    def __init__(self, source: typing.Optional[str] = None):
+        self.source = source or settings.PRODUCT_ANALOGUE_SOURCE
+        self._products: typing.Dict[int, Product] = {}
+        self._fetched_ids: typing.Set[int] = set()
+
+    def resolve(self, products: typing.Iterable[Product]) -> None:
+        """Set `analogue_ids` of products from medsis drugs in "cluster" mode, stored ones are used otherwise."""
+        if self.source == CLUSTER:
+            resolve_cluster_analogue_ids(products)
+
+    def add(self, products: typing.Iterable[Product], fetched_ids: typing.Iterable[int]) -> None:
+        """Remember products fetched by the caller, `fetched_ids` missing among them aren't looked up again."""
+        for p in products:
+            self._products.setdefault(p.pk, p)
+        self._fetched_ids.update(fetched_ids)
+
+    def load(self, products: typing.Iterable[typing.Optional[Product]]) -> None:
+        """Set `_analogues` on every product that doesn't have them yet, analogue_ids order is kept."""
+        products = [p for p in products if p is not None and not hasattr(p, "_analogues")]
+        for p in products:
+            self._products.setdefault(p.pk, p)
+            self._fetched_ids.add(p.pk)
+        self.resolve(products)
+
+        missing_ids = {a_id for p in products for a_id in p.analogue_ids} - self._fetched_ids
+        if missing_ids:
+            with timed("analogues"):
+                analogues = Product.objects.in_bulk(missing_ids)
+                # Serialized analogues list their own analogue_ids
+                self.resolve(analogues.values())
+            self._products.update(analogues)
+            self._fetched_ids |= missing_ids
+
+        for p in products:
+            p._analogues = [self._products[a_id] for a_id in p.analogue_ids if a_id in self._products]
+
+
+def get_analogue_loader(context: dict) -> AnalogueLoader:
+    return context.setdefault("analogue_loader", AnalogueLoader())
+
+
+def get_referencing_products(products: typing.Iterable[Product], source: typing.Optional[str] = None):
+    """
+    Queryset of products listing any of products among their analogues.
+
+    Served by `analogue_ids_gin_idx`, or by `medsis_drug_analogues_gin_idx` and `product_medsis_id_idx`
+    when analogues come from medsis drugs.
+    """
+    products = [*products]
+    if (source or settings.PRODUCT_ANALOGUE_SOURCE) != CLUSTER:
+        return Product.objects.filter(analogue_ids__overlap=[p.pk for p in products])
+    medsis_ids = [p.medsis_id for p in products if p.medsis_id is not None]
+    drugs = MedsisDrug.objects.filter(analogue_medsis_ids__overlap=medsis_ids)
+    return Product.objects.filter(medsis_id__in=drugs.values("medsis_id"))
@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from uptech.product.models import CatalogVersion
+
+CATALOG_VERSION_PK = 1
+
+
+def get_catalog_version() -> CatalogVersion:
+    """Return current catalog stamp, version 0 means `fill` never completed."""
+    version = CatalogVersion.objects.filter(pk=CATALOG_VERSION_PK).first()
+    return version or CatalogVersion(pk=CATALOG_VERSION_PK)
+
+
+def bump_catalog_version() -> CatalogVersion:
+    with transaction.atomic():
+        CatalogVersion.objects.get_or_create(pk=CATALOG_VERSION_PK)
+        CatalogVersion.objects.filter(pk=CATALOG_VERSION_PK).update(version=F("version") + 1, updated_at=timezone.now())
+    reset_current_catalog()
+    return get_catalog_version()
+
+
+_current_catalog = {"catalog": None, "checked_at": None}
+
+
+def get_current_catalog() -> CatalogVersion:
+    """Catalog stamp cached in process for CATALOG_VERSION_CACHE_TTL seconds."""
+    now = time.monotonic()
+    checked_at = _current_catalog["checked_at"]
+    if checked_at is None or now - checked_at >= settings.CATALOG_VERSION_CACHE_TTL:
+        _current_catalog["catalog"] = get_catalog_version()
+        _current_catalog["checked_at"] = now
+    return _current_catalog["catalog"]
+
+
+def reset_current_catalog():
+    _current_catalog["checked_at"] = None
+
+
+def get_current_catalog_version() -> int:
+    return get_current_catalog().version
@@ -0,0 +1,90 @@
+"""
+Product analogues resolved through medsis drug clusters instead of stored `Product.analogue_ids` arrays.
+
+Analogues of a product are the products of the analogue drugs of its medsis drug. `manage.py fill` expands them into
+`analogue_ids` of every product, so all products of a drug store the same O(cluster size) array and every read ships
+it. `medsis_drug` keeps the analogue drug ids once per drug and products reference their drug by `medsis_id`, so
+with PRODUCT_ANALOGUE_SOURCE = "cluster" analogue ids are resolved per drug with a join served by the `medsis_drug`
+primary key and `product_medsis_id_idx`. Ids are ordered by the analogue drug order, then by sber_product_id,
+like fill orders the arrays.
+
+Migration from arrays: apply the migration and run fill, it writes drugs in both modes. Switch the API workers to
+"cluster", then run fill with it, which empties the arrays. To switch back fill in "array" mode first.
+`manage.py compare_analogue_storage` compares size and latency of both while the arrays are filled.
+"""
+import typing
+
+from django.db import connection, transaction
+
+from uptech.product.loaders import LoadStats
+from uptech.product.models import MedsisDrug, Product
+
+ARRAY = "array"
+CLUSTER = "cluster"
+ANALOGUE_SOURCES = [ARRAY, CLUSTER]
+
+
+def _analogues_join(drug_alias: str = "d", analogue_alias: str = "a") -> str:
+    return (
+        f"{MedsisDrug._meta.db_table} {drug_alias} JOIN {Product._meta.db_table} {analogue_alias} "
+        f"ON {analogue_alias}.medsis_id = ANY({drug_alias}.analogue_medsis_ids)"
+    )
+
+
+def product_analogue_ids_sql() -> str:
+    """Query of analogue ids of the product with id passed as the only parameter."""
+    return (
+        f"SELECT a.id FROM {Product._meta.db_table} p JOIN {_analogues_join()} ON d.medsis_id = p.medsis_id "
+        f"WHERE p.id = %s"
+    )
+
+
+def get_drug_analogue_ids(
+    medsis_ids: typing.Optional[typing.Iterable[int]] = None,
+) -> typing.Dict[int, typing.List[int]]:
+    """Ordered ids of analogue products of medsis drugs, of all drugs by default, drugs without them are missing."""
+    sql = (
+        f"SELECT d.medsis_id, array_agg(a.id ORDER BY array_position(d.analogue_medsis_ids, a.medsis_id), "
+        f"a.sber_product_id) FROM {_analogues_join()}"
+    )
+    params = []
+    if medsis_ids is not None:
+        sql += " WHERE d.medsis_id = ANY(%s)"
+        params.append([*medsis_ids])
+    with connection.cursor() as cursor:
+        cursor.execute(sql + " GROUP BY d.medsis_id", params)
+        return dict(cursor.fetchall())
+
+
+def resolve_cluster_analogue_ids(products: typing.Iterable[Product]) -> None:
+    """Replace `analogue_ids` of products with ids resolved through their drugs, once per product."""
+    products = [p for p in products if not getattr(p, "_cluster_resolved", False)]
+    medsis_ids = {p.medsis_id for p in products if p.medsis_id is not None}
+    drug_analogue_ids = get_drug_analogue_ids(medsis_ids) if medsis_ids else {}
+    for p in products:
+        p.analogue_ids = [*drug_analogue_ids.get(p.medsis_id, [])]
+        p._cluster_resolved = True
+
+
+def sync_medsis_drugs(drugs: typing.Dict[int, typing.List[int]], batch_size: int = 1000) -> LoadStats:
+    """Make `medsis_drug` match {medsis_id: analogue medsis ids}, stored drugs missing from it are deleted."""
+    stored = dict(MedsisDrug.objects.values_list("medsis_id", "analogue_medsis_ids"))
+    to_create = [
+        MedsisDrug(medsis_id=m_id, analogue_medsis_ids=ids) for m_id, ids in drugs.items() if m_id not in stored
+    ]
+    to_update = [
+        MedsisDrug(medsis_id=m_id, analogue_medsis_ids=ids)
+        for m_id, ids in drugs.items()
+        if m_id in stored and stored[m_id] != ids
+    ]
+    deleted_ids = stored.keys() - drugs.keys()
+    with transaction.atomic():
+        MedsisDrug.objects.bulk_create(to_create, batch_size=batch_size)
+        MedsisDrug.objects.bulk_update(to_update, ["analogue_medsis_ids"], batch_size=batch_size)
+        MedsisDrug.objects.filter(pk__in=deleted_ids).delete()
+    return LoadStats(
+        inserted=len(to_create),
+        changed=len(to_update),
+        unchanged=len(drugs) - len(to_create) - len(to_update),
+        deleted=len(deleted_ids),
+    )
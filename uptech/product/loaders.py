@@ -0,0 +1,286 @@
+import hashlib
+import io
+import json
+import typing
+
+from django.db import connection, transaction
+
+from uptech.product.models import Product
+from uptech.utils import chunks
+
+Row = typing.Tuple[typing.Any, ...]
+
+
+def row_hash(values: typing.Sequence) -> str:
+    """Content hash of feed row values, stored next to them to detect changes on the next run."""
+    return hashlib.md5(json.dumps(values, default=str, ensure_ascii=False).encode()).hexdigest()
+
+
+class LoadStats:
+    def __init__(self, inserted=0, changed=0, unchanged=0, skipped=0, deleted=0):
+        self.inserted = inserted
+        self.changed = changed
+        self.unchanged = unchanged
+        self.skipped = skipped
+        self.deleted = deleted
+
+    @property
+    def written(self) -> int:
+        return self.inserted + self.changed + self.deleted
+
+    def __str__(self):
+        return (
+            f"inserted: {self.inserted}, changed: {self.changed}, unchanged: {self.unchanged}, "
+            f"skipped: {self.skipped}, deleted: {self.deleted}"
+        )
+
+
+class ProductLoader:
+    """
+    Writes feed rows of `manage.py fill` into the product table.
+
+    Rows are matched by sber_product_id, which is always the first item of a row.
+    When the same sber_product_id occurs several times, the last row wins.
+
+    A hash of the row values is stored in hash_field of every written product.
+    In delta mode products whose stored hash matches the row are not rewritten.
+    """
+
+    def __init__(self, batch_size: int = 1000, delta: bool = False):
+        self.batch_size = batch_size
+        self.delta = delta
+
+    def upsert_products(
+        self, rows: typing.Iterable[typing.Tuple[int, str]], limit: int, hash_field: str, prune: bool = False
+    ) -> LoadStats:
+        """
+        Create or rename products from (sber_product_id, name) rows.
+
+        New products are created until there are `limit` products in total, the rest are skipped.
+        With `prune` products missing from rows are deleted.
+        """
+        raise NotImplementedError
+
+    def update_products(self, fields: typing.List[str], rows: typing.Iterable[Row], hash_field: str) -> LoadStats:
+        """
+        Set fields of existing products from (sber_product_id, *values) rows, rows of unknown products are skipped.
+        """
+        raise NotImplementedError
+
+
+class OrmLoader(ProductLoader):
+    """`bulk_create` and `bulk_update` in batches of batch_size rows."""
+
+    def upsert_products(self, rows, limit, hash_field, prune=False):
+        stats = LoadStats()
+        seen_ids = set()
+        products_cnt = Product.objects.count()
+        for batch in chunks(rows, self.batch_size):
+            names = dict(batch)
+            if prune:
+                seen_ids.update(names)
+
+            existing = Product.objects.in_bulk(names.keys(), field_name="sber_product_id")
+            products_to_update = []
+            for product_id, p in existing.items():
+                h = row_hash([names[product_id]])
+                if getattr(p, hash_field) == h:
+                    stats.unchanged += 1
+                    if self.delta:
+                        continue
+                else:
+                    stats.changed += 1
+                p.name = names[product_id]
+                setattr(p, hash_field, h)
+                products_to_update.append(p)
+
+            new_ids = [product_id for product_id in names if product_id not in existing]
+            products_to_create = [
+                Product(
+                    sber_product_id=product_id, name=names[product_id], **{hash_field: row_hash([names[product_id]])}
+                )
+                for product_id in new_ids[: max(limit - products_cnt, 0)]
+            ]
+
+            Product.objects.bulk_create(products_to_create)
+            Product.objects.bulk_update(products_to_update, ["name", hash_field])
+            products_cnt += len(products_to_create)
+            stats.inserted += len(products_to_create)
+            stats.skipped += len(new_ids) - len(products_to_create)
+
+        if prune:
+            stale_pks = [
+                pk
+                for pk, product_id in Product.objects.values_list("pk", "sber_product_id").iterator()
+                if product_id not in seen_ids
+            ]
+            for pks in chunks(stale_pks, self.batch_size):
+                stats.deleted += Product.objects.filter(pk__in=pks).delete()[0]
+        return stats
+
+    def update_products(self, fields, rows, hash_field):
+        stats = LoadStats()
+        for batch in chunks(rows, self.batch_size):
+            values = {row[0]: row[1:] for row in batch}
+            products_map = Product.objects.in_bulk(values.keys(), field_name="sber_product_id")
+            stats.skipped += len(values) - len(products_map)
+
+            products_to_update = []
+            for product_id, p in products_map.items():
+                h = row_hash(values[product_id])
+                if getattr(p, hash_field) == h:
+                    stats.unchanged += 1
+                    if self.delta:
+                        continue
+                else:
+                    stats.changed += 1
+                for field, value in zip(fields, values[product_id]):
+                    setattr(p, field, value)
+                setattr(p, hash_field, h)
+                products_to_update.append(p)
+
+            Product.objects.bulk_update(products_to_update, [*fields, hash_field])
+        return stats
+
+
+def _copy_value(value) -> str:
+    """Encode a value for `COPY ... FROM STDIN` in text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, (list, tuple)):
+        value = "{" + ",".join(str(v) for v in value) + "}"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class _CopyFile(io.TextIOBase):
+    """Readable file over rows encoded lazily, so `copy_expert` streams a feed without materializing it."""
+
+    def __init__(self, rows: typing.Iterable[Row]):
+        self._lines = ("\t".join(_copy_value(v) for v in row) + "\n" for row in rows)
+        self._buffer = ""
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        parts, length = [self._buffer], len(self._buffer)
+        while size < 0 or length < size:
+            line = next(self._lines, None)
+            if line is None:
+                break
+            parts.append(line)
+            length += len(line)
+
+        data = "".join(parts)
+        if size < 0:
+            size = length
+        self._buffer = data[size:]
+        return data[:size]
+
+
+class CopyLoader(ProductLoader):
+    """
+    Streams rows with `COPY` into an unlogged staging table and merges them with a single statement per phase.
+
+    The staging table lives only inside the phase transaction.
+    """
+
+    STAGING_TABLE = "fill_staging"
+
+    def _copy_to_staging(self, cursor, columns: typing.List[str], rows: typing.Iterable[Row]):
+        """Copy rows with their hash appended as the last column."""
+        column_types = ", ".join(f"{c} {Product._meta.get_field(c).db_type(connection)}" for c in columns)
+        cursor.execute(f"DROP TABLE IF EXISTS {self.STAGING_TABLE}")
+        cursor.execute(f"CREATE UNLOGGED TABLE {self.STAGING_TABLE} (seq bigserial, {column_types})")
+        rows = ((*row, row_hash(row[1:])) for row in rows)
+        cursor.copy_expert(f"COPY {self.STAGING_TABLE} ({', '.join(columns)}) FROM STDIN", _CopyFile(rows))
+
+    def _staging_rows(self, hash_field: str) -> str:
+        # Last row wins, a single INSERT ... ON CONFLICT can't touch the same product twice
+        return f"""
+            SELECT s.*, p.id IS NULL AS is_new, p.{hash_field} IS DISTINCT FROM s.{hash_field} AS is_changed
+            FROM (
+                SELECT DISTINCT ON (sber_product_id) * FROM {self.STAGING_TABLE} ORDER BY sber_product_id, seq DESC
+            ) s
+            LEFT JOIN {Product._meta.db_table} p ON p.sber_product_id = s.sber_product_id
+        """
+
+    def _fetch_stats(self, cursor, hash_field: str) -> LoadStats:
+        cursor.execute(
+            f"""
+            SELECT
+                count(*) FILTER (WHERE NOT is_new AND is_changed),
+                count(*) FILTER (WHERE NOT is_new AND NOT is_changed),
+                count(*) FILTER (WHERE is_new)
+            FROM ({self._staging_rows(hash_field)}) s
+            """
+        )
+        changed_cnt, unchanged_cnt, new_cnt = cursor.fetchone()
+        return LoadStats(changed=changed_cnt, unchanged=unchanged_cnt, skipped=new_cnt)
+
+    def upsert_products(self, rows, limit, hash_field, prune=False):
+        # Model defaults are not database defaults, they are passed explicitly for new rows
+        defaults = [
+            f
+            for f in Product._meta.concrete_fields
+            if not f.primary_key and not f.null and f.has_default() and f.name not in ("sber_product_id", "name")
+        ]
+        default_columns = "".join(f", {f.column}" for f in defaults)
+        default_values = "".join(f", %s::{f.db_type(connection)}" for f in defaults)
+        default_params = [f.get_db_prep_save(f.get_default(), connection) for f in defaults]
+        table = Product._meta.db_table
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            self._copy_to_staging(cursor, ["sber_product_id", "name", hash_field], rows)
+            stats = self._fetch_stats(cursor, hash_field)
+            cursor.execute(
+                f"""
+                WITH merged AS (
+                    INSERT INTO {table} (sber_product_id, name, {hash_field}{default_columns})
+                    SELECT sber_product_id, name, {hash_field}{default_values}
+                    FROM (
+                        SELECT *, row_number() OVER (PARTITION BY is_new ORDER BY seq) AS new_rank
+                        FROM ({self._staging_rows(hash_field)}) s
+                    ) t
+                    WHERE is_new AND new_rank <= GREATEST(%s - (SELECT count(*) FROM {table}), 0)
+                        OR NOT is_new AND (is_changed OR NOT %s)
+                    ORDER BY seq
+                    ON CONFLICT (sber_product_id) DO UPDATE
+                        SET name = EXCLUDED.name, {hash_field} = EXCLUDED.{hash_field}
+                    RETURNING xmax = 0 AS created
+                )
+                SELECT count(*) FILTER (WHERE created) FROM merged
+                """,
+                [*default_params, limit, self.delta],
+            )
+            stats.inserted = cursor.fetchone()[0]
+            stats.skipped -= stats.inserted
+
+            if prune:
+                cursor.execute(
+                    f"""
+                    DELETE FROM {table} p
+                    WHERE NOT EXISTS (SELECT FROM {self.STAGING_TABLE} s WHERE s.sber_product_id = p.sber_product_id)
+                    """
+                )
+                stats.deleted = cursor.rowcount
+            cursor.execute(f"DROP TABLE {self.STAGING_TABLE}")
+        return stats
+
+    def update_products(self, fields, rows, hash_field):
+        columns = [Product._meta.get_field(f).column for f in [*fields, hash_field]]
+        with transaction.atomic(), connection.cursor() as cursor:
+            self._copy_to_staging(cursor, ["sber_product_id", *columns], rows)
+            stats = self._fetch_stats(cursor, hash_field)
+            cursor.execute(
+                f"""
+                UPDATE {Product._meta.db_table} p SET {", ".join(f"{c} = s.{c}" for c in columns)}
+                FROM ({self._staging_rows(hash_field)}) s
+                WHERE p.sber_product_id = s.sber_product_id AND (s.is_changed OR NOT %s)
+                """,
+                [self.delta],
+            )
+            cursor.execute(f"DROP TABLE {self.STAGING_TABLE}")
+        return stats
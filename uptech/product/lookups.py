@@ -0,0 +1,51 @@
+from django.contrib.postgres.lookups import PostgresOperatorLookup
+from django.db import models
+from django.db.models import lookups
+
+
+@models.CharField.register_lookup
+class TrigramIContains(lookups.IContains):
+    """
+    Case-insensitive substring match rendered as plain `ILIKE`.
+
+    Django renders `icontains` as `UPPER(col::text) LIKE UPPER(...)` which can't use a `gin_trgm_ops` index,
+    while `col ILIKE '%...%'` can.
+    """
+
+    lookup_name = "trigram_icontains"
+
+    def as_postgresql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} ILIKE {rhs}", (*lhs_params, *rhs_params)
+
+
+@models.CharField.register_lookup
+class TrigramWordSimilar(PostgresOperatorLookup):
+    """`col %> value`: word similarity above `pg_trgm.word_similarity_threshold`, served by `gin_trgm_ops`."""
+
+    lookup_name = "trigram_word_similar"
+    postgres_operator = "%%>"
+
+
+class TrigramWordSimilarity(models.Func):
+    """`word_similarity(value, col)`, backport of the Django 4.0 function."""
+
+    function = "WORD_SIMILARITY"
+    output_field = models.FloatField()
+
+    def __init__(self, string, expression, **extra):
+        if not hasattr(string, "resolve_expression"):
+            string = models.Value(string)
+        super().__init__(string, expression, **extra)
+
+
+class NormalizedName(models.Func):
+    """
+    `uptech.product.suggest.normalize_name` in SQL: lowered, with whitespace runs collapsed and trimmed.
+
+    Over the product name it's served by `name_normalized_pattern_idx`.
+    """
+
+    template = r"LOWER(BTRIM(REGEXP_REPLACE(%(expressions)s, '\s+', ' ', 'g')))"
+    output_field = models.CharField()
@@ -0,0 +1,114 @@
+import json
+import os
+import re
+import typing
+
+from uptech.utils import iter_json_array
+
+BASE_URL = "https://meds.is"
+PARSED_DATA_FILES = ["parsed_drub_data.ndjson", "parsed_drub_data.json"]
+NAME_SEPARATORS = re.compile(r", ?| ?- ?|\. ?| +")
+
+
+def iter_parsed_drugs(data_dir: str) -> typing.Generator[dict, None, None]:
+    """Yield drugs written by `parse_medsis`, NDJSON output is preferred to the legacy JSON array."""
+    for file_name in PARSED_DATA_FILES:
+        path = os.path.join(data_dir, file_name)
+        if not os.path.exists(path):
+            continue
+        with open(path, "r") as f:
+            if file_name.endswith(".ndjson"):
+                yield from (json.loads(line) for line in f if line.strip())
+            else:
+                yield from iter_json_array(f)
+        return
+    raise FileNotFoundError(f"None of {PARSED_DATA_FILES} is found in {data_dir}")
+
+
+def tokenize_name(name: str) -> typing.List[str]:
+    return [s.strip() for s in re.sub(NAME_SEPARATORS, " ", name.lower()).split() if s.strip()]
+
+
+def compare_names(sber: typing.List[str], medsis: typing.List[str]) -> typing.Tuple[int, bool]:
+    """
+    Return (score, full) for two tokenized names.
+
+    Score is the length of their common token prefix, full means that one name is a prefix of the other.
+    """
+    for cnt, (s, m) in enumerate(zip(sber, medsis)):
+        if s != m:
+            return cnt, False
+    return min(len(sber), len(medsis)), True
+
+
+class MedsisMatch:
+    def __init__(self, ids: typing.List[int], score: int, full: bool):
+        self.ids = ids
+        self.score = score
+        self.full = full
+
+
+def match_name_naive(
+    sber: typing.List[str], medsis_names: typing.List[typing.Tuple[int, typing.List[str]]]
+) -> typing.Optional[MedsisMatch]:
+    """
+    Reference matcher comparing a product name with every medsis name.
+
+    The best score wins. Among the best matches the last full one is picked, otherwise all of them are kept.
+    """
+    match = None
+    for medsis_id, medsis in medsis_names:
+        score, full = compare_names(sber, medsis)
+        if not score:
+            continue
+        if match is None or match.score < score or match.score == score and full:
+            match = MedsisMatch([medsis_id], score, full)
+        elif match.score == score and not match.full:
+            match.ids.append(medsis_id)
+    return match
+
+
+class _Node:
+    __slots__ = ("children", "ids", "terminal_ids")
+
+    def __init__(self):
+        self.children: typing.Dict[str, "_Node"] = {}
+        # Medsis ids of the node subtree and of names ending at the node, in input order
+        self.ids: typing.List[int] = []
+        self.terminal_ids: typing.List[int] = []
+
+
+class MedsisNameIndex:
+    """
+    Token trie over medsis names, a lookup walks a product name once instead of comparing it with every name.
+
+    The deepest node on the product path holds all names with the best score, results match `match_name_naive`.
+    """
+
+    def __init__(self, medsis_names: typing.Iterable[typing.Tuple[int, typing.List[str]]]):
+        self.root = _Node()
+        for medsis_id, tokens in medsis_names:
+            if not tokens:
+                continue
+            node = self.root
+            for token in tokens:
+                node = node.children.setdefault(token, _Node())
+                node.ids.append(medsis_id)
+            node.terminal_ids.append(medsis_id)
+
+    def match(self, sber: typing.List[str]) -> typing.Optional[MedsisMatch]:
+        node, depth = self.root, 0
+        for token in sber:
+            child = node.children.get(token)
+            if child is None:
+                break
+            node, depth = child, depth + 1
+
+        if not depth:
+            return None
+        if depth == len(sber):
+            # Product name is a prefix of every name in the subtree
+            return MedsisMatch([node.ids[-1]], depth, True)
+        if node.terminal_ids:
+            return MedsisMatch([node.terminal_ids[-1]], depth, True)
+        return MedsisMatch(list(node.ids), depth, False)
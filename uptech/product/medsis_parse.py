@@ -0,0 +1,105 @@
+import json
+import os
+import typing
+from concurrent.futures import ProcessPoolExecutor
+
+import bs4
+
+from uptech.product.medsis import BASE_URL
+
+STAT_FIELDS = [
+    "effectiveness",
+    "safety",
+    "convenience",
+    "contraindications",
+    "side_effects",
+    "tolerance",
+]
+
+
+class ParseError(ValueError):
+    pass
+
+
+def parse_drug(html: bytes, file_name: str, drug_names: typing.Dict[str, str], features: str = "html.parser") -> dict:
+    """Parse a `medsis_dump/<slug>.html` page, drug_names maps slugs to names from drugs.json."""
+    soup = bs4.BeautifulSoup(html, features)
+    slug = file_name.split(".")[0]
+    if slug not in drug_names:
+        raise ParseError(f"Drug is not found in drugs.json: {file_name}")
+
+    result = {
+        "medsis_id": int(file_name.split("-")[0]),
+        "medsis_url": f"{BASE_URL}/drugs/{slug}",
+        "name": drug_names[slug],
+    }
+    progress_values = soup.find_all("progress")
+    if len(progress_values) != len(STAT_FIELDS):
+        raise ParseError(f"Invalid parsed progress values: {file_name}")
+
+    for stat, tag in zip(STAT_FIELDS, progress_values):
+        try:
+            result[stat] = int(tag["value"])
+        except (KeyError, ValueError):
+            raise ParseError(f"Cannot parse stat {stat} at tag {tag}")
+
+    score_div = soup.find("div", {"class": "level-item digits"})
+    if score_div is None:
+        raise ParseError(f"Score div not found in {file_name}")
+    score_parts = score_div.findChildren("div", {"class": "num"})
+    if len(score_parts) != 2:
+        raise ParseError(f"Score parts are invalid at div {score_div} at file {file_name}")
+    try:
+        float(score_parts[0].text)
+    except ValueError:
+        raise ParseError(f"Invalid score: {score_parts[0].text} at div {score_div} at file {file_name}")
+    result["score"] = score_parts[0].text
+
+    analogue_medsis_ids = []
+    for item in soup.find_all("a", {"style": "position:relative;display:none;"}):
+        href = item["href"]
+        try:
+            analogue_medsis_ids.append(int(href.split("/")[-1].split("-")[0]))
+        except ValueError:
+            raise ParseError(f"Bad analogue href: {href} at file {file_name}")
+    result["analogue_medsis_ids"] = analogue_medsis_ids
+    return result
+
+
+def load_drug_names(data_dir: str) -> typing.Dict[str, str]:
+    with open(os.path.join(data_dir, "drugs.json"), "r") as f:
+        return {d["url"].rstrip("/").split("/")[-1]: d["name"] for d in json.load(f)}
+
+
+_worker_state = {}
+
+
+def _init_worker(dump_dir: str, drug_names: typing.Dict[str, str], features: str):
+    _worker_state.update(dump_dir=dump_dir, drug_names=drug_names, features=features)
+
+
+def _parse_file(file_name: str) -> typing.Tuple[str, typing.Optional[dict], typing.Optional[str]]:
+    """Return (file name, parsed drug, error), errors are reported instead of stopping the whole run."""
+    try:
+        with open(os.path.join(_worker_state["dump_dir"], file_name), "rb") as f:
+            html = f.read()
+        return file_name, parse_drug(html, file_name, _worker_state["drug_names"], _worker_state["features"]), None
+    except Exception as e:
+        return file_name, None, repr(e)
+
+
+def parse_dump(
+    data_dir: str, workers: int = 1, features: str = "html.parser", chunk_size: int = 32
+) -> typing.Generator[typing.Tuple[str, typing.Optional[dict], typing.Optional[str]], None, None]:
+    """Yield `_parse_file` results for every page of `medsis_dump`, pages are parsed by a pool of worker processes."""
+    dump_dir = os.path.join(data_dir, "medsis_dump")
+    file_names = sorted(f for f in os.listdir(dump_dir) if f.endswith(".html"))
+    init_args = (dump_dir, load_drug_names(data_dir), features)
+
+    if workers == 1:
+        _init_worker(*init_args)
+        yield from map(_parse_file, file_names)
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=init_args) as executor:
+        yield from executor.map(_parse_file, file_names, chunksize=chunk_size)
@@ -0,0 +1,201 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+import typing
+from urllib.parse import urlsplit
+
+import aiohttp
+import bs4
+
+from uptech.product.medsis import BASE_URL
+
+logger = logging.getLogger(__name__)
+
+LETTERS = [
+    "A",
+    "B",
+    "V",
+    "G",
+    "D",
+    "E",
+    "ZH",
+    "Z",
+    "I",
+    "Y",
+    "K",
+    "L",
+    "M",
+    "N",
+    "O",
+    "P",
+    "R",
+    "S",
+    "T",
+    "U",
+    "F",
+    "H",
+    "C",
+    "CH",
+    "SH",
+    "AE",
+    "YU",
+    "YA",
+]
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    pass
+
+
+def parse_letter_page(html: bytes, base_url: str = BASE_URL) -> typing.List[typing.Dict[str, str]]:
+    soup = bs4.BeautifulSoup(html, "html.parser")
+    items = soup.find_all(href=lambda h: h and h.startswith("/drugs/"))
+    return [{"name": it.text.strip(), "url": base_url + it["href"]} for it in items]
+
+
+def dump_file_name(url: str) -> str:
+    return f'{url.rstrip("/").split("/")[-1]}.html'
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average and bursts of up to `capacity` requests."""
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class MedsisScraper:
+    """
+    Crawls meds.is alphabet pages into drugs.json and drug pages into `medsis_dump/<slug>.html`.
+
+    Dump files are written atomically and existing ones are not fetched again,
+    so the dump directory itself is the checkpoint of an interrupted run.
+    """
+
+    def __init__(
+        self,
+        data_dir: str,
+        base_url: str = BASE_URL,
+        concurrency: int = 10,
+        rate: float = 3.0,
+        burst: float = 1,
+        retries: int = 5,
+        backoff: float = 1.0,
+        timeout: float = 10.0,
+    ):
+        self.data_dir = data_dir
+        self.dump_dir = os.path.join(data_dir, "medsis_dump")
+        self.base_url = base_url.rstrip("/")
+        self.concurrency = concurrency
+        self.rate = rate
+        self.burst = burst
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._buckets: typing.Dict[str, TokenBucket] = {}
+        self.success_cnt = self.skipped_cnt = 0
+        self.failed: typing.Dict[str, str] = {}
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlsplit(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return self._buckets[host]
+
+    async def fetch(self, session: aiohttp.ClientSession, url: str) -> bytes:
+        """GET url, retrying connection errors and RETRY_STATUSES with exponential backoff."""
+        for attempt in range(self.retries + 1):
+            await self._bucket(url).acquire()
+            try:
+                async with session.get(url) as resp:
+                    if resp.status == 200:
+                        return await resp.read()
+                    if resp.status not in RETRY_STATUSES:
+                        raise FetchError(f"HTTP {resp.status}")
+                    error = f"HTTP {resp.status}"
+                    retry_after = resp.headers.get("Retry-After", "")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = repr(e)
+                retry_after = ""
+
+            if attempt == self.retries:
+                raise FetchError(error)
+            delay = float(retry_after) if retry_after.isdigit() else self.backoff * 2**attempt
+            logger.info("Retrying %s in %.1fs after %s", url, delay, error)
+            await asyncio.sleep(delay * random.uniform(1, 1.5))
+
+    async def scrape_alphabet(self, session, letters: typing.List[str]) -> typing.List[typing.Dict[str, str]]:
+        async def fetch_letter(letter: str) -> bytes:
+            url = f"{self.base_url}/alphabet/{letter}"
+            try:
+                return await self.fetch(session, url)
+            except FetchError as e:
+                raise FetchError(f"{url}: {e}") from e
+
+        pages = await asyncio.gather(*(fetch_letter(letter) for letter in letters))
+        drugs = [drug for html in pages for drug in parse_letter_page(html, self.base_url)]
+        self._write(os.path.join(self.data_dir, "drugs.json"), json.dumps(drugs, indent=2).encode())
+        return drugs
+
+    async def scrape_drugs(self, session, drugs: typing.List[typing.Dict[str, str]], force: bool = False):
+        queue = asyncio.Queue()
+        for d in drugs:
+            queue.put_nowait(d["url"])
+
+        async def worker():
+            while not queue.empty():
+                url = queue.get_nowait()
+                path = os.path.join(self.dump_dir, dump_file_name(url))
+                if not force and os.path.exists(path):
+                    self.skipped_cnt += 1
+                    continue
+                try:
+                    self._write(path, await self.fetch(session, url))
+                    self.success_cnt += 1
+                except FetchError as e:
+                    self.failed[url] = str(e)
+
+                done_cnt = self.success_cnt + len(self.failed)
+                if done_cnt % 100 == 0:
+                    print(f"Successes: {self.success_cnt}, fails: {len(self.failed)}")
+
+        os.makedirs(self.dump_dir, exist_ok=True)
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+    async def run(self, letters: typing.List[str] = LETTERS, skip_alphabet: bool = False, force: bool = False):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            if skip_alphabet:
+                with open(os.path.join(self.data_dir, "drugs.json"), "r") as f:
+                    drugs = json.load(f)
+            else:
+                drugs = await self.scrape_alphabet(session, letters)
+            print(f"Drugs to scrape: {len(drugs)}")
+            await self.scrape_drugs(session, drugs, force=force)
+
+    @staticmethod
+    def _write(path: str, content: bytes):
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
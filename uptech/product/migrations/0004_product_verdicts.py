@@ -0,0 +1,41 @@
+# Generated by Django 3.2.3 on 2026-10-18 11:58
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0003_auto_20210529_2344"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="verdict_cheaper_analogue_ids",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.BigIntegerField(), default=list, size=None
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="verdict_is_cheapest",
+            field=models.BooleanField(null=True),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="verdict_is_effective",
+            field=models.BooleanField(null=True),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="verdict_is_trustworthy",
+            field=models.BooleanField(null=True),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="verdicts_computed_at",
+            field=models.DateTimeField(null=True),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0004_product_verdicts"),
+    ]
+
+    operations = [
+        # Django 3.2 can't declare opclasses on expression indexes, so this index is kept out of Product.Meta
+        migrations.RunSQL(
+            "CREATE INDEX name_lower_pattern_idx ON product (LOWER(name) text_pattern_ops)",
+            reverse_sql="DROP INDEX name_lower_pattern_idx",
+        ),
+    ]
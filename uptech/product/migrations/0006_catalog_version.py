@@ -0,0 +1,24 @@
+# Generated by Django 3.2.3 on 2026-10-18 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0005_product_name_lower_pattern_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CatalogVersion",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("version", models.IntegerField(default=0)),
+                ("updated_at", models.DateTimeField(null=True)),
+            ],
+            options={
+                "db_table": "catalog_version",
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.3 on 2026-10-18 12:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0006_catalog_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="basket_hash",
+            field=models.CharField(max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="medsis_hash",
+            field=models.CharField(max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="products_hash",
+            field=models.CharField(max_length=32, null=True),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="properties_hash",
+            field=models.CharField(max_length=32, null=True),
+        ),
+    ]
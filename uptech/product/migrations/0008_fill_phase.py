@@ -0,0 +1,30 @@
+# Generated by Django 3.2.3 on 2026-10-18 12:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0007_product_feed_hashes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FillPhase",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=50, unique=True)),
+                ("finished_at", models.DateTimeField()),
+                ("duration", models.FloatField()),
+                ("inserted", models.IntegerField(default=0)),
+                ("changed", models.IntegerField(default=0)),
+                ("unchanged", models.IntegerField(default=0)),
+                ("skipped", models.IntegerField(default=0)),
+                ("deleted", models.IntegerField(default=0)),
+            ],
+            options={
+                "db_table": "fill_phase",
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.3 on 2026-10-18 12:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0008_fill_phase"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="analogue_summary",
+            field=models.JSONField(null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2.3 on 2026-10-18 13:09
+
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0009_product_analogue_summary"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MedsisDrug",
+            fields=[
+                ("medsis_id", models.IntegerField(primary_key=True, serialize=False)),
+                (
+                    "analogue_medsis_ids",
+                    django.contrib.postgres.fields.ArrayField(
+                        base_field=models.IntegerField(), default=list, size=None
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "medsis_drug",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(fields=["medsis_id"], name="product_medsis_id_idx"),
+        ),
+    ]
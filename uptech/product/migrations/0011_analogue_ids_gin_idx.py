@@ -0,0 +1,24 @@
+# Generated by Django 3.2.3 on 2026-10-18 13:17
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0010_medsis_drug"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="medsisdrug",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["analogue_medsis_ids"], name="medsis_drug_analogues_gin_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["analogue_ids"], name="analogue_ids_gin_idx"),
+        ),
+    ]
@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("product", "0011_analogue_ids_gin_idx"),
+    ]
+
+    operations = [
+        # Prefix lookups on `uptech.product.lookups.NormalizedName` of the name, see 0005 for why it's RunSQL
+        migrations.RunSQL(
+            r"CREATE INDEX name_normalized_pattern_idx ON product "
+            r"(LOWER(BTRIM(REGEXP_REPLACE(name, '\s+', ' ', 'g'))) text_pattern_ops)",
+            reverse_sql="DROP INDEX name_normalized_pattern_idx",
+        ),
+    ]
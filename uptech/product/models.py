@@ -22,7 +22,12 @@ class Product(models.Model):
                 name="name_gin_idx",
                 fastupdate=False,
                 opclasses=["gin_trgm_ops"],
-            )
+            ),
+            # Members of medsis drug clusters, see `uptech.product.clusters`
+            models.Index(fields=["medsis_id"], name="product_medsis_id_idx"),
+            # Products listing an analogue, see `get_referencing_products`.
+            # The pending list takes the bulk rewrites of `manage.py fill`.
+            GinIndex(fields=["analogue_ids"], name="analogue_ids_gin_idx"),
         ]
 
     sber_product_id = models.IntegerField()
@@ -46,18 +51,31 @@ class Product(models.Model):
     tolerance = models.IntegerField(null=True)
     score = models.DecimalField(max_digits=3, decimal_places=1, null=True)
 
+    # Verdicts materialized by `manage.py fill`, see `uptech.product.verdicts`.
+    verdicts_computed_at = models.DateTimeField(null=True)
+    verdict_is_effective = models.BooleanField(null=True)
+    verdict_is_cheapest = models.BooleanField(null=True)
+    verdict_is_trustworthy = models.BooleanField(null=True)
+    verdict_cheaper_analogue_ids = ArrayField(models.BigIntegerField(), default=list)
+
+    # Compact analogues with flags relative to this product, maintained by `manage.py fill`,
+    # see `uptech.api.products.summary`. Null when not computed.
+    analogue_summary = models.JSONField(null=True)
+
+    # Content hashes of the feed rows last written by `manage.py fill`, see `uptech.product.loaders`.
+    products_hash = models.CharField(max_length=32, null=True)
+    properties_hash = models.CharField(max_length=32, null=True)
+    basket_hash = models.CharField(max_length=32, null=True)
+    medsis_hash = models.CharField(max_length=32, null=True)
+
     def __str__(self):
         return f"Product(id={self.id}, sber_product_id={self.sber_product_id}, medsis_id={self.medsis_id}, name={self.name})"
 
     def _preload_analogues(self):
         if not hasattr(self, "_analogues"):
-            self._analogues = [
-                *Product.objects.filter(
-                    pk__in=self.analogue_ids,
-                    price__isnull=False,
-                    medsis_id__isnull=False,
-                )
-            ]
+            from uptech.product.analogues import AnalogueLoader
+
+            AnalogueLoader().load([self])
         return self._analogues
 
     @property
@@ -73,6 +91,8 @@ class Product(models.Model):
     def is_cheapest(self) -> bool:
         if not self.score or self.score < Decimal(6):
             return False
+        if self.price is None:
+            return False
 
         self._preload_analogues()
         if not self._analogues:
@@ -108,6 +128,14 @@ class Product(models.Model):
             if (self.price - a.price) / self.price > (a.score - self.score) / a.score
         }
 
+    def get_verdict(self, name: str):
+        """Return the stored verdict if `fill` has computed it, the live property value otherwise."""
+        if self.verdicts_computed_at is not None:
+            return getattr(self, f"verdict_{name}")
+        if name == "cheaper_analogue_ids":
+            return self.get_cheaper_analogue_ids()
+        return getattr(self, name)
+
     @property
     def image_url(self) -> Optional[str]:
         if not self.detail_page_url:
@@ -115,3 +143,45 @@ class Product(models.Model):
 
         good_id = self.detail_page_url.strip("/").split("/")[-1][2:]
         return f"https://cdn.eapteka.ru/upload/offer_photo/{good_id[:3]}/{good_id[3:]}/resized/450_450_1.jpeg"
+
+
+class MedsisDrug(models.Model):
+    """
+    Medsis drug with its analogue drugs, written by `manage.py fill`.
+
+    Products of a drug are the ones with its medsis_id, analogues of a product are the products of its drug
+    analogues, see `uptech.product.clusters`.
+    """
+
+    class Meta:
+        db_table = "medsis_drug"
+        indexes = [GinIndex(fields=["analogue_medsis_ids"], name="medsis_drug_analogues_gin_idx")]
+
+    medsis_id = models.IntegerField(primary_key=True)
+    analogue_medsis_ids = ArrayField(models.IntegerField(), default=list)
+
+
+class CatalogVersion(models.Model):
+    """Single row stamp bumped by `manage.py fill` whenever the catalog changes."""
+
+    class Meta:
+        db_table = "catalog_version"
+
+    version = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(null=True)
+
+
+class FillPhase(models.Model):
+    """Duration and row counts of the last run of a `manage.py fill` phase, exported by `uptech.metrics`."""
+
+    class Meta:
+        db_table = "fill_phase"
+
+    name = models.CharField(max_length=50, unique=True)
+    finished_at = models.DateTimeField()
+    duration = models.FloatField()
+    inserted = models.IntegerField(default=0)
+    changed = models.IntegerField(default=0)
+    unchanged = models.IntegerField(default=0)
+    skipped = models.IntegerField(default=0)
+    deleted = models.IntegerField(default=0)
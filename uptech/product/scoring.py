@@ -0,0 +1,195 @@
+import itertools
+import typing
+
+import numpy as np
+from django.conf import settings
+
+from uptech.product.clusters import CLUSTER, get_drug_analogue_ids
+from uptech.product.models import Product
+
+METRIC_FIELDS = ["effectiveness", "safety", "convenience", "contraindications", "side_effects", "tolerance"]
+
+
+def _column(values: typing.Sequence, scale: int = 1) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """(int64 values, null mask), decimals are scaled to integers so comparisons stay exact."""
+    null = np.fromiter((v is None for v in values), dtype=bool, count=len(values))
+    column = np.fromiter((0 if v is None else int(v * scale) for v in values), dtype=np.int64, count=len(values))
+    return column, null
+
+
+class CatalogArrays:
+    """
+    Columnar copy of the catalog ordered by id.
+
+    Prices are stored in cents and scores in tenths, the model `Decimal` fields have 2 and 1 decimal places.
+    Analogues are a CSR adjacency: analogues of the product `i` are `indices[indptr[i]:indptr[i + 1]]`,
+    row indices in `analogue_ids` order. Unknown analogue ids are dropped, like `AnalogueLoader` does.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        price: typing.Tuple[np.ndarray, np.ndarray],
+        score: typing.Tuple[np.ndarray, np.ndarray],
+        metrics: typing.Dict[str, typing.Tuple[np.ndarray, np.ndarray]],
+        indptr: np.ndarray,
+        indices: np.ndarray,
+    ):
+        self.ids = ids
+        self.price, self.price_null = price
+        self.score, self.score_null = score
+        self.metrics = metrics
+        self.indptr = indptr
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, queryset=None, chunk_size: int = 10000, source: typing.Optional[str] = None) -> "CatalogArrays":
+        """Analogues come from `source`, PRODUCT_ANALOGUE_SOURCE by default, see `uptech.product.clusters`."""
+        if queryset is None:
+            queryset = Product.objects.all()
+        is_cluster = (source or settings.PRODUCT_ANALOGUE_SOURCE) == CLUSTER
+        fields = ["id", "price", "score", *METRIC_FIELDS, "medsis_id" if is_cluster else "analogue_ids"]
+        rows = [*queryset.order_by("pk").values_list(*fields).iterator(chunk_size=chunk_size)]
+        columns = dict(zip(fields, zip(*rows))) if rows else {f: () for f in fields}
+
+        ids = np.array(columns["id"], dtype=np.int64)
+        if is_cluster:
+            drug_analogue_ids = get_drug_analogue_ids()
+            analogue_ids = [drug_analogue_ids.get(m_id, ()) for m_id in columns["medsis_id"]]
+        else:
+            analogue_ids = columns["analogue_ids"]
+        lengths = np.fromiter(map(len, analogue_ids), dtype=np.int64, count=len(ids))
+        flat = np.fromiter(itertools.chain.from_iterable(analogue_ids), dtype=np.int64, count=lengths.sum())
+        rows_idx = np.repeat(np.arange(len(ids)), lengths)
+
+        positions = np.searchsorted(ids, flat)
+        found = positions < len(ids)
+        found[found] = ids[positions[found]] == flat[found]
+        indptr = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows_idx[found], minlength=len(ids)), out=indptr[1:])
+
+        return cls(
+            ids,
+            _column(columns["price"], 100),
+            _column(columns["score"], 10),
+            {name: _column(columns[name]) for name in METRIC_FIELDS},
+            indptr,
+            positions[found],
+        )
+
+    def edges(self) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """(product row, analogue row) of every adjacency entry."""
+        return np.repeat(np.arange(len(self)), np.diff(self.indptr)), self.indices
+
+
+class CatalogVerdicts:
+    """
+    Verdicts of every catalog product, `is_effective` and `is_trustworthy` are None where `*_null` is set.
+
+    Cheaper analogue ids of the product `i` are `cheaper_ids[cheaper_indptr[i]:cheaper_indptr[i + 1]]`, sorted.
+    """
+
+    def __init__(
+        self,
+        ids: np.ndarray,
+        is_effective: np.ndarray,
+        is_effective_null: np.ndarray,
+        is_cheapest: np.ndarray,
+        is_trustworthy: np.ndarray,
+        is_trustworthy_null: np.ndarray,
+        cheaper_indptr: np.ndarray,
+        cheaper_ids: np.ndarray,
+    ):
+        self.ids = ids
+        self.is_effective = is_effective
+        self.is_effective_null = is_effective_null
+        self.is_cheapest = is_cheapest
+        self.is_trustworthy = is_trustworthy
+        self.is_trustworthy_null = is_trustworthy_null
+        self.cheaper_indptr = cheaper_indptr
+        self.cheaper_ids = cheaper_ids
+        self._positions = {pk: idx for idx, pk in enumerate(ids.tolist())}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, pk: int) -> bool:
+        return pk in self._positions
+
+    def get(self, pk: int) -> typing.Dict[str, typing.Any]:
+        """Verdicts of the product in `uptech.product.verdicts.compute_verdicts` format."""
+        idx = self._positions[pk]
+        return {
+            "is_effective": None if self.is_effective_null[idx] else bool(self.is_effective[idx]),
+            "is_cheapest": bool(self.is_cheapest[idx]),
+            "is_trustworthy": None if self.is_trustworthy_null[idx] else bool(self.is_trustworthy[idx]),
+            "cheaper_analogue_ids": self.cheaper_ids[self.cheaper_indptr[idx] : self.cheaper_indptr[idx + 1]].tolist(),
+        }
+
+
+def score_catalog(catalog: CatalogArrays) -> CatalogVerdicts:
+    """
+    Evaluate the `Product` verdict properties for the whole catalog at once.
+
+    Results equal the model ones. Where the model raises TypeError (a scored product without safety metrics,
+    a product without score but with scored analogues) the product isn't trustworthy and missing score counts as 0.
+    """
+    n = len(catalog)
+    price, price_null = catalog.price, catalog.price_null
+    score, score_null = catalog.score, catalog.score_null
+    has_score = ~score_null & (score != 0)
+    has_price = ~price_null & (price != 0)
+
+    # `score and score > 6 and effectiveness and effectiveness >= 80`
+    effectiveness, effectiveness_null = catalog.metrics["effectiveness"]
+    is_effective = has_score & (score > 60) & ~effectiveness_null & (effectiveness >= 80)
+    is_effective_null = score_null | has_score & (score > 60) & effectiveness_null
+
+    # `score and score >= 6 and trustworthy_rate >= 80`,
+    # the rate is (safety + 200 - side_effects - contraindications) / 3
+    safety, safety_null = catalog.metrics["safety"]
+    side_effects, side_effects_null = catalog.metrics["side_effects"]
+    contraindications, contraindications_null = catalog.metrics["contraindications"]
+    is_trustworthy = (
+        has_score
+        & (score >= 60)
+        & ~(safety_null | side_effects_null | contraindications_null)
+        & (safety - side_effects - contraindications >= 40)
+    )
+
+    # Position of the price among priced analogues is within the first 30% of all analogues
+    rows, analogues = catalog.edges()
+    analogues_cnt = np.diff(catalog.indptr)
+    is_cheaper = has_price[analogues] & (price[analogues] < price[rows])
+    position = np.bincount(rows[is_cheaper], minlength=n)
+    is_cheapest = (
+        has_score & (score >= 60) & ~price_null & (analogues_cnt > 0) & (position <= np.ceil(analogues_cnt / 10.0 * 3))
+    )
+
+    # `(price - a.price) / price > (a.score - score) / a.score` for unscored priced products,
+    # both sides are multiplied by `price * a.score` to compare integers
+    candidate = has_price & ~has_score
+    edge = candidate[rows] & has_score[analogues] & has_price[analogues]
+    rows, analogues = rows[edge], analogues[edge]
+    p, a_p, a_s = price[rows], price[analogues], score[analogues]
+    s = np.where(score_null, 0, score)[rows]
+    lhs, rhs = (p - a_p) * a_s, (a_s - s) * p
+    cheaper = np.where(p * a_s > 0, lhs > rhs, lhs < rhs)
+
+    pairs = np.unique(np.stack([rows[cheaper], catalog.ids[analogues[cheaper]]], axis=1), axis=0).reshape(-1, 2)
+    cheaper_indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(pairs[:, 0], minlength=n), out=cheaper_indptr[1:])
+
+    return CatalogVerdicts(
+        catalog.ids,
+        is_effective,
+        is_effective_null,
+        is_cheapest,
+        is_trustworthy,
+        score_null,
+        cheaper_indptr,
+        pairs[:, 1],
+    )
@@ -0,0 +1,131 @@
+import bisect
+import logging
+import sys
+import threading
+import time
+import typing
+from array import array
+
+from django.conf import settings
+from django.db import connections
+
+from uptech.product.catalog import get_catalog_version
+from uptech.product.models import Product
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(name.lower().split())
+
+
+class SuggestIndex:
+    """Product names sorted by normalized form, prefix lookups are a single bisect."""
+
+    def __init__(self, rows: typing.Iterable[typing.Tuple[int, str]], version: int):
+        started_at = time.perf_counter()
+        entries = sorted((normalize_name(name), pk, name) for pk, name in rows)
+
+        self.version = version
+        self.keys = [key for key, _, _ in entries]
+        self.ids = array("q", (pk for _, pk, _ in entries))
+        self.names = [name for _, _, name in entries]
+        self.build_time = time.perf_counter() - started_at
+
+    @classmethod
+    def build(cls, version: int, chunk_size: int = 5000) -> "SuggestIndex":
+        rows = Product.objects.order_by().values_list("id", "name").iterator(chunk_size=chunk_size)
+        return cls(rows, version)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, prefix: str, limit: int = 10) -> typing.List[typing.Tuple[int, str]]:
+        prefix = normalize_name(prefix)
+        result = []
+        idx = bisect.bisect_left(self.keys, prefix)
+        while idx < len(self.keys) and len(result) < limit and self.keys[idx].startswith(prefix):
+            result.append((self.ids[idx], self.names[idx]))
+            idx += 1
+        return result
+
+    @property
+    def memory_footprint(self) -> int:
+        """Approximate size in bytes."""
+        size = sys.getsizeof(self.keys) + sys.getsizeof(self.names) + sys.getsizeof(self.ids)
+        size += sum(sys.getsizeof(k) for k in self.keys)
+        size += sum(sys.getsizeof(n) for n in self.names)
+        return size
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "size": len(self),
+            "memory_footprint": self.memory_footprint,
+            "build_time": self.build_time,
+        }
+
+
+class SuggestIndexHolder:
+    """
+    Process wide index which is rebuilt in a background thread after `fill` bumps the catalog version.
+
+    The version is polled at most every PRODUCT_SUGGEST_INDEX_CHECK_INTERVAL seconds,
+    the previous index keeps serving lookups while a new one is built.
+    """
+
+    def __init__(self):
+        self.index: typing.Optional[SuggestIndex] = None
+        self._lock = threading.Lock()
+        self._building = False
+        self._checked_at: typing.Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.PRODUCT_SUGGEST_INDEX_ENABLED
+
+    def start(self):
+        if self.enabled:
+            self._checked_at = time.monotonic()
+            self._rebuild_in_background(None)
+
+    def get(self) -> typing.Optional[SuggestIndex]:
+        if not self.enabled:
+            return None
+
+        now = time.monotonic()
+        if self._checked_at is None or now - self._checked_at >= settings.PRODUCT_SUGGEST_INDEX_CHECK_INTERVAL:
+            self._checked_at = now
+            version = get_catalog_version().version
+            if self.index is None or self.index.version != version:
+                self._rebuild_in_background(version)
+
+        return self.index
+
+    def rebuild(self, version: typing.Optional[int] = None) -> SuggestIndex:
+        if version is None:
+            version = get_catalog_version().version
+        index = SuggestIndex.build(version)
+        self.index = index
+        logger.info("Product suggest index is built: %s", index.stats())
+        return index
+
+    def _rebuild_in_background(self, version: typing.Optional[int]):
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+
+        threading.Thread(target=self._rebuild_thread, args=(version,), daemon=True).start()
+
+    def _rebuild_thread(self, version: typing.Optional[int]):
+        try:
+            self.rebuild(version)
+        except Exception:
+            logger.exception("Can't build product suggest index")
+        finally:
+            self._building = False
+            connections.close_all()
+
+
+suggest_index = SuggestIndexHolder()
@@ -0,0 +1,123 @@
+import typing
+
+from django.utils import timezone
+
+from uptech.product.analogues import AnalogueLoader, get_referencing_products
+from uptech.product.models import Product
+from uptech.utils import chunks
+
+VERDICT_NAMES = ["is_effective", "is_cheapest", "is_trustworthy", "cheaper_analogue_ids"]
+VERDICT_FIELDS = ["verdicts_computed_at", *(f"verdict_{name}" for name in VERDICT_NAMES)]
+
+
+def _normalize(value):
+    if isinstance(value, set):
+        return sorted(value)
+    if value is None:
+        return None
+    return bool(value)
+
+
+def compute_verdicts(product: Product) -> typing.Dict[str, typing.Any]:
+    """Evaluate live model logic. Product analogues have to be attached beforehand."""
+    return {
+        "is_effective": _normalize(product.is_effective),
+        "is_cheapest": _normalize(product.is_cheapest),
+        "is_trustworthy": _normalize(product.is_trustworthy),
+        "cheaper_analogue_ids": _normalize(product.get_cheaper_analogue_ids()),
+    }
+
+
+def _iter_batches(queryset, batch_size: int) -> typing.Generator[typing.List[Product], None, None]:
+    for batch in chunks(queryset.order_by("pk").iterator(chunk_size=batch_size), batch_size):
+        AnalogueLoader().load(batch)
+        yield batch
+
+
+def get_verdict_impact_ids(product_ids: typing.Iterable[int], source: typing.Optional[str] = None) -> typing.Set[int]:
+    """
+    Ids of products whose verdicts can change when price or score of the given products changes.
+
+    Verdicts depend on the product itself and on prices and scores of its analogues, so these are
+    the products and the ones listing them among analogues.
+    """
+    products = [*Product.objects.filter(pk__in=product_ids).only("pk", "medsis_id")]
+    if not products:
+        return set()
+    referencing_ids = get_referencing_products(products, source).values_list("pk", flat=True)
+    return {p.pk for p in products} | {*referencing_ids}
+
+
+def _stale_verdicts(product: Product, live: typing.Dict[str, typing.Any]) -> typing.Dict[str, typing.Any]:
+    """Stored verdicts of product which differ from live ones, as {name: stored value}."""
+    stale = {}
+    for name, live_value in live.items():
+        stored_value = getattr(product, f"verdict_{name}")
+        if name == "cheaper_analogue_ids":
+            stored_value = sorted(stored_value)
+        if stored_value != live_value:
+            stale[name] = stored_value
+    return stale
+
+
+def _iter_vectorized_batches(
+    queryset, batch_size: int
+) -> typing.Generator[typing.List[typing.Tuple[Product, typing.Dict[str, typing.Any]]], None, None]:
+    # numpy is only needed by the vectorized path
+    from uptech.product.scoring import CatalogArrays, score_catalog
+
+    verdicts = score_catalog(CatalogArrays.load())
+    products = queryset.order_by("pk").only("pk", *VERDICT_FIELDS).iterator(chunk_size=batch_size)
+    for batch in chunks(products, batch_size):
+        yield [(p, verdicts.get(p.pk)) for p in batch]
+
+
+def refresh_verdicts(
+    queryset=None, batch_size: int = 1000, only_changed: bool = False, vectorized: bool = False
+) -> int:
+    """
+    Recompute and store verdicts for every product in queryset (all products by default).
+
+    With `only_changed` products whose stored verdicts are still valid are not rewritten.
+    With `vectorized` verdicts of the whole catalog are computed at once by `uptech.product.scoring`.
+    Return the number of written products.
+    """
+    if queryset is None:
+        queryset = Product.objects.all()
+
+    if vectorized:
+        batches = _iter_vectorized_batches(queryset, batch_size)
+    else:
+        batches = ([(p, compute_verdicts(p)) for p in batch] for batch in _iter_batches(queryset, batch_size))
+
+    computed_at = timezone.now()
+    cnt = 0
+    for batch in batches:
+        products_to_update = []
+        for p, live in batch:
+            if only_changed and p.verdicts_computed_at is not None and not _stale_verdicts(p, live):
+                continue
+            for name, value in live.items():
+                setattr(p, f"verdict_{name}", value)
+            p.verdicts_computed_at = computed_at
+            products_to_update.append(p)
+        Product.objects.bulk_update(products_to_update, VERDICT_FIELDS)
+        cnt += len(products_to_update)
+    return cnt
+
+
+def diff_verdicts(
+    queryset=None, batch_size: int = 1000
+) -> typing.Generator[typing.Tuple[Product, str, typing.Any, typing.Any], None, None]:
+    """Yield (product, verdict name, stored value, live value) for every stale stored verdict."""
+    if queryset is None:
+        queryset = Product.objects.all()
+
+    for batch in _iter_batches(queryset, batch_size):
+        for p in batch:
+            live = compute_verdicts(p)
+            if p.verdicts_computed_at is None:
+                yield p, "verdicts_computed_at", None, None
+                continue
+            for name, stored_value in _stale_verdicts(p, live).items():
+                yield p, name, stored_value, live[name]
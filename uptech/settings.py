@@ -73,6 +73,11 @@ REST_FRAMEWORK = {
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_PAGINATION_CLASS": "contrib.drf.pagination.LimitedCursorPagination",
+    "DEFAULT_RENDERER_CLASSES": [
+        "contrib.drf.renderers.ORJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+        "contrib.drf.renderers.MessagePackRenderer",
+    ],
     # 'DEFAULT_FILTER_BACKENDS': (
     #     'contrib.rest_framework.filters.StrictOrderingFilter',
     # ),
@@ -83,12 +88,64 @@ REST_FRAMEWORK = {
 }
 
 
+# Seconds a worker trusts its last read of the catalog version
+CATALOG_VERSION_CACHE_TTL = 5
+
+# Response cache of product endpoints, see `uptech.api.products.cache`: "" (disabled), "locmem" or "shared"
+PRODUCT_RESPONSE_CACHE_BACKEND = os.environ.get("PRODUCT_RESPONSE_CACHE_BACKEND", "")
+PRODUCT_RESPONSE_CACHE_MAX_ENTRIES = 10000
+# Seconds per cached action, entries of previous catalog versions are never read again anyway
+PRODUCT_RESPONSE_CACHE_TTLS = {
+    "retrieve": 60 * 60,
+    "info": 60 * 60,
+    "search": 10 * 60,
+}
+
+# Clients revalidate product resources with ETag/Last-Modified after this many seconds
+PRODUCT_HTTP_CACHE_MAX_AGE = 60
+
+# In-process prefix index for `/products/suggest`, see `uptech.product.suggest`
+PRODUCT_SUGGEST_INDEX_ENABLED = os.environ.get("PRODUCT_SUGGEST_INDEX_ENABLED") == "1"
+# Seconds between catalog version checks which trigger index rebuild
+PRODUCT_SUGGEST_INDEX_CHECK_INTERVAL = 30
+
+# Requests slower than this are logged as warnings with their slowest queries, see `contrib.django.request_timing`
+REQUEST_TIMING_SLOW_MS = int(os.environ.get("REQUEST_TIMING_SLOW_MS", 500))
+REQUEST_TIMING_SLOW_QUERIES = 10
+
+# `manage.py fill` stores analogue summaries for `/products/search/?analogues=summary`,
+# see `uptech.api.products.summary`
+PRODUCT_ANALOGUE_SUMMARY_ENABLED = os.environ.get("PRODUCT_ANALOGUE_SUMMARY_ENABLED") == "1"
+
+# "array" reads stored `Product.analogue_ids`, "cluster" resolves them through medsis drugs and makes fill leave
+# the arrays empty, see `uptech.product.clusters` for switching between them
+PRODUCT_ANALOGUE_SOURCE = os.environ.get("PRODUCT_ANALOGUE_SOURCE", "array")
+
+# Bearer token of /internal/metrics/ scrapes, without it the endpoint is served on local environment only.
+# See `uptech.metrics` and gunicorn.conf.py for PROMETHEUS_MULTIPROC_DIR.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# JSON lines file sampled requests are appended to for `manage.py replay`, see `contrib.django.request_recording`
+REQUEST_RECORDING_PATH = os.environ.get("REQUEST_RECORDING_PATH", "")
+REQUEST_RECORDING_SAMPLE_RATE = float(os.environ.get("REQUEST_RECORDING_SAMPLE_RATE", 1.0))
+REQUEST_RECORDING_PATH_PREFIXES = ["/api/v1/"]
+REQUEST_RECORDING_MAX_BODY = 64 * 1024
+
+# Route product search, retrieve and info to `uptech.api.products.async_views`, enabled by `uptech.asgi`,
+# needs DB_CONNECTION_MODE "pool" or "persistent"
+PRODUCT_ASYNC_VIEWS_ENABLED = os.environ.get("PRODUCT_ASYNC_VIEWS_ENABLED") == "1"
+
+
 if BACKEND_ENV in (LOCAL, STAGE):
     REST_FRAMEWORK["DEFAULT_AUTHENTICATION_CLASSES"] = [
         "rest_framework.authentication.SessionAuthentication",
     ]
 
 MIDDLEWARE = [
+    # Outermost, so the total covers the other middleware
+    "contrib.django.request_timing.RequestTimingMiddleware",
+    "uptech.metrics.MetricsMiddleware",
+    "contrib.django.request_recording.RequestRecordingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -137,8 +194,39 @@ elif BACKEND_ENV in (STAGE,):
     DATABASES = {
         "default": dj_database_url.config(),
     }
+
+# Connection management, see `contrib.django.db.backends.postgresql`:
+# - "" opens a connection per request;
+# - "persistent" keeps the connection of a worker for DB_CONN_MAX_AGE seconds and checks it before reuse;
+# - "pool" shares at most DB_POOL_SIZE connections between threads of a worker process.
+# Sync gunicorn workers (see Procfile) serve one request at a time, so a worker never needs more than one connection
+# and "persistent" suits them, every worker holds one connection. "pool" pays off with threaded workers
+# (`--threads`), the database gets workers * DB_POOL_SIZE connections at most, instead of one per thread.
+DB_CONNECTION_MODE = os.environ.get("DB_CONNECTION_MODE", "")
+DATABASES["default"]["ENGINE"] = "contrib.django.db.backends.postgresql"
+if DB_CONNECTION_MODE == "persistent":
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.environ.get("DB_CONN_MAX_AGE", 600))
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+elif DB_CONNECTION_MODE == "pool":
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+    DATABASES["default"]["POOL"] = {
+        "SIZE": int(os.environ.get("DB_POOL_SIZE", 4)),
+        "TIMEOUT": float(os.environ.get("DB_POOL_TIMEOUT", 5)),
+    }
 # DATABASES["default"]["ENGINE"] = "django.contrib.gis.db.backends.postgis"
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Shared between worker processes, the database backend needs `manage.py createcachetable`
+    "shared": {
+        "BACKEND": os.environ.get("SHARED_CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"),
+        "LOCATION": os.environ.get("SHARED_CACHE_LOCATION", "shared_cache"),
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -173,6 +261,24 @@ STATICFILES_DIRS = (
     # os.path.join(BASE_DIR, 'staticfiles'),
 )
 
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {
+            "class": "logging.StreamHandler",
+        },
+    },
+    "loggers": {
+        # A JSON line per request
+        "contrib.django.request_timing": {
+            "handlers": ["console"],
+            "level": os.environ.get("REQUEST_TIMING_LOG_LEVEL", "INFO"),
+            "propagate": False,
+        },
+    },
+}
+
 
 # if BACKEND_ENV in (STAGE, PROD):
 #     sentry_sdk.init(
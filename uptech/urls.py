@@ -22,6 +22,7 @@ from django.views.static import serve
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
 from uptech.api import urls as api
+from uptech.metrics import metrics_view
 
 
 def trigger_error(request):
@@ -32,6 +33,7 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include((api, "api"), namespace="api")),
     path("sentry-debug/", trigger_error),
+    path("internal/metrics/", metrics_view, name="metrics"),
     *static(settings.STATIC_URL, document_root=settings.STATIC_ROOT),
     url(r"^static/(?P<path>.*)$", serve, {"document_root": settings.STATIC_ROOT}),
 ]
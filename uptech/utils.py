@@ -1,3 +1,4 @@
+import json
 import typing
 
 T = typing.TypeVar("T")
@@ -15,3 +16,59 @@ def chunks(data: typing.Iterable[T], batch_size=100) -> typing.Generator[typing.
 
     if batch:
         yield batch
+
+
+def iter_json_array(f: typing.TextIO, read_size: int = 1 << 16) -> typing.Generator[typing.Any, None, None]:
+    """
+    Yield items of a top level JSON array one by one, reading the file by read_size characters.
+
+    Memory usage is bounded by the largest item instead of the whole document.
+    """
+
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = "", 0, False
+    started = False
+
+    def read_more():
+        nonlocal buffer, pos, eof
+        chunk = f.read(read_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+    while True:
+        separators = " \t\r\n," if started else " \t\r\n"
+        while pos < len(buffer) and buffer[pos] in separators:
+            pos += 1
+
+        if pos == len(buffer):
+            if eof:
+                raise ValueError("Unexpected end of JSON array")
+            read_more()
+            continue
+
+        if not started:
+            if buffer[pos] != "[":
+                raise ValueError("JSON document is not an array")
+            started = True
+            pos += 1
+            continue
+
+        if buffer[pos] == "]":
+            return
+
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            # The item is split between reads
+            read_more()
+            continue
+
+        if not eof and (end == len(buffer) or buffer[end] not in " \t\r\n,]"):
+            # Numbers and literals can be cut at the end of the buffer
+            read_more()
+            continue
+
+        yield item
+        pos = end
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "uptech.settings")
 
 application = get_wsgi_application()
+
+# Imported after setup, the index is built in a background thread if enabled
+from uptech.product.suggest import suggest_index  # noqa: E402
+
+suggest_index.start()